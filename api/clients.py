@@ -7,7 +7,12 @@ from models.document import Document, EntityType, DocumentType
 from schemas.client import ClientSchema, ClientListSchema
 from schemas.document import DocumentSchema, DocumentListSchema
 from app import db
-from utils.pagination import paginate
+from utils.conditional import conditional_row, conditional_tables
+from utils.pagination import COUNT_MODES, paginate, paginate_cursor
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
+from utils.search import apply_search
+from utils.data_versions import bump_version
 from utils.file_storage import save_file
 import os
 import logging
@@ -38,9 +43,14 @@ documents_schema = DocumentListSchema(many=True)
 # Query parameter parser
 client_parser = reqparse.RequestParser()
 client_parser.add_argument('status', type=str, help='Filter by status')
+client_parser.add_argument('q', type=str, help='Full-text search, results ranked by relevance unless sort is given')
 client_parser.add_argument('sort', type=str, help='Sort field')
 client_parser.add_argument('page', type=int, help='Page number')
 client_parser.add_argument('per_page', type=int, help='Items per page')
+client_parser.add_argument('cursor', type=str, help='Pagination cursor; pass it empty for the first page to use cursor pagination')
+client_parser.add_argument('count', type=str, choices=COUNT_MODES, help='How total_items is computed (exact, window, cached, none)')
+client_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+client_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 # Setup file upload parser
 document_upload_parser = reqparse.RequestParser()
@@ -53,10 +63,24 @@ class ClientList(Resource):
     @jwt_required()
     @api.expect(client_parser)
     @api.response(200, 'Success')
+    @conditional_tables(('clients',))
     def get(self):
         """Get all clients with optional filtering and pagination"""
         args = client_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(client_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Client.query, Client, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Client.query
         
@@ -65,16 +89,36 @@ class ClientList(Resource):
             query = query.filter(Client.status == args['status'])
         
         # Apply sorting
+        sort_column, descending = Client.name, False
         if args.get('sort'):
             sort_field = args['sort']
             if hasattr(Client, sort_field):
-                query = query.order_by(getattr(Client, sort_field))
+                sort_column, descending = getattr(Client, sort_field), False
+                query = query.order_by(sort_column)
         else:
             # Default sort by name
             query = query.order_by(Client.name)
         
+        # Full-text search, ranked by relevance unless a sort is requested
+        if args.get('q'):
+            # Cursor pages are ordered by (sort, id), which would silently drop the ranking
+            if args.get('cursor') is not None and not request.args.get('sort'):
+                return {'error': 'Ranked search results cannot be paged with cursor; use page, or pass sort'}, 400
+            query = apply_search(query, Client, args['q'], rank=not request.args.get('sort'))
+        
+        # Only load the columns the list schema serializes
+        query = project_query(query, Client, list_schema, sort_column)
+        
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), client_list_schema)
+        if args.get('cursor') is not None:
+            try:
+                result = paginate_cursor(query, sort_column, Client.id, args['cursor'], args.get('per_page', 10),
+                                         list_schema, descending)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema,
+                              args.get('count'))
         
         return result, 200
     
@@ -92,6 +136,7 @@ class ClientList(Resource):
             
             # Add to database
             db.session.add(client)
+            bump_version('clients')
             db.session.commit()
             
             return {'data': client_schema.dump(client)}, 201
@@ -104,12 +149,23 @@ class ClientList(Resource):
 @api.route('/<int:id>')
 class ClientDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Client not found')
+    @conditional_row(Client)
     def get(self, id):
         """Get a client by ID"""
-        client = Client.query.get_or_404(id)
-        return {'data': client_schema.dump(client)}, 200
+        try:
+            schema = select_fields(client_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Client.query
+        if schema is not client_schema:
+            # Only load the requested columns
+            query = project_query(query, Client, schema)
+        client = query.get_or_404(id)
+        return {'data': schema.dump(client)}, 200
     
     @jwt_required()
     @api.expect(client_model)
@@ -127,6 +183,7 @@ class ClientDetail(Resource):
                 if hasattr(client, key):
                     setattr(client, key, value)
             
+            bump_version('clients')
             db.session.commit()
             
             return {'data': client_schema.dump(client)}, 200
@@ -150,6 +207,7 @@ class ClientDetail(Resource):
             
         try:
             db.session.delete(client)
+            bump_version('clients')
             db.session.commit()
             return {'message': 'Client deleted'}, 200
         except Exception as e:
@@ -6,6 +6,8 @@ from models.document import Document, EntityType, DocumentType
 from schemas.document import DocumentSchema, DocumentListSchema
 from app import db
 from utils.pagination import paginate
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
 from utils.file_storage import save_file, get_file_path
 import os
 import logging
@@ -33,6 +35,8 @@ document_parser.add_argument('entity_id', type=int, help='Filter by entity ID')
 document_parser.add_argument('type', type=str, help='Filter by document type')
 document_parser.add_argument('page', type=int, help='Page number')
 document_parser.add_argument('per_page', type=int, help='Items per page')
+document_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+document_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 # Setup file upload parser
 document_upload_parser = reqparse.RequestParser()
@@ -52,6 +56,19 @@ class DocumentList(Resource):
         """Get all documents with optional filtering and pagination"""
         args = document_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(documents_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Document.query, Document, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Document.query
         
@@ -65,8 +82,11 @@ class DocumentList(Resource):
         if args.get('type'):
             query = query.filter(Document.type == args['type'])
         
+        # Only load the columns the list schema serializes
+        query = project_query(query, Document, list_schema)
+        
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), documents_schema)
+        result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema)
         
         return result, 200
     
@@ -105,12 +125,22 @@ class DocumentList(Resource):
 @api.route('/<int:id>')
 class DocumentDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Document not found')
     def get(self, id):
         """Get a document by ID"""
-        document = Document.query.get_or_404(id)
-        return {'data': document_schema.dump(document)}, 200
+        try:
+            schema = select_fields(document_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Document.query
+        if schema is not document_schema:
+            # Only load the requested columns
+            query = project_query(query, Document, schema)
+        document = query.get_or_404(id)
+        return {'data': schema.dump(document)}, 200
     
     @jwt_required()
     @api.response(200, 'Document deleted successfully')
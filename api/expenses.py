@@ -1,4 +1,4 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from flask_restx import Namespace, Resource, fields, reqparse
 from flask_jwt_extended import jwt_required
 from werkzeug.datastructures import FileStorage
@@ -10,9 +10,19 @@ from schemas.expense import (ExpenseSchema, ExpenseListSchema,
                             RecurringExpenseSchema, RecurringExpenseListSchema,
                             AccruedExpenseSchema, AccruedExpenseListSchema)
 from app import db
-from utils.pagination import paginate
+from utils.conditional import conditional_tables
+from utils.pagination import COUNT_MODES, paginate, paginate_cursor
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
+from utils.search import apply_search
+from utils.serializers import dump
+from utils.aggregation import currency_totals, convert_totals
+from utils.csv_import import import_csv
+from utils.export import EXPORT_FORMATS, export_query
+from utils.data_versions import bump_version
 from utils.file_storage import save_file, get_file_path
 from utils.currency import convert_currency
+from utils.rollups import apply_expense, apply_expenses
 from sqlalchemy import func
 import os
 import logging
@@ -76,9 +86,15 @@ expense_parser.add_argument('category', type=str, help='Filter by category')
 expense_parser.add_argument('date_from', type=str, help='Filter by date from (YYYY-MM-DD)')
 expense_parser.add_argument('date_to', type=str, help='Filter by date to (YYYY-MM-DD)')
 expense_parser.add_argument('currency', type=str, help='Currency for conversion')
+expense_parser.add_argument('q', type=str, help='Full-text search, results ranked by relevance unless sort is given')
 expense_parser.add_argument('sort', type=str, help='Sort field')
 expense_parser.add_argument('page', type=int, help='Page number')
 expense_parser.add_argument('per_page', type=int, help='Items per page')
+expense_parser.add_argument('cursor', type=str, help='Pagination cursor; pass it empty for the first page to use cursor pagination')
+expense_parser.add_argument('count', type=str, choices=COUNT_MODES, help='How total_items is computed (exact, window, cached, none)')
+expense_parser.add_argument('format', type=str, choices=('json',) + EXPORT_FORMATS, help='Response format (json, csv, ndjson)')
+expense_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+expense_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 recurring_expense_parser = reqparse.RequestParser()
 recurring_expense_parser.add_argument('status', type=str, help='Filter by status')
@@ -86,6 +102,7 @@ recurring_expense_parser.add_argument('category', type=str, help='Filter by cate
 recurring_expense_parser.add_argument('frequency', type=str, help='Filter by frequency')
 recurring_expense_parser.add_argument('page', type=int, help='Page number')
 recurring_expense_parser.add_argument('per_page', type=int, help='Items per page')
+recurring_expense_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
 
 accrued_expense_parser = reqparse.RequestParser()
 accrued_expense_parser.add_argument('status', type=str, help='Filter by status')
@@ -95,6 +112,7 @@ accrued_expense_parser.add_argument('date_to', type=str, help='Filter by due dat
 accrued_expense_parser.add_argument('is_recurring', type=bool, help='Filter by recurring flag')
 accrued_expense_parser.add_argument('page', type=int, help='Page number')
 accrued_expense_parser.add_argument('per_page', type=int, help='Items per page')
+accrued_expense_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
 
 # Setup file upload parser
 expense_upload_parser = reqparse.RequestParser()
@@ -107,15 +125,36 @@ expense_upload_parser.add_argument('payment_method', type=str, required=True, he
 expense_upload_parser.add_argument('notes', type=str, help='Additional notes')
 expense_upload_parser.add_argument('receipt', type=FileStorage, location='files', help='Receipt file')
 
+# CSV import parser
+expense_import_parser = reqparse.RequestParser()
+expense_import_parser.add_argument('file', type=FileStorage, location='files', required=True, help='CSV file with a header row')
+
+# Columns accepted in CSV imports
+EXPENSE_IMPORT_COLUMNS = ('description', 'date', 'amount', 'currency', 'category', 'payment_method', 'notes')
+
 @api.route('')
 class ExpenseList(Resource):
     @jwt_required()
     @api.expect(expense_parser)
     @api.response(200, 'Success')
+    @conditional_tables(('expenses', 'exchange_rates'))
     def get(self):
         """Get all expenses with optional filtering and pagination"""
         args = expense_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(expense_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Expense.query, Expense, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Expense.query
         
@@ -138,31 +177,43 @@ class ExpenseList(Resource):
                 return {'error': 'Invalid date_to format. Use YYYY-MM-DD'}, 400
         
         # Apply sorting
+        sort_column, descending = Expense.date, True
         if args.get('sort'):
             sort_field = args['sort']
             if hasattr(Expense, sort_field):
-                query = query.order_by(getattr(Expense, sort_field))
+                sort_column, descending = getattr(Expense, sort_field), False
+                query = query.order_by(sort_column)
         else:
             # Default sort by date desc
             query = query.order_by(Expense.date.desc())
         
-        # Calculate total before pagination
-        total_cop = sum(float(e.amount) for e in query.all() if e.currency == Currency.COP)
-        total_usd = sum(float(e.amount) for e in query.all() if e.currency == Currency.USD)
+        # Full-text search, ranked by relevance unless a sort is requested
+        if args.get('q'):
+            # Cursor pages are ordered by (sort, id), which would silently drop the ranking
+            if args.get('cursor') is not None and not request.args.get('sort'):
+                return {'error': 'Ranked search results cannot be paged with cursor; use page, or pass sort'}, 400
+            query = apply_search(query, Expense, args['q'], rank=not request.args.get('sort'))
         
-        # Convert totals if necessary
-        target_currency = args.get('currency')
-        total = None
+        # Only load the columns the list schema serializes
+        query = project_query(query, Expense, list_schema, sort_column)
         
-        if target_currency == 'COP':
-            total = total_cop + convert_currency(total_usd, 'USD', 'COP')
-        elif target_currency == 'USD':
-            total = total_usd + convert_currency(total_cop, 'COP', 'USD')
-        else:
-            total = {'COP': total_cop, 'USD': total_usd}
+        # Stream the full result set for exports instead of paginating
+        if args.get('format') in EXPORT_FORMATS:
+            return export_query(query, list_schema, args['format'], 'expenses')
+        
+        # Calculate totals in the database before pagination
+        total = convert_totals(currency_totals(query, Expense), args.get('currency'))
         
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), expense_list_schema)
+        if args.get('cursor') is not None:
+            try:
+                result = paginate_cursor(query, sort_column, Expense.id, args['cursor'], args.get('per_page', 10),
+                                         list_schema, descending)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema,
+                              args.get('count'))
         
         # Add total to result
         result['total'] = total
@@ -206,6 +257,8 @@ class ExpenseList(Resource):
             
             # Add to database
             db.session.add(expense)
+            apply_expense(expense)
+            bump_version('expenses')
             db.session.commit()
             
             return {'data': expense_schema.dump(expense)}, 201
@@ -215,15 +268,43 @@ class ExpenseList(Resource):
             logging.error(f"Error creating expense: {str(e)}")
             return {'error': str(e)}, 400
 
+@api.route('/import')
+class ExpenseImport(Resource):
+    @jwt_required()
+    @api.expect(expense_import_parser)
+    @api.response(201, 'Rows imported')
+    @api.response(400, 'Invalid file or no valid rows')
+    def post(self):
+        """Import expenses from a CSV file, reporting invalid rows by line number"""
+        args = expense_import_parser.parse_args()
+        
+        try:
+            result = import_csv(args['file'], Expense, ExpenseSchema, EXPENSE_IMPORT_COLUMNS, apply_expenses,
+                                current_app.config.get('IMPORT_CHUNK_SIZE'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        return {'data': result}, 201 if result['imported'] else 400
+
 @api.route('/<int:id>')
 class ExpenseDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Expense not found')
     def get(self, id):
         """Get an expense by ID"""
-        expense = Expense.query.get_or_404(id)
-        return {'data': expense_schema.dump(expense)}, 200
+        try:
+            schema = select_fields(expense_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Expense.query
+        if schema is not expense_schema:
+            # Only load the requested columns
+            query = project_query(query, Expense, schema)
+        expense = query.get_or_404(id)
+        return {'data': schema.dump(expense)}, 200
     
     @jwt_required()
     @api.expect(expense_model)
@@ -236,11 +317,15 @@ class ExpenseDetail(Resource):
             expense = Expense.query.get_or_404(id)
             expense_data = request.json
             
-            # Update expense with new data
-            for key, value in expense_data.items():
-                if hasattr(expense, key):
-                    setattr(expense, key, value)
+            # Move the expense out of its old period rollups
+            apply_expense(expense, sign=-1)
+            
+            # Update expense with new data, deserialized so dates and amounts
+            # have their column types before the rollups are recomputed
+            expense_schema.load(expense_data, instance=expense, partial=True)
             
+            apply_expense(expense)
+            bump_version('expenses')
             db.session.commit()
             
             return {'data': expense_schema.dump(expense)}, 200
@@ -266,7 +351,9 @@ class ExpenseDetail(Resource):
                     os.remove(file_path)
             
             # Delete from database
+            apply_expense(expense, sign=-1)
             db.session.delete(expense)
+            bump_version('expenses')
             db.session.commit()
             
             return {'message': 'Expense deleted'}, 200
@@ -285,6 +372,12 @@ class RecurringExpenseList(Resource):
         """Get all recurring expenses with optional filtering and pagination"""
         args = recurring_expense_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(recurring_expense_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         # Base query
         query = RecurringExpense.query
         
@@ -301,8 +394,11 @@ class RecurringExpenseList(Resource):
         # Default sort by next_payment
         query = query.order_by(RecurringExpense.next_payment)
         
+        # Only load the columns the list schema serializes
+        query = project_query(query, RecurringExpense, list_schema)
+        
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), recurring_expense_list_schema)
+        result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema)
         
         return result, 200
     
@@ -336,12 +432,22 @@ class RecurringExpenseList(Resource):
 @api.route('/recurring/<int:id>')
 class RecurringExpenseDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Recurring expense not found')
     def get(self, id):
         """Get a recurring expense by ID"""
-        recurring_expense = RecurringExpense.query.get_or_404(id)
-        return {'data': recurring_expense_schema.dump(recurring_expense)}, 200
+        try:
+            schema = select_fields(recurring_expense_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = RecurringExpense.query
+        if schema is not recurring_expense_schema:
+            # Only load the requested columns
+            query = project_query(query, RecurringExpense, schema)
+        recurring_expense = query.get_or_404(id)
+        return {'data': schema.dump(recurring_expense)}, 200
     
     @jwt_required()
     @api.expect(recurring_expense_model)
@@ -472,6 +578,7 @@ class GenerateAccruedExpenses(Resource):
             if next_payment_date:
                 recurring_expense.next_payment = next_payment_date
             
+            bump_version('accrued_expenses')
             db.session.commit()
             
             return {
@@ -493,6 +600,12 @@ class AccruedExpenseList(Resource):
         """Get all accrued expenses with optional filtering and pagination"""
         args = accrued_expense_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(accrued_expense_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         # Base query
         query = AccruedExpense.query
         
@@ -523,8 +636,11 @@ class AccruedExpenseList(Resource):
         # Default sort by due_date
         query = query.order_by(AccruedExpense.due_date)
         
+        # Only load the columns the list schema serializes
+        query = project_query(query, AccruedExpense, list_schema)
+        
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), accrued_expense_list_schema)
+        result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema)
         
         return result, 200
     
@@ -542,6 +658,7 @@ class AccruedExpenseList(Resource):
             
             # Add to database
             db.session.add(accrued_expense)
+            bump_version('accrued_expenses')
             db.session.commit()
             
             return {'data': accrued_expense_schema.dump(accrued_expense)}, 201
@@ -554,12 +671,22 @@ class AccruedExpenseList(Resource):
 @api.route('/accrued/<int:id>')
 class AccruedExpenseDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Accrued expense not found')
     def get(self, id):
         """Get an accrued expense by ID"""
-        accrued_expense = AccruedExpense.query.get_or_404(id)
-        return {'data': accrued_expense_schema.dump(accrued_expense)}, 200
+        try:
+            schema = select_fields(accrued_expense_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = AccruedExpense.query
+        if schema is not accrued_expense_schema:
+            # Only load the requested columns
+            query = project_query(query, AccruedExpense, schema)
+        accrued_expense = query.get_or_404(id)
+        return {'data': schema.dump(accrued_expense)}, 200
     
     @jwt_required()
     @api.expect(accrued_expense_model)
@@ -577,6 +704,7 @@ class AccruedExpenseDetail(Resource):
                 if hasattr(accrued_expense, key):
                     setattr(accrued_expense, key, value)
             
+            bump_version('accrued_expenses')
             db.session.commit()
             
             return {'data': accrued_expense_schema.dump(accrued_expense)}, 200
@@ -601,6 +729,7 @@ class AccruedExpenseDetail(Resource):
                     os.remove(file_path)
             
             db.session.delete(accrued_expense)
+            bump_version('accrued_expenses')
             db.session.commit()
             
             return {'message': 'Accrued expense deleted'}, 200
@@ -614,11 +743,17 @@ class AccruedExpenseDetail(Resource):
 class OverdueAccruedExpenses(Resource):
     @jwt_required()
     @api.expect(reqparse.RequestParser().add_argument('currency', type=str, help='Currency for conversion'))
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     def get(self):
         """Get overdue accrued expenses"""
         args = reqparse.RequestParser().add_argument('currency', type=str).parse_args()
         
+        try:
+            list_schema = select_fields(accrued_expense_list_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         today = date.today()
         
         # Get all overdue accrued expenses
@@ -631,6 +766,8 @@ class OverdueAccruedExpenses(Resource):
         for expense in overdue_expenses:
             expense.status = AccruedExpenseStatus.VENCIDO
         
+        if overdue_expenses:
+            bump_version('accrued_expenses')
         db.session.commit()
         
         # Calculate total
@@ -649,7 +786,7 @@ class OverdueAccruedExpenses(Resource):
             total = {'COP': total_cop, 'USD': total_usd}
         
         return {
-            'data': accrued_expense_list_schema.dump(overdue_expenses),
+            'data': dump(list_schema, overdue_expenses),
             'total': total
         }, 200
 
@@ -659,6 +796,7 @@ class UpcomingAccruedExpenses(Resource):
     @api.expect(reqparse.RequestParser()
                 .add_argument('days', type=int, default=30, help='Number of days to look ahead')
                 .add_argument('currency', type=str, help='Currency for conversion'))
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     def get(self):
         """Get upcoming accrued expenses within specified days"""
@@ -667,6 +805,11 @@ class UpcomingAccruedExpenses(Resource):
         parser.add_argument('currency', type=str)
         args = parser.parse_args()
         
+        try:
+            list_schema = select_fields(accrued_expense_list_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         days = args.get('days', 30)
         today = date.today()
         end_date = today + timedelta(days=days)
@@ -694,7 +837,7 @@ class UpcomingAccruedExpenses(Resource):
             total = {'COP': total_cop, 'USD': total_usd}
         
         return {
-            'data': accrued_expense_list_schema.dump(upcoming_expenses),
+            'data': dump(list_schema, upcoming_expenses),
             'total': total
         }, 200
 
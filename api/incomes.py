@@ -1,4 +1,4 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from flask_restx import Namespace, Resource, fields, reqparse
 from flask_jwt_extended import jwt_required
 from werkzeug.datastructures import FileStorage
@@ -7,9 +7,20 @@ from sqlalchemy import func, extract
 from models.income import Income, Currency
 from schemas.income import IncomeSchema, IncomeListSchema
 from app import db
-from utils.pagination import paginate
+from utils.conditional import conditional_tables
+from utils.pagination import COUNT_MODES, paginate, paginate_cursor
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
+from utils.search import apply_search
+from utils.aggregation import currency_totals, convert_totals
+from utils.csv_import import import_csv
+from utils.export import EXPORT_FORMATS, export_query
+from utils.data_versions import bump_version
 from utils.file_storage import save_file, get_file_path
 from utils.currency import convert_currency
+from utils.periods import period_label
+from utils.rollups import apply_income, apply_incomes, period_totals
+from models.rollup import PeriodRollup, RollupSource
 import os
 import logging
 
@@ -39,9 +50,15 @@ income_parser.add_argument('type', type=str, help='Filter by income type')
 income_parser.add_argument('date_from', type=str, help='Filter by date from (YYYY-MM-DD)')
 income_parser.add_argument('date_to', type=str, help='Filter by date to (YYYY-MM-DD)')
 income_parser.add_argument('currency', type=str, help='Currency for conversion')
+income_parser.add_argument('q', type=str, help='Full-text search, results ranked by relevance unless sort is given')
 income_parser.add_argument('sort', type=str, help='Sort field')
 income_parser.add_argument('page', type=int, help='Page number')
 income_parser.add_argument('per_page', type=int, help='Items per page')
+income_parser.add_argument('cursor', type=str, help='Pagination cursor; pass it empty for the first page to use cursor pagination')
+income_parser.add_argument('count', type=str, choices=COUNT_MODES, help='How total_items is computed (exact, window, cached, none)')
+income_parser.add_argument('format', type=str, choices=('json',) + EXPORT_FORMATS, help='Response format (json, csv, ndjson)')
+income_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+income_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 # Setup file upload parser
 income_upload_parser = reqparse.RequestParser()
@@ -55,20 +72,48 @@ income_upload_parser.add_argument('payment_method', type=str, required=True, hel
 income_upload_parser.add_argument('notes', type=str, help='Additional notes')
 income_upload_parser.add_argument('receipt', type=FileStorage, location='files', help='Receipt file')
 
+# CSV import parser
+income_import_parser = reqparse.RequestParser()
+income_import_parser.add_argument('file', type=FileStorage, location='files', required=True, help='CSV file with a header row')
+
+# Columns accepted in CSV imports
+INCOME_IMPORT_COLUMNS = ('description', 'date', 'amount', 'currency', 'type', 'client', 'payment_method', 'notes')
+
 # Analysis parameter parser
 analysis_parser = reqparse.RequestParser()
 analysis_parser.add_argument('period', type=str, default='month', help='Analysis period (month, quarter, year)')
 analysis_parser.add_argument('currency', type=str, help='Currency for conversion')
 
+def _currency_totals(period_rows):
+    """Collapse ``(period_start, amount, currency)`` rollup rows into ``(amount, currency)`` totals"""
+    totals = {}
+    for _, amount, currency in period_rows:
+        totals[currency] = totals.get(currency, 0) + amount
+    return [(amount, currency) for currency, amount in totals.items()]
+
 @api.route('')
 class IncomeList(Resource):
     @jwt_required()
     @api.expect(income_parser)
     @api.response(200, 'Success')
+    @conditional_tables(('incomes', 'exchange_rates'))
     def get(self):
         """Get all incomes with optional filtering and pagination"""
         args = income_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(income_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Income.query, Income, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Income.query
         
@@ -91,31 +136,43 @@ class IncomeList(Resource):
                 return {'error': 'Invalid date_to format. Use YYYY-MM-DD'}, 400
         
         # Apply sorting
+        sort_column, descending = Income.date, True
         if args.get('sort'):
             sort_field = args['sort']
             if hasattr(Income, sort_field):
-                query = query.order_by(getattr(Income, sort_field))
+                sort_column, descending = getattr(Income, sort_field), False
+                query = query.order_by(sort_column)
         else:
             # Default sort by date desc
             query = query.order_by(Income.date.desc())
         
-        # Calculate total before pagination
-        total_cop = sum(float(i.amount) for i in query.all() if i.currency == Currency.COP)
-        total_usd = sum(float(i.amount) for i in query.all() if i.currency == Currency.USD)
+        # Full-text search, ranked by relevance unless a sort is requested
+        if args.get('q'):
+            # Cursor pages are ordered by (sort, id), which would silently drop the ranking
+            if args.get('cursor') is not None and not request.args.get('sort'):
+                return {'error': 'Ranked search results cannot be paged with cursor; use page, or pass sort'}, 400
+            query = apply_search(query, Income, args['q'], rank=not request.args.get('sort'))
         
-        # Convert totals if necessary
-        target_currency = args.get('currency')
-        total = None
+        # Only load the columns the list schema serializes
+        query = project_query(query, Income, list_schema, sort_column)
         
-        if target_currency == 'COP':
-            total = total_cop + convert_currency(total_usd, 'USD', 'COP')
-        elif target_currency == 'USD':
-            total = total_usd + convert_currency(total_cop, 'COP', 'USD')
-        else:
-            total = {'COP': total_cop, 'USD': total_usd}
+        # Stream the full result set for exports instead of paginating
+        if args.get('format') in EXPORT_FORMATS:
+            return export_query(query, list_schema, args['format'], 'incomes')
+        
+        # Calculate totals in the database before pagination
+        total = convert_totals(currency_totals(query, Income), args.get('currency'))
         
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), income_list_schema)
+        if args.get('cursor') is not None:
+            try:
+                result = paginate_cursor(query, sort_column, Income.id, args['cursor'], args.get('per_page', 10),
+                                         list_schema, descending)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema,
+                              args.get('count'))
         
         # Add total to result
         result['total'] = total
@@ -160,6 +217,8 @@ class IncomeList(Resource):
             
             # Add to database
             db.session.add(income)
+            apply_income(income)
+            bump_version('incomes')
             db.session.commit()
             
             return {'data': income_schema.dump(income)}, 201
@@ -169,15 +228,43 @@ class IncomeList(Resource):
             logging.error(f"Error creating income: {str(e)}")
             return {'error': str(e)}, 400
 
+@api.route('/import')
+class IncomeImport(Resource):
+    @jwt_required()
+    @api.expect(income_import_parser)
+    @api.response(201, 'Rows imported')
+    @api.response(400, 'Invalid file or no valid rows')
+    def post(self):
+        """Import incomes from a CSV file, reporting invalid rows by line number"""
+        args = income_import_parser.parse_args()
+        
+        try:
+            result = import_csv(args['file'], Income, IncomeSchema, INCOME_IMPORT_COLUMNS, apply_incomes,
+                                current_app.config.get('IMPORT_CHUNK_SIZE'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        return {'data': result}, 201 if result['imported'] else 400
+
 @api.route('/<int:id>')
 class IncomeDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Income not found')
     def get(self, id):
         """Get an income by ID"""
-        income = Income.query.get_or_404(id)
-        return {'data': income_schema.dump(income)}, 200
+        try:
+            schema = select_fields(income_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Income.query
+        if schema is not income_schema:
+            # Only load the requested columns
+            query = project_query(query, Income, schema)
+        income = query.get_or_404(id)
+        return {'data': schema.dump(income)}, 200
     
     @jwt_required()
     @api.expect(income_model)
@@ -190,11 +277,15 @@ class IncomeDetail(Resource):
             income = Income.query.get_or_404(id)
             income_data = request.json
             
-            # Update income with new data
-            for key, value in income_data.items():
-                if hasattr(income, key):
-                    setattr(income, key, value)
+            # Move the income out of its old period rollups
+            apply_income(income, sign=-1)
             
+            # Update income with new data, deserialized so dates and amounts
+            # have their column types before the rollups are recomputed
+            income_schema.load(income_data, instance=income, partial=True)
+            
+            apply_income(income)
+            bump_version('incomes')
             db.session.commit()
             
             return {'data': income_schema.dump(income)}, 200
@@ -220,7 +311,9 @@ class IncomeDetail(Resource):
                     os.remove(file_path)
             
             # Delete from database
+            apply_income(income, sign=-1)
             db.session.delete(income)
+            bump_version('incomes')
             db.session.commit()
             
             return {'message': 'Income deleted'}, 200
@@ -247,34 +340,17 @@ class IncomeAnalysis(Resource):
         if period == 'month':
             # Last 12 months
             start_date = today - timedelta(days=365)
-            group_by = func.date_trunc('month', Income.date)
-            label_format = '%Y-%m'
         elif period == 'quarter':
             # Last 8 quarters
             start_date = today - timedelta(days=730)  # 2 years
-            group_by = func.date_trunc('quarter', Income.date)
-            label_format = '%Y-Q%m'  # Will need post-processing
         elif period == 'year':
             # Last 5 years
             start_date = today - timedelta(days=1825)  # 5 years
-            group_by = func.date_trunc('year', Income.date)
-            label_format = '%Y'
         else:
             return {'error': 'Invalid period. Use month, quarter, or year'}, 400
             
-        # Monthly/quarterly/yearly aggregated data
-        period_data_query = db.session.query(
-            group_by.label('period'),
-            func.sum(Income.amount).label('amount'),
-            Income.currency
-        ).filter(
-            Income.date >= start_date.date()
-        ).group_by(
-            group_by,
-            Income.currency
-        ).order_by(
-            group_by
-        ).all()
+        # Monthly/quarterly/yearly aggregated data from the period rollups
+        period_data_query = period_totals(RollupSource.INCOME, period, date_from=start_date.date())
         
         # Process period data
         period_data = {}
@@ -285,11 +361,7 @@ class IncomeAnalysis(Resource):
             currency = item[2].value
             
             # Format the period label
-            if period == 'quarter':
-                quarter = (period_date.month - 1) // 3 + 1
-                label = f"{period_date.year}-Q{quarter}"
-            else:
-                label = period_date.strftime(label_format)
+            label = period_label(period_date, period)
             
             if label not in period_data:
                 period_data[label] = {'COP': 0, 'USD': 0}
@@ -347,16 +419,9 @@ class IncomeAnalysis(Resource):
         client_income_data = [{'client': k, **v} for k, v in client_data.items()]
         
         # Calculate total for current month
-        current_month_start = today.replace(day=1)
-        total_month_query = db.session.query(
-            func.sum(Income.amount).label('amount'),
-            Income.currency
-        ).filter(
-            Income.date >= current_month_start.date(),
-            Income.date <= today.date()
-        ).group_by(
-            Income.currency
-        ).all()
+        total_month_query = [
+            (item[1], item[2]) for item in period_totals(RollupSource.INCOME, 'month', date_from=today.date())
+        ]
         
         total_month = {'COP': 0, 'USD': 0}
         
@@ -374,18 +439,24 @@ class IncomeAnalysis(Resource):
         
         # Calculate average monthly income for the last 12 months
         one_year_ago = today - timedelta(days=365)
+        monthly_totals = db.session.query(
+            func.sum(PeriodRollup.amount).label('amount'),
+            PeriodRollup.currency
+        ).filter(
+            PeriodRollup.source == RollupSource.INCOME,
+            PeriodRollup.granularity == 'month',
+            PeriodRollup.period_start >= one_year_ago.date().replace(day=1),
+            PeriodRollup.row_count > 0
+        ).group_by(
+            PeriodRollup.period_start,
+            PeriodRollup.currency
+        ).subquery()
+        
         avg_month_query = db.session.query(
-            func.avg(db.session.query(
-                func.sum(Income.amount)
-            ).filter(
-                Income.date >= one_year_ago.date(),
-                Income.currency == currency
-            ).group_by(
-                func.date_trunc('month', Income.date)
-            )).label('avg_amount'),
-            Income.currency
+            func.avg(monthly_totals.c.amount).label('avg_amount'),
+            monthly_totals.c.currency
         ).group_by(
-            Income.currency
+            monthly_totals.c.currency
         ).all()
         
         avg_month = {'COP': 0, 'USD': 0}
@@ -403,15 +474,9 @@ class IncomeAnalysis(Resource):
             avg_month.pop(source_currency)
         
         # Calculate percent of income from clients
-        client_income_query = db.session.query(
-            func.sum(Income.amount).label('amount'),
-            Income.currency
-        ).filter(
-            Income.client.isnot(None),
-            Income.date >= one_year_ago.date()
-        ).group_by(
-            Income.currency
-        ).all()
+        client_income_query = _currency_totals(
+            period_totals(RollupSource.INCOME, 'month', date_from=one_year_ago.date(), client_only=True)
+        )
         
         client_income = {'COP': 0, 'USD': 0}
         
@@ -421,14 +486,9 @@ class IncomeAnalysis(Resource):
             client_income[currency] = amount
         
         # Calculate total income for the same period
-        total_income_query = db.session.query(
-            func.sum(Income.amount).label('amount'),
-            Income.currency
-        ).filter(
-            Income.date >= one_year_ago.date()
-        ).group_by(
-            Income.currency
-        ).all()
+        total_income_query = _currency_totals(
+            period_totals(RollupSource.INCOME, 'month', date_from=one_year_ago.date())
+        )
         
         total_income = {'COP': 0, 'USD': 0}
         
@@ -8,9 +8,17 @@ from models.project import Project, PaymentPlan, PaymentPlanType, FrequencyType
 from models.client import Client
 from schemas.payment import PaymentSchema, PaymentListSchema, PaymentStatusUpdateSchema
 from app import db
-from utils.pagination import paginate
+from utils.conditional import conditional_row, conditional_tables
+from utils.pagination import COUNT_MODES, paginate, paginate_cursor
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
+from utils.search import apply_search, search_condition
+from utils.serializers import dump
+from utils.aggregation import convert_totals, sum_by_currency
+from utils.export import EXPORT_FORMATS, export_query
+from utils.data_versions import bump_version
 from utils.currency import convert_currency
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select
 import logging
 
 # Setting up API namespace
@@ -57,19 +65,39 @@ payment_parser.add_argument('status', type=str, help='Filter by status')
 payment_parser.add_argument('date_from', type=str, help='Filter by date from (YYYY-MM-DD)')
 payment_parser.add_argument('date_to', type=str, help='Filter by date to (YYYY-MM-DD)')
 payment_parser.add_argument('currency', type=str, help='Currency for conversion')
+payment_parser.add_argument('q', type=str, help='Full-text search, results ranked by relevance unless sort is given')
 payment_parser.add_argument('sort', type=str, help='Sort field', default='date')
 payment_parser.add_argument('page', type=int, help='Page number')
 payment_parser.add_argument('per_page', type=int, help='Items per page')
+payment_parser.add_argument('cursor', type=str, help='Pagination cursor; pass it empty for the first page to use cursor pagination')
+payment_parser.add_argument('count', type=str, choices=COUNT_MODES, help='How total_items is computed (exact, window, cached, none)')
+payment_parser.add_argument('format', type=str, choices=('json',) + EXPORT_FORMATS, help='Response format (json, csv, ndjson)')
+payment_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+payment_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 @api.route('')
 class PaymentList(Resource):
     @jwt_required()
     @api.expect(payment_parser)
     @api.response(200, 'Success')
+    @conditional_tables(('payments', 'clients', 'exchange_rates'))
     def get(self):
         """Get all payments with optional filtering and pagination"""
         args = payment_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(payment_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Payment.query, Payment, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Payment.query
         
@@ -98,17 +126,35 @@ class PaymentList(Resource):
                 return {'error': 'Invalid date_to format. Use YYYY-MM-DD'}, 400
         
         # Apply sorting
+        sort_column, descending = Payment.date, False
         if args.get('sort'):
             sort_field = args['sort']
             if hasattr(Payment, sort_field):
-                query = query.order_by(getattr(Payment, sort_field))
+                sort_column, descending = getattr(Payment, sort_field), False
+                query = query.order_by(sort_column)
         else:
             # Default sort by date
             query = query.order_by(Payment.date)
         
+        # Full-text search, also matching the client name; ranked unless a sort is requested
+        if args.get('q'):
+            # Cursor pages are ordered by (sort, id), which would silently drop the ranking
+            if args.get('cursor') is not None and not request.args.get('sort'):
+                return {'error': 'Ranked search results cannot be paged with cursor; use page, or pass sort'}, 400
+            client_ids = select(Client.id).where(search_condition(Client, args['q'])[0])
+            query = apply_search(query, Payment, args['q'], rank=not request.args.get('sort'),
+                                 extra=Payment.client_id.in_(client_ids))
+        
+        # Only load the columns the list schema serializes
+        query = project_query(query, Payment, list_schema, sort_column)
+        
+        # Stream the full result set for exports instead of paginating
+        if args.get('format') in EXPORT_FORMATS:
+            return export_query(query, list_schema, args['format'], 'payments')
+        
         # Calculate totals before pagination
         # Get a copy of the query for aggregation
-        totals_query = query.with_entities(
+        totals_query = query.order_by(None).with_entities(
             Payment.status,
             func.sum(Payment.amount).label('total_amount'),
             Payment.currency
@@ -138,7 +184,15 @@ class PaymentList(Resource):
                                                                           target_currency)
         
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), payment_list_schema)
+        if args.get('cursor') is not None:
+            try:
+                result = paginate_cursor(query, sort_column, Payment.id, args['cursor'], args.get('per_page', 10),
+                                         list_schema, descending)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema,
+                              args.get('count'))
         
         # Add totals to result
         result['totals'] = totals
@@ -170,6 +224,7 @@ class PaymentList(Resource):
             
             # Add to database
             db.session.add(payment)
+            bump_version('payments')
             db.session.commit()
             
             return {'data': payment_schema.dump(payment)}, 201
@@ -182,12 +237,23 @@ class PaymentList(Resource):
 @api.route('/<int:id>')
 class PaymentDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Payment not found')
+    @conditional_row(Payment)
     def get(self, id):
         """Get a payment by ID"""
-        payment = Payment.query.get_or_404(id)
-        return {'data': payment_schema.dump(payment)}, 200
+        try:
+            schema = select_fields(payment_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Payment.query
+        if schema is not payment_schema:
+            # Only load the requested columns
+            query = project_query(query, Payment, schema)
+        payment = query.get_or_404(id)
+        return {'data': schema.dump(payment)}, 200
     
     @jwt_required()
     @api.expect(payment_model)
@@ -205,6 +271,7 @@ class PaymentDetail(Resource):
                 if hasattr(payment, key):
                     setattr(payment, key, value)
             
+            bump_version('payments')
             db.session.commit()
             
             return {'data': payment_schema.dump(payment)}, 200
@@ -237,6 +304,7 @@ class PaymentStatusUpdate(Resource):
             if 'invoice_number' in validated_data:
                 payment.invoice_number = validated_data['invoice_number']
             
+            bump_version('payments')
             db.session.commit()
             
             return {'data': payment_schema.dump(payment)}, 200
@@ -250,38 +318,33 @@ class PaymentStatusUpdate(Resource):
 class OverduePayments(Resource):
     @jwt_required()
     @api.expect(reqparse.RequestParser().add_argument('currency', type=str, help='Currency for conversion'))
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     def get(self):
         """Get overdue payments"""
         args = reqparse.RequestParser().add_argument('currency', type=str, help='Currency for conversion').parse_args()
         
+        try:
+            list_schema = select_fields(payment_list_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         today = date.today()
         
         # Get all overdue payments
-        overdue_payments = Payment.query.filter(
+        query = Payment.query.filter(
             and_(
                 Payment.date < today,
                 Payment.status != PaymentStatus.PAGADO
             )
-        ).order_by(Payment.date).all()
+        )
+        overdue_payments = project_query(query, Payment, list_schema, Payment.amount, Payment.currency).order_by(Payment.date).all()
         
-        # Calculate total
-        total_cop = sum(float(p.amount) for p in overdue_payments if p.currency == Currency.COP)
-        total_usd = sum(float(p.amount) for p in overdue_payments if p.currency == Currency.USD)
-        
-        # Convert totals if necessary
-        target_currency = args.get('currency')
-        total = None
-        
-        if target_currency == 'COP':
-            total = total_cop + convert_currency(total_usd, 'USD', 'COP')
-        elif target_currency == 'USD':
-            total = total_usd + convert_currency(total_cop, 'COP', 'USD')
-        else:
-            total = {'COP': total_cop, 'USD': total_usd}
+        # Every row is loaded anyway, so sum them here instead of a second query
+        total = convert_totals(sum_by_currency(overdue_payments), args.get('currency'))
         
         return {
-            'data': payment_list_schema.dump(overdue_payments),
+            'data': dump(list_schema, overdue_payments),
             'total': total
         }, 200
 
@@ -291,6 +354,7 @@ class UpcomingPayments(Resource):
     @api.expect(reqparse.RequestParser()
                 .add_argument('days', type=int, default=30, help='Number of days to look ahead')
                 .add_argument('currency', type=str, help='Currency for conversion'))
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     def get(self):
         """Get upcoming payments within specified days"""
@@ -299,36 +363,30 @@ class UpcomingPayments(Resource):
         parser.add_argument('currency', type=str, help='Currency for conversion')
         args = parser.parse_args()
         
+        try:
+            list_schema = select_fields(payment_list_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         days = args.get('days', 30)
         today = date.today()
         end_date = today + timedelta(days=days)
         
         # Get all upcoming payments
-        upcoming_payments = Payment.query.filter(
+        query = Payment.query.filter(
             and_(
                 Payment.date >= today,
                 Payment.date <= end_date,
                 Payment.status != PaymentStatus.PAGADO
             )
-        ).order_by(Payment.date).all()
+        )
+        upcoming_payments = project_query(query, Payment, list_schema, Payment.amount, Payment.currency).order_by(Payment.date).all()
         
-        # Calculate total
-        total_cop = sum(float(p.amount) for p in upcoming_payments if p.currency == Currency.COP)
-        total_usd = sum(float(p.amount) for p in upcoming_payments if p.currency == Currency.USD)
-        
-        # Convert totals if necessary
-        target_currency = args.get('currency')
-        total = None
-        
-        if target_currency == 'COP':
-            total = total_cop + convert_currency(total_usd, 'USD', 'COP')
-        elif target_currency == 'USD':
-            total = total_usd + convert_currency(total_cop, 'COP', 'USD')
-        else:
-            total = {'COP': total_cop, 'USD': total_usd}
+        # Every row is loaded anyway, so sum them here instead of a second query
+        total = convert_totals(sum_by_currency(upcoming_payments), args.get('currency'))
         
         return {
-            'data': payment_list_schema.dump(upcoming_payments),
+            'data': dump(list_schema, upcoming_payments),
             'total': total
         }, 200
 
@@ -435,6 +493,7 @@ class GeneratePayments(Resource):
                         db.session.add(payment)
                         generated_payments.append(payment)
             
+            bump_version('payments')
             db.session.commit()
             
             return {
@@ -8,7 +8,12 @@ from models.document import Document, EntityType, DocumentType
 from schemas.project import ProjectSchema, ProjectListSchema, PaymentPlanSchema
 from schemas.document import DocumentSchema, DocumentListSchema
 from app import db
-from utils.pagination import paginate
+from utils.conditional import conditional_row, conditional_tables
+from utils.pagination import COUNT_MODES, paginate, paginate_cursor
+from utils.batch import fetch_by_ids
+from utils.projection import project_query, select_fields
+from utils.search import apply_search
+from utils.data_versions import bump_version
 from utils.file_storage import save_file
 import os
 import logging
@@ -56,9 +61,14 @@ documents_schema = DocumentListSchema(many=True)
 project_parser = reqparse.RequestParser()
 project_parser.add_argument('client_id', type=int, help='Filter by client ID')
 project_parser.add_argument('status', type=str, help='Filter by status')
+project_parser.add_argument('q', type=str, help='Full-text search, results ranked by relevance unless sort is given')
 project_parser.add_argument('sort', type=str, help='Sort field')
 project_parser.add_argument('page', type=int, help='Page number')
 project_parser.add_argument('per_page', type=int, help='Items per page')
+project_parser.add_argument('cursor', type=str, help='Pagination cursor; pass it empty for the first page to use cursor pagination')
+project_parser.add_argument('count', type=str, choices=COUNT_MODES, help='How total_items is computed (exact, window, cached, none)')
+project_parser.add_argument('fields', type=str, help='Comma-separated fields to return, e.g. id,amount,date')
+project_parser.add_argument('ids', type=str, help='Comma-separated ids to fetch in one request, e.g. 1,2,3; other filters are ignored')
 
 # Setup file upload parser
 document_upload_parser = reqparse.RequestParser()
@@ -71,10 +81,24 @@ class ProjectList(Resource):
     @jwt_required()
     @api.expect(project_parser)
     @api.response(200, 'Success')
+    @conditional_tables(('projects',))
     def get(self):
         """Get all projects with optional filtering and pagination"""
         args = project_parser.parse_args()
         
+        # Serialize (and load) only the requested fields
+        try:
+            list_schema = select_fields(project_list_schema, args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Batch lookup: one IN query instead of a detail request per id
+        if args.get('ids'):
+            try:
+                return fetch_by_ids(Project.query, Project, args['ids'], list_schema), 200
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         # Base query
         query = Project.query
         
@@ -86,16 +110,36 @@ class ProjectList(Resource):
             query = query.filter(Project.status == args['status'])
         
         # Apply sorting
+        sort_column, descending = Project.start_date, True
         if args.get('sort'):
             sort_field = args['sort']
             if hasattr(Project, sort_field):
-                query = query.order_by(getattr(Project, sort_field))
+                sort_column, descending = getattr(Project, sort_field), False
+                query = query.order_by(sort_column)
         else:
             # Default sort by start_date desc
             query = query.order_by(Project.start_date.desc())
         
+        # Full-text search, ranked by relevance unless a sort is requested
+        if args.get('q'):
+            # Cursor pages are ordered by (sort, id), which would silently drop the ranking
+            if args.get('cursor') is not None and not request.args.get('sort'):
+                return {'error': 'Ranked search results cannot be paged with cursor; use page, or pass sort'}, 400
+            query = apply_search(query, Project, args['q'], rank=not request.args.get('sort'))
+        
+        # Only load the columns the list schema serializes
+        query = project_query(query, Project, list_schema, sort_column)
+        
         # Apply pagination
-        result = paginate(query, args.get('page', 1), args.get('per_page', 10), project_list_schema)
+        if args.get('cursor') is not None:
+            try:
+                result = paginate_cursor(query, sort_column, Project.id, args['cursor'], args.get('per_page', 10),
+                                         list_schema, descending)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            result = paginate(query, args.get('page', 1), args.get('per_page', 10), list_schema,
+                              args.get('count'))
         
         return result, 200
     
@@ -130,6 +174,7 @@ class ProjectList(Resource):
                 payment_plan = payment_plan_schema.load(payment_plan_data)
                 db.session.add(payment_plan)
             
+            bump_version('projects')
             db.session.commit()
             
             # Return project with payment plan
@@ -145,12 +190,23 @@ class ProjectList(Resource):
 @api.route('/<int:id>')
 class ProjectDetail(Resource):
     @jwt_required()
+    @api.doc(params={'fields': 'Comma-separated fields to return, e.g. id,amount,date'})
     @api.response(200, 'Success')
     @api.response(404, 'Project not found')
+    @conditional_row(Project, (PaymentPlan, 'project_id'))
     def get(self, id):
         """Get a project by ID"""
-        project = Project.query.get_or_404(id)
-        return {'data': project_schema.dump(project)}, 200
+        try:
+            schema = select_fields(project_schema, request.args.get('fields'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        query = Project.query
+        if schema is not project_schema:
+            # Only load the requested columns
+            query = project_query(query, Project, schema)
+        project = query.get_or_404(id)
+        return {'data': schema.dump(project)}, 200
     
     @jwt_required()
     @api.expect(project_model)
@@ -182,6 +238,7 @@ class ProjectDetail(Resource):
                 payment_plan = payment_plan_schema.load(payment_plan_data)
                 db.session.add(payment_plan)
             
+            bump_version('projects')
             db.session.commit()
             
             return {'data': project_schema.dump(project)}, 200
@@ -4,19 +4,36 @@ from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
 from models.payment import Payment, PaymentStatus, Currency as PaymentCurrency
-from models.client import Client
+from models.client import Client, ClientStatus
 from models.project import Project, ProjectStatus
 from models.income import Income, Currency as IncomeCurrency
 from models.expense import Expense, AccruedExpense, Currency as ExpenseCurrency, AccruedExpenseStatus
 from app import db
-from utils.currency import convert_currency
-from sqlalchemy import func, and_, extract, case
+from utils.currency import get_exchange_rate
+from utils.fx import normalized_amount, normalized_sums
+from utils.aggregation import (currency_code, grouped_sums, index_sums, monthly_sums, percentages, running_total,
+                               series_totals, series_values, subtract, to_currency)
+from utils.pagination import paginate_query
+from utils.export import exportable_report
+from utils.report_cache import cached_report, report_cache
+from utils.conditional import conditional_tables
+from utils.report_jobs import submit_job, JobQueueFull
+from utils.buckets import month_labels, bucket_by_month
+from utils.periods import GRANULARITIES, period_label, period_start, shift_period
+from utils.rollups import period_rows
+from models.rollup import RollupSource
+from models.report_job import ReportJob
+from schemas.report_job import ReportJobSchema
+from sqlalchemy import func, and_, or_, extract, case, cast, true, Integer
 import calendar
 import logging
 
 # Setting up API namespace
 api = Namespace('reports', description='Financial reports and analytics')
 
+# Payment status buckets of the client analytics report
+PAYMENT_BUCKETS = ('paid', 'pending', 'overdue')
+
 # Define parameter parsers
 cash_flow_parser = reqparse.RequestParser()
 cash_flow_parser.add_argument('period', type=str, default='month', help='Period for analysis (month, quarter, year)')
@@ -27,6 +44,8 @@ client_parser = reqparse.RequestParser()
 client_parser.add_argument('client_id', type=int, help='Filter by client ID')
 client_parser.add_argument('currency', type=str, default='COP', help='Currency for calculations (COP, USD)')
 client_parser.add_argument('year', type=int, help='Filter by year')
+client_parser.add_argument('page', type=int, help='Page number (paginates clients when set)')
+client_parser.add_argument('per_page', type=int, help='Clients per page')
 
 profitability_parser = reqparse.RequestParser()
 profitability_parser.add_argument('period', type=str, default='month', help='Period for analysis (month, quarter, year)')
@@ -37,835 +56,597 @@ projection_parser = reqparse.RequestParser()
 projection_parser.add_argument('months', type=int, default=12, help='Number of months to project')
 projection_parser.add_argument('currency', type=str, default='COP', help='Currency for calculations (COP, USD)')
 
+dashboard_parser = reqparse.RequestParser()
+dashboard_parser.add_argument('currency', type=str, default='COP', help='Currency for calculations (COP, USD)')
+
+@cached_report(('incomes', 'expenses', 'exchange_rates'), cash_flow_parser)
+def cash_flow_report(args):
+    """
+    Build the cash flow report
+
+    Args:
+        args (dict): Arguments parsed by ``cash_flow_parser``
+
+    Returns:
+        tuple: ``(result, status)``
+    """
+    period = args.get('period', 'month')
+    currency = args.get('currency', 'COP')
+    months = args.get('months', 12)
+    
+    today = datetime.today()
+    start_date = today - relativedelta(months=months)
+    
+    try:
+        # Validate period
+        if period not in GRANULARITIES:
+            return {'error': 'Invalid period. Use month, quarter, or year'}, 400
+        
+        # Totals per period and currency from the period rollups, with the
+        # FX-normalized sums that express them in the target currency
+        first = period_start(start_date.date(), period)
+        income_rows = period_rows(RollupSource.INCOME, period, first)
+        expense_rows = period_rows(RollupSource.EXPENSE, period, first)
+        
+        # Only periods with incomes or expenses are reported
+        indexes = sorted({int(row[0]) for row in income_rows + expense_rows})
+        size = indexes[-1] + 1 if indexes else 0
+        
+        # Convert (if a target currency is given) and net the period totals
+        # (vectorized when NumPy is installed)
+        target = currency if currency in ['COP', 'USD'] else None
+        income = index_sums(income_rows, size, target)
+        expenses = index_sums(expense_rows, size, target)
+        net = subtract(income, expenses)
+        
+        # Format for response
+        cash_flow_data = [{
+            'period': period_label(shift_period(first, index, period), period),
+            'income': series_values(income, index),
+            'expenses': series_values(expenses, index),
+            'net': series_values(net, index)
+        } for index in indexes]
+        
+        # Calculate summary
+        total_income = series_totals(income)
+        total_expenses = series_totals(expenses)
+        total_net = series_totals(net)
+        
+        return {
+            'data': cash_flow_data,
+            'summary': {
+                'total_income': total_income,
+                'total_expenses': total_expenses,
+                'total_net': total_net
+            }
+        }, 200
+        
+    except Exception as e:
+        logging.error(f"Error generating cash flow report: {str(e)}")
+        return {'error': str(e)}, 500
+
 @api.route('/cash-flow')
 class CashFlowReport(Resource):
     @jwt_required()
     @api.expect(cash_flow_parser)
+    @api.doc(params={'format': 'Export format (csv, ndjson)'})
     @api.response(200, 'Success')
+    @conditional_tables(('incomes', 'expenses', 'exchange_rates'))
+    @exportable_report('cash-flow')
     def get(self):
         """Generate cash flow report"""
-        args = cash_flow_parser.parse_args()
-        period = args.get('period', 'month')
-        currency = args.get('currency', 'COP')
-        months = args.get('months', 12)
+        return cash_flow_report(cash_flow_parser.parse_args())
+
+@cached_report(('clients', 'projects', 'payments', 'exchange_rates'), client_parser)
+def client_analytics_report(args):
+    """
+    Build the client analytics report
+
+    Args:
+        args (dict): Arguments parsed by ``client_parser``
+
+    Returns:
+        tuple: ``(result, status)``
+    """
+    client_id = args.get('client_id')
+    currency = args.get('currency', 'COP')
+    year = args.get('year') or datetime.today().year
+    
+    try:
+        # Only clients with at least one project are reported
+        clients_query = Client.query.filter(
+            Client.id.in_(db.session.query(Project.client_id))
+        )
         
-        today = datetime.today()
-        start_date = today - relativedelta(months=months)
+        if client_id:
+            Client.query.get_or_404(client_id)
+            clients_query = clients_query.filter(Client.id == client_id)
+        else:
+            clients_query = clients_query.filter(Client.status == ClientStatus.ACTIVO)
         
-        try:
-            # Define date truncation based on period
-            if period == 'month':
-                date_trunc = func.date_trunc('month', Income.date)
-                expense_date_trunc = func.date_trunc('month', Expense.date)
-                format_str = '%Y-%m'
-            elif period == 'quarter':
-                date_trunc = func.date_trunc('quarter', Income.date)
-                expense_date_trunc = func.date_trunc('quarter', Expense.date)
-                format_str = '%Y-Q%q'  # Will need post-processing
-            elif period == 'year':
-                date_trunc = func.date_trunc('year', Income.date)
-                expense_date_trunc = func.date_trunc('year', Expense.date)
-                format_str = '%Y'
-            else:
-                return {'error': 'Invalid period. Use month, quarter, or year'}, 400
-            
-            # Query income data
-            income_data = db.session.query(
-                date_trunc.label('period'),
-                func.sum(Income.amount).label('amount'),
-                Income.currency
-            ).filter(
-                Income.date >= start_date.date()
-            ).group_by(
-                'period',
-                Income.currency
-            ).all()
-            
-            # Query expense data
-            expense_data = db.session.query(
-                expense_date_trunc.label('period'),
-                func.sum(Expense.amount).label('amount'),
-                Expense.currency
+        clients_query = clients_query.order_by(Client.id)
+        
+        # Optional pagination over clients
+        pagination = None
+        if args.get('page') or args.get('per_page'):
+            clients, pagination = paginate_query(clients_query, args.get('page'), args.get('per_page'))
+        else:
+            clients = clients_query.all()
+        
+        client_ids = [client.id for client in clients]
+        
+        # Project counts for every client in one grouped query
+        project_counts = {
+            row[0]: (row[1], int(row[2] or 0))
+            for row in db.session.query(
+                Project.client_id,
+                func.count(Project.id),
+                func.sum(case((Project.status == ProjectStatus.ACTIVO, 1), else_=0))
             ).filter(
-                Expense.date >= start_date.date()
+                Project.client_id.in_(client_ids)
             ).group_by(
-                'period',
-                Expense.currency
+                Project.client_id
             ).all()
-            
-            # Process data
-            periods = {}
-            
-            # Process income data
-            for item in income_data:
-                period_date = item[0]
-                amount = float(item[1])
-                item_currency = item[2].value
-                
-                # Format period label
-                if period == 'quarter':
-                    quarter = (period_date.month - 1) // 3 + 1
-                    label = f"{period_date.year}-Q{quarter}"
-                else:
-                    label = period_date.strftime(format_str)
-                
-                if label not in periods:
-                    periods[label] = {
-                        'income': {'COP': 0, 'USD': 0},
-                        'expenses': {'COP': 0, 'USD': 0},
-                        'net': {'COP': 0, 'USD': 0}
-                    }
-                
-                # Add income
-                periods[label]['income'][item_currency] += amount
-                
-                # Update net
-                periods[label]['net'][item_currency] += amount
-            
-            # Process expense data
-            for item in expense_data:
-                period_date = item[0]
-                amount = float(item[1])
-                item_currency = item[2].value
-                
-                # Format period label
-                if period == 'quarter':
-                    quarter = (period_date.month - 1) // 3 + 1
-                    label = f"{period_date.year}-Q{quarter}"
-                else:
-                    label = period_date.strftime(format_str)
-                
-                if label not in periods:
-                    periods[label] = {
-                        'income': {'COP': 0, 'USD': 0},
-                        'expenses': {'COP': 0, 'USD': 0},
-                        'net': {'COP': 0, 'USD': 0}
-                    }
-                
-                # Add expenses
-                periods[label]['expenses'][item_currency] += amount
-                
-                # Update net (subtract expenses)
-                periods[label]['net'][item_currency] -= amount
-            
-            # Convert to target currency if specified
-            if currency in ['COP', 'USD']:
-                for label in periods:
-                    # Convert income
-                    source_currency = 'USD' if currency == 'COP' else 'COP'
-                    periods[label]['income'][currency] += convert_currency(
-                        periods[label]['income'][source_currency], source_currency, currency
-                    )
-                    periods[label]['income'] = {currency: periods[label]['income'][currency]}
-                    
-                    # Convert expenses
-                    periods[label]['expenses'][currency] += convert_currency(
-                        periods[label]['expenses'][source_currency], source_currency, currency
-                    )
-                    periods[label]['expenses'] = {currency: periods[label]['expenses'][currency]}
-                    
-                    # Convert net
-                    periods[label]['net'][currency] += convert_currency(
-                        periods[label]['net'][source_currency], source_currency, currency
-                    )
-                    periods[label]['net'] = {currency: periods[label]['net'][currency]}
-            
-            # Format for response
-            cash_flow_data = []
-            for label, data in sorted(periods.items()):
-                entry = {'period': label}
-                entry.update(data)
-                cash_flow_data.append(entry)
-            
-            # Calculate summary
-            total_income = {'COP': 0, 'USD': 0}
-            total_expenses = {'COP': 0, 'USD': 0}
-            total_net = {'COP': 0, 'USD': 0}
-            
-            for period_data in cash_flow_data:
-                for curr in ['COP', 'USD']:
-                    if curr in period_data['income']:
-                        total_income[curr] += period_data['income'][curr]
-                    if curr in period_data['expenses']:
-                        total_expenses[curr] += period_data['expenses'][curr]
-                    if curr in period_data['net']:
-                        total_net[curr] += period_data['net'][curr]
-            
-            # Convert summary to target currency if specified
-            if currency in ['COP', 'USD']:
-                source_currency = 'USD' if currency == 'COP' else 'COP'
-                total_income = {currency: total_income[currency] + convert_currency(total_income[source_currency], source_currency, currency)}
-                total_expenses = {currency: total_expenses[currency] + convert_currency(total_expenses[source_currency], source_currency, currency)}
-                total_net = {currency: total_net[currency] + convert_currency(total_net[source_currency], source_currency, currency)}
-            
-            return {
-                'data': cash_flow_data,
-                'summary': {
-                    'total_income': total_income,
-                    'total_expenses': total_expenses,
-                    'total_net': total_net
-                }
-            }, 200
-            
-        except Exception as e:
-            logging.error(f"Error generating cash flow report: {str(e)}")
-            return {'error': str(e)}, 500
+        } if client_ids else {}
+        
+        # Payment totals keyed by client, month, status bucket and currency in
+        # one grouped query, with the FX-normalized sums for the target currency
+        year_start = datetime(year, 1, 1).date()
+        year_end = datetime(year, 12, 31).date()
+        today = date.today()
+        
+        status_bucket = case(
+            (Payment.status == PaymentStatus.PAGADO, PAYMENT_BUCKETS.index('paid')),
+            (Payment.status == PaymentStatus.VENCIDO, PAYMENT_BUCKETS.index('overdue')),
+            (and_(Payment.status == PaymentStatus.PENDIENTE, Payment.date <= today), PAYMENT_BUCKETS.index('overdue')),
+            else_=PAYMENT_BUCKETS.index('pending')
+        )
+        payment_month = cast(extract('month', Payment.date), Integer)
+        
+        # Month and bucket are numbered together: (month - 1) * buckets + bucket
+        payment_rows = db.session.query(
+            Project.client_id,
+            (payment_month - 1) * len(PAYMENT_BUCKETS) + status_bucket,
+            currency_code(Payment.currency),
+            func.sum(Payment.amount),
+            *normalized_sums(Payment)
+        ).join(
+            Project, Payment.project_id == Project.id
+        ).filter(
+            Project.client_id.in_(client_ids),
+            Payment.date >= year_start,
+            Payment.date <= year_end
+        ).group_by(
+            Project.client_id,
+            payment_month,
+            status_bucket,
+            Payment.currency
+        ).all() if client_ids else []
+        
+        # Sum (and convert, if a target currency is given) every client's
+        # totals at once (vectorized when NumPy is installed)
+        target = currency if currency in ['COP', 'USD'] else None
+        totals = grouped_sums(payment_rows, client_ids, 12 * len(PAYMENT_BUCKETS), target)
+        
+        def bucket_total(series, bucket):
+            step = len(PAYMENT_BUCKETS)
+            return {curr: sum(values[PAYMENT_BUCKETS.index(bucket)::step]) for curr, values in series.items()}
+        
+        def month_total(series, month):
+            step = len(PAYMENT_BUCKETS)
+            return {curr: sum(values[(month - 1) * step:month * step]) for curr, values in series.items()}
+        
+        client_data = []
+        
+        for client in clients:
+            series = totals[client.id]
+            project_count, active_project_count = project_counts.get(client.id, (0, 0))
+            
+            client_data.append({
+                'client_id': client.id,
+                'client_name': client.name,
+                'total_billed': series_totals(series),
+                'total_paid': bucket_total(series, 'paid'),
+                'total_pending': bucket_total(series, 'pending'),
+                'total_overdue': bucket_total(series, 'overdue'),
+                'monthly_distribution': {
+                    f"{year}-{month:02d}": month_total(series, month)
+                    for month in range(1, 13)
+                },
+                'project_count': project_count,
+                'active_project_count': active_project_count
+            })
+        
+        result = {'data': client_data}
+        if pagination:
+            result['pagination'] = pagination
+        
+        return result, 200
+        
+    except Exception as e:
+        logging.error(f"Error generating client analytics report: {str(e)}")
+        return {'error': str(e)}, 500
 
 @api.route('/client-analytics')
 class ClientAnalyticsReport(Resource):
     @jwt_required()
     @api.expect(client_parser)
+    @api.doc(params={'format': 'Export format (csv, ndjson)'})
     @api.response(200, 'Success')
+    @conditional_tables(('clients', 'projects', 'payments', 'exchange_rates'))
+    @exportable_report('client-analytics')
     def get(self):
         """Generate client analytics report"""
-        args = client_parser.parse_args()
-        client_id = args.get('client_id')
-        currency = args.get('currency', 'COP')
-        year = args.get('year', datetime.today().year)
+        return client_analytics_report(client_parser.parse_args())
+
+@cached_report(('incomes', 'expenses', 'exchange_rates'), profitability_parser)
+def profitability_report(args):
+    """
+    Build the profitability report
+
+    Args:
+        args (dict): Arguments parsed by ``profitability_parser``
+
+    Returns:
+        tuple: ``(result, status)``
+    """
+    period = args.get('period', 'month')
+    currency = args.get('currency', 'COP')
+    year = args.get('year') or datetime.today().year
+    
+    try:
+        # Define date range
+        year_start = datetime(year, 1, 1).date()
+        year_end = datetime(year, 12, 31).date()
         
-        try:
-            # Get all active clients if no client_id specified
-            if client_id:
-                clients = [Client.query.get_or_404(client_id)]
-            else:
-                clients = Client.query.filter_by(status='Activo').all()
-                
-            client_data = []
-            
-            for client in clients:
-                # Get projects for client
-                projects = Project.query.filter_by(client_id=client.id).all()
-                project_ids = [p.id for p in projects]
-                
-                if not project_ids:
-                    continue
-                
-                # Get payments for all projects
-                year_start = datetime(year, 1, 1).date()
-                year_end = datetime(year, 12, 31).date()
-                
-                payments = Payment.query.filter(
-                    Payment.project_id.in_(project_ids),
-                    Payment.date >= year_start,
-                    Payment.date <= year_end
-                ).all()
-                
-                # Calculate totals
-                total_billed = {'COP': 0, 'USD': 0}
-                total_paid = {'COP': 0, 'USD': 0}
-                total_pending = {'COP': 0, 'USD': 0}
-                total_overdue = {'COP': 0, 'USD': 0}
-                
-                for payment in payments:
-                    payment_currency = payment.currency.value
-                    amount = float(payment.amount)
-                    
-                    # Add to total billed
-                    total_billed[payment_currency] += amount
-                    
-                    # Add to appropriate category based on status
-                    if payment.status == PaymentStatus.PAGADO:
-                        total_paid[payment_currency] += amount
-                    elif payment.status == PaymentStatus.PENDIENTE:
-                        if payment.date <= date.today():
-                            total_overdue[payment_currency] += amount
-                        else:
-                            total_pending[payment_currency] += amount
-                    elif payment.status == PaymentStatus.VENCIDO:
-                        total_overdue[payment_currency] += amount
-                
-                # Convert to target currency if specified
-                if currency in ['COP', 'USD']:
-                    source_currency = 'USD' if currency == 'COP' else 'COP'
-                    
-                    total_billed[currency] += convert_currency(total_billed[source_currency], source_currency, currency)
-                    total_billed = {currency: total_billed[currency]}
-                    
-                    total_paid[currency] += convert_currency(total_paid[source_currency], source_currency, currency)
-                    total_paid = {currency: total_paid[currency]}
-                    
-                    total_pending[currency] += convert_currency(total_pending[source_currency], source_currency, currency)
-                    total_pending = {currency: total_pending[currency]}
-                    
-                    total_overdue[currency] += convert_currency(total_overdue[source_currency], source_currency, currency)
-                    total_overdue = {currency: total_overdue[currency]}
-                
-                # Get monthly distribution
-                monthly_data = {}
-                for month in range(1, 13):
-                    month_start = datetime(year, month, 1).date()
-                    month_end = datetime(year, month, calendar.monthrange(year, month)[1]).date()
-                    
-                    month_payments = [p for p in payments if month_start <= p.date <= month_end]
-                    
-                    month_total = {'COP': 0, 'USD': 0}
-                    for payment in month_payments:
-                        month_total[payment.currency.value] += float(payment.amount)
-                    
-                    # Convert to target currency if specified
-                    if currency in ['COP', 'USD']:
-                        source_currency = 'USD' if currency == 'COP' else 'COP'
-                        month_total[currency] += convert_currency(month_total[source_currency], source_currency, currency)
-                        month_total = {currency: month_total[currency]}
-                    
-                    monthly_data[f"{year}-{month:02d}"] = month_total
-                
-                client_data.append({
-                    'client_id': client.id,
-                    'client_name': client.name,
-                    'total_billed': total_billed,
-                    'total_paid': total_paid,
-                    'total_pending': total_pending,
-                    'total_overdue': total_overdue,
-                    'monthly_distribution': monthly_data,
-                    'project_count': len(projects),
-                    'active_project_count': len([p for p in projects if p.status == ProjectStatus.ACTIVO])
-                })
-            
-            return {'data': client_data}, 200
-            
-        except Exception as e:
-            logging.error(f"Error generating client analytics report: {str(e)}")
-            return {'error': str(e)}, 500
+        # Validate period
+        if period not in GRANULARITIES:
+            return {'error': 'Invalid period. Use month, quarter, or year'}, 400
+        
+        # Totals per period and currency from the period rollups, with the
+        # FX-normalized sums that express them in the target currency
+        income_rows = period_rows(RollupSource.INCOME, period, year_start, year_end)
+        client_income_rows = period_rows(RollupSource.INCOME, period, year_start, year_end, client_only=True)
+        expense_rows = period_rows(RollupSource.EXPENSE, period, year_start, year_end)
+        
+        # Only periods with incomes or expenses are reported
+        indexes = sorted({int(row[0]) for row in income_rows + expense_rows})
+        size = indexes[-1] + 1 if indexes else 0
+        
+        # Convert (if a target currency is given) and net the period totals
+        # (vectorized when NumPy is installed)
+        target = currency if currency in ['COP', 'USD'] else None
+        total_income = index_sums(income_rows, size, target)
+        client_income = index_sums(client_income_rows, size, target)
+        expenses = index_sums(expense_rows, size, target)
+        profit = subtract(total_income, expenses)
+        
+        # Margins compare amounts in one currency: the target currency, or
+        # the amounts normalized to COP when each currency is reported on its own
+        margin_currency = target or 'COP'
+        if target:
+            margin_income, margin_client_income, margin_profit = total_income, client_income, profit
+        else:
+            margin_income = index_sums(income_rows, size, margin_currency)
+            margin_client_income = index_sums(client_income_rows, size, margin_currency)
+            margin_profit = subtract(margin_income, index_sums(expense_rows, size, margin_currency))
+        margins = percentages(margin_profit[margin_currency], margin_income[margin_currency])
+        
+        # Format for response
+        profitability_data = [{
+            'period': period_label(shift_period(year_start, index, period), period),
+            'total_income': series_values(total_income, index),
+            'client_income': series_values(client_income, index),
+            'expenses': series_values(expenses, index),
+            'profit': series_values(profit, index),
+            'margin': margins[index]
+        } for index in indexes]
+        
+        # Calculate yearly summary
+        yearly_total_income = series_totals(total_income)
+        yearly_client_income = series_totals(client_income)
+        yearly_expenses = series_totals(expenses)
+        yearly_profit = series_totals(profit)
+        
+        # Calculate yearly margin and client income percentage
+        margin_totals = {name: series_totals(series)[margin_currency] for name, series in (
+            ('income', margin_income), ('client_income', margin_client_income), ('profit', margin_profit)
+        )}
+        yearly_margin, client_income_pct = percentages(
+            [margin_totals['profit'], margin_totals['client_income']],
+            [margin_totals['income'], margin_totals['income']]
+        )
+        
+        return {
+            'data': profitability_data,
+            'summary': {
+                'total_income': yearly_total_income,
+                'client_income': yearly_client_income,
+                'expenses': yearly_expenses,
+                'profit': yearly_profit,
+                'margin': yearly_margin,
+                'client_income_percentage': client_income_pct
+            }
+        }, 200
+        
+    except Exception as e:
+        logging.error(f"Error generating profitability report: {str(e)}")
+        return {'error': str(e)}, 500
 
 @api.route('/profitability')
 class ProfitabilityReport(Resource):
     @jwt_required()
     @api.expect(profitability_parser)
+    @api.doc(params={'format': 'Export format (csv, ndjson)'})
     @api.response(200, 'Success')
+    @conditional_tables(('incomes', 'expenses', 'exchange_rates'))
+    @exportable_report('profitability')
     def get(self):
         """Generate profitability report"""
-        args = profitability_parser.parse_args()
-        period = args.get('period', 'month')
-        currency = args.get('currency', 'COP')
-        year = args.get('year', datetime.today().year)
-        
-        try:
-            # Define date range
-            year_start = datetime(year, 1, 1).date()
-            year_end = datetime(year, 12, 31).date()
-            
-            # Define date truncation based on period
-            if period == 'month':
-                income_date_trunc = func.date_trunc('month', Income.date)
-                expense_date_trunc = func.date_trunc('month', Expense.date)
-                format_str = '%Y-%m'
-            elif period == 'quarter':
-                income_date_trunc = func.date_trunc('quarter', Income.date)
-                expense_date_trunc = func.date_trunc('quarter', Expense.date)
-                format_str = '%Y-Q%q'  # Will need post-processing
-            elif period == 'year':
-                income_date_trunc = func.date_trunc('year', Income.date)
-                expense_date_trunc = func.date_trunc('year', Expense.date)
-                format_str = '%Y'
-            else:
-                return {'error': 'Invalid period. Use month, quarter, or year'}, 400
-            
-            # Query income data
-            income_data = db.session.query(
-                income_date_trunc.label('period'),
-                func.sum(Income.amount).label('amount'),
-                Income.currency
-            ).filter(
-                Income.date >= year_start,
-                Income.date <= year_end
-            ).group_by(
-                'period',
-                Income.currency
-            ).all()
-            
-            # Query expense data
-            expense_data = db.session.query(
-                expense_date_trunc.label('period'),
-                func.sum(Expense.amount).label('amount'),
-                Expense.currency
-            ).filter(
-                Expense.date >= year_start,
-                Expense.date <= year_end
-            ).group_by(
-                'period',
-                Expense.currency
-            ).all()
-            
-            # Query client income data
-            client_income_data = db.session.query(
-                income_date_trunc.label('period'),
-                func.sum(Income.amount).label('amount'),
-                Income.currency
-            ).filter(
-                Income.date >= year_start,
-                Income.date <= year_end,
-                Income.client.isnot(None)
-            ).group_by(
-                'period',
-                Income.currency
-            ).all()
-            
-            # Process data
-            periods = {}
-            
-            # Process income data
-            for item in income_data:
-                period_date = item[0]
-                amount = float(item[1])
-                item_currency = item[2].value
-                
-                # Format period label
-                if period == 'quarter':
-                    quarter = (period_date.month - 1) // 3 + 1
-                    label = f"{period_date.year}-Q{quarter}"
-                else:
-                    label = period_date.strftime(format_str)
-                
-                if label not in periods:
-                    periods[label] = {
-                        'total_income': {'COP': 0, 'USD': 0},
-                        'client_income': {'COP': 0, 'USD': 0},
-                        'expenses': {'COP': 0, 'USD': 0},
-                        'profit': {'COP': 0, 'USD': 0},
-                        'margin': 0
-                    }
-                
-                # Add income
-                periods[label]['total_income'][item_currency] += amount
-            
-            # Process client income data
-            for item in client_income_data:
-                period_date = item[0]
-                amount = float(item[1])
-                item_currency = item[2].value
-                
-                # Format period label
-                if period == 'quarter':
-                    quarter = (period_date.month - 1) // 3 + 1
-                    label = f"{period_date.year}-Q{quarter}"
-                else:
-                    label = period_date.strftime(format_str)
-                
-                if label not in periods:
-                    periods[label] = {
-                        'total_income': {'COP': 0, 'USD': 0},
-                        'client_income': {'COP': 0, 'USD': 0},
-                        'expenses': {'COP': 0, 'USD': 0},
-                        'profit': {'COP': 0, 'USD': 0},
-                        'margin': 0
-                    }
-                
-                # Add client income
-                periods[label]['client_income'][item_currency] += amount
-            
-            # Process expense data
-            for item in expense_data:
-                period_date = item[0]
-                amount = float(item[1])
-                item_currency = item[2].value
-                
-                # Format period label
-                if period == 'quarter':
-                    quarter = (period_date.month - 1) // 3 + 1
-                    label = f"{period_date.year}-Q{quarter}"
-                else:
-                    label = period_date.strftime(format_str)
-                
-                if label not in periods:
-                    periods[label] = {
-                        'total_income': {'COP': 0, 'USD': 0},
-                        'client_income': {'COP': 0, 'USD': 0},
-                        'expenses': {'COP': 0, 'USD': 0},
-                        'profit': {'COP': 0, 'USD': 0},
-                        'margin': 0
-                    }
-                
-                # Add expenses
-                periods[label]['expenses'][item_currency] += amount
-            
-            # Calculate profit and margin
-            for label in periods:
-                for curr in ['COP', 'USD']:
-                    # Calculate profit
-                    periods[label]['profit'][curr] = periods[label]['total_income'][curr] - periods[label]['expenses'][curr]
-                
-                # Convert to target currency if specified
-                if currency in ['COP', 'USD']:
-                    source_currency = 'USD' if currency == 'COP' else 'COP'
-                    
-                    # Convert total income
-                    periods[label]['total_income'][currency] += convert_currency(
-                        periods[label]['total_income'][source_currency], source_currency, currency
-                    )
-                    periods[label]['total_income'] = {currency: periods[label]['total_income'][currency]}
-                    
-                    # Convert client income
-                    periods[label]['client_income'][currency] += convert_currency(
-                        periods[label]['client_income'][source_currency], source_currency, currency
-                    )
-                    periods[label]['client_income'] = {currency: periods[label]['client_income'][currency]}
-                    
-                    # Convert expenses
-                    periods[label]['expenses'][currency] += convert_currency(
-                        periods[label]['expenses'][source_currency], source_currency, currency
-                    )
-                    periods[label]['expenses'] = {currency: periods[label]['expenses'][currency]}
-                    
-                    # Convert profit
-                    periods[label]['profit'][currency] += convert_currency(
-                        periods[label]['profit'][source_currency], source_currency, currency
-                    )
-                    periods[label]['profit'] = {currency: periods[label]['profit'][currency]}
-                    
-                    # Calculate margin
-                    total_income = periods[label]['total_income'][currency]
-                    periods[label]['margin'] = ((total_income - periods[label]['expenses'][currency]) / total_income * 100) if total_income > 0 else 0
-                else:
-                    # Calculate margin using COP
-                    total_income_cop = periods[label]['total_income']['COP']
-                    if total_income_cop > 0:
-                        periods[label]['margin'] = ((total_income_cop - periods[label]['expenses']['COP']) / total_income_cop * 100)
-                    else:
-                        total_income_usd = periods[label]['total_income']['USD']
-                        if total_income_usd > 0:
-                            # Convert to COP for calculation
-                            total_income_cop = convert_currency(total_income_usd, 'USD', 'COP')
-                            expenses_cop = periods[label]['expenses']['COP'] + convert_currency(periods[label]['expenses']['USD'], 'USD', 'COP')
-                            periods[label]['margin'] = ((total_income_cop - expenses_cop) / total_income_cop * 100)
-                        else:
-                            periods[label]['margin'] = 0
-            
-            # Format for response
-            profitability_data = []
-            for label, data in sorted(periods.items()):
-                entry = {'period': label}
-                entry.update(data)
-                profitability_data.append(entry)
-            
-            # Calculate yearly summary
-            yearly_total_income = {'COP': 0, 'USD': 0}
-            yearly_client_income = {'COP': 0, 'USD': 0}
-            yearly_expenses = {'COP': 0, 'USD': 0}
-            yearly_profit = {'COP': 0, 'USD': 0}
-            
-            for period_data in profitability_data:
-                if currency in ['COP', 'USD']:
-                    yearly_total_income[currency] += period_data['total_income'][currency]
-                    yearly_client_income[currency] += period_data['client_income'][currency]
-                    yearly_expenses[currency] += period_data['expenses'][currency]
-                    yearly_profit[currency] += period_data['profit'][currency]
-                else:
-                    for curr in ['COP', 'USD']:
-                        yearly_total_income[curr] += period_data['total_income'][curr]
-                        yearly_client_income[curr] += period_data['client_income'][curr]
-                        yearly_expenses[curr] += period_data['expenses'][curr]
-                        yearly_profit[curr] += period_data['profit'][curr]
-            
-            # Calculate yearly margin
-            yearly_margin = 0
-            if currency in ['COP', 'USD']:
-                if yearly_total_income[currency] > 0:
-                    yearly_margin = (yearly_profit[currency] / yearly_total_income[currency]) * 100
-            else:
-                # Use COP for calculation
-                if yearly_total_income['COP'] > 0:
-                    yearly_margin = (yearly_profit['COP'] / yearly_total_income['COP']) * 100
-                else:
-                    # Convert USD to COP for calculation
-                    total_income_cop = convert_currency(yearly_total_income['USD'], 'USD', 'COP')
-                    if total_income_cop > 0:
-                        profit_cop = convert_currency(yearly_profit['USD'], 'USD', 'COP')
-                        yearly_margin = (profit_cop / total_income_cop) * 100
-            
-            # Calculate client income percentage
-            client_income_pct = 0
-            if currency in ['COP', 'USD']:
-                if yearly_total_income[currency] > 0:
-                    client_income_pct = (yearly_client_income[currency] / yearly_total_income[currency]) * 100
-            else:
-                # Use COP for calculation
-                if yearly_total_income['COP'] > 0:
-                    client_income_pct = (yearly_client_income['COP'] / yearly_total_income['COP']) * 100
-                else:
-                    # Convert USD to COP for calculation
-                    total_income_cop = convert_currency(yearly_total_income['USD'], 'USD', 'COP')
-                    if total_income_cop > 0:
-                        client_income_cop = convert_currency(yearly_client_income['USD'], 'USD', 'COP')
-                        client_income_pct = (client_income_cop / total_income_cop) * 100
-            
-            return {
-                'data': profitability_data,
-                'summary': {
-                    'total_income': yearly_total_income,
-                    'client_income': yearly_client_income,
-                    'expenses': yearly_expenses,
-                    'profit': yearly_profit,
-                    'margin': yearly_margin,
-                    'client_income_percentage': client_income_pct
-                }
-            }, 200
-            
-        except Exception as e:
-            logging.error(f"Error generating profitability report: {str(e)}")
-            return {'error': str(e)}, 500
+        return profitability_report(profitability_parser.parse_args())
 
-@api.route('/financial-projection')
-class FinancialProjectionReport(Resource):
-    @jwt_required()
-    @api.expect(projection_parser)
-    @api.response(200, 'Success')
-    def get(self):
-        """Generate financial projection report"""
-        args = projection_parser.parse_args()
-        months = args.get('months', 12)
-        currency = args.get('currency', 'COP')
+@cached_report(('payments', 'accrued_expenses', 'exchange_rates'), projection_parser)
+def financial_projection_report(args):
+    """
+    Build the financial projection report
+
+    Args:
+        args (dict): Arguments parsed by ``projection_parser``
+
+    Returns:
+        tuple: ``(result, status)``
+    """
+    months = args.get('months', 12)
+    currency = args.get('currency', 'COP')
+    
+    try:
+        today = date.today()
+        end_date = today + relativedelta(months=months)
         
-        try:
-            today = date.today()
-            end_date = today + relativedelta(months=months)
-            
-            # Get upcoming payments
-            payments = Payment.query.filter(
-                Payment.date >= today,
-                Payment.date <= end_date,
-                Payment.status == PaymentStatus.PENDIENTE
-            ).order_by(Payment.date).all()
-            
-            # Get upcoming accrued expenses
-            expenses = AccruedExpense.query.filter(
-                AccruedExpense.due_date >= today,
-                AccruedExpense.due_date <= end_date,
-                AccruedExpense.status == AccruedExpenseStatus.PENDIENTE
-            ).order_by(AccruedExpense.due_date).all()
-            
-            # Process by month
-            projection = {}
-            
-            for i in range(months):
-                month_date = today + relativedelta(months=i)
-                month_start = date(month_date.year, month_date.month, 1)
-                month_end = date(month_date.year, month_date.month, 
-                               calendar.monthrange(month_date.year, month_date.month)[1])
-                
-                month_label = month_start.strftime('%Y-%m')
-                
-                # Initialize month data
-                projection[month_label] = {
-                    'income': {'COP': 0, 'USD': 0},
-                    'expenses': {'COP': 0, 'USD': 0},
-                    'net': {'COP': 0, 'USD': 0},
-                    'details': {
-                        'payments': [],
-                        'expenses': []
-                    }
-                }
-                
-                # Add payments for the month
-                month_payments = [p for p in payments if month_start <= p.date <= month_end]
-                for payment in month_payments:
-                    payment_currency = payment.currency.value
-                    amount = float(payment.amount)
-                    
-                    projection[month_label]['income'][payment_currency] += amount
-                    projection[month_label]['net'][payment_currency] += amount
-                    
-                    # Add to details
-                    projection[month_label]['details']['payments'].append({
+        # Get upcoming payments (only the columns the projection needs)
+        payments_query = db.session.query(
+            Payment.id,
+            Payment.client_id,
+            Payment.project_id,
+            Payment.date,
+            Payment.amount,
+            Payment.currency,
+            Payment.type,
+            Payment.invoice_number
+        ).filter(
+            Payment.date >= today,
+            Payment.date <= end_date,
+            Payment.status == PaymentStatus.PENDIENTE
+        )
+        payments = payments_query.order_by(Payment.date).all()
+        
+        # Get upcoming accrued expenses (only the columns the projection needs)
+        expenses_query = db.session.query(
+            AccruedExpense.id,
+            AccruedExpense.description,
+            AccruedExpense.due_date,
+            AccruedExpense.amount,
+            AccruedExpense.currency,
+            AccruedExpense.category,
+            AccruedExpense.is_recurring
+        ).filter(
+            AccruedExpense.due_date >= today,
+            AccruedExpense.due_date <= end_date,
+            AccruedExpense.status == AccruedExpenseStatus.PENDIENTE
+        )
+        expenses = expenses_query.order_by(AccruedExpense.due_date).all()
+        
+        labels = month_labels(today, months)
+        
+        # Month totals per currency (vectorized when NumPy is installed)
+        income = monthly_sums(payments_query, Payment.date, Payment.amount, Payment.currency, today, months)
+        outflow = monthly_sums(expenses_query, AccruedExpense.due_date, AccruedExpense.amount,
+                               AccruedExpense.currency, today, months)
+        net = subtract(income, outflow)
+        
+        # Convert to target currency if specified
+        if currency in ['COP', 'USD']:
+            source_currency = 'USD' if currency == 'COP' else 'COP'
+            rate = get_exchange_rate(source_currency, currency)
+            income = to_currency(income, currency, rate)
+            outflow = to_currency(outflow, currency, rate)
+            net = to_currency(net, currency, rate)
+        
+        balance = running_total(net)
+        
+        # Bucket rows by month in a single pass for the details
+        payments_by_month = bucket_by_month(payments, 'date', labels)
+        expenses_by_month = bucket_by_month(expenses, 'due_date', labels)
+        
+        # Format for response
+        projection_data = []
+        
+        for index, month_label in enumerate(labels):
+            projection_data.append({
+                'month': month_label,
+                'income': series_values(income, index),
+                'expenses': series_values(outflow, index),
+                'net': series_values(net, index),
+                'details': {
+                    'payments': [{
                         'id': payment.id,
                         'client_id': payment.client_id,
                         'project_id': payment.project_id,
                         'date': payment.date.isoformat(),
-                        'amount': amount,
-                        'currency': payment_currency,
+                        'amount': float(payment.amount),
+                        'currency': payment.currency.value,
                         'type': payment.type.value,
                         'invoice_number': payment.invoice_number
-                    })
-                
-                # Add expenses for the month
-                month_expenses = [e for e in expenses if month_start <= e.due_date <= month_end]
-                for expense in month_expenses:
-                    expense_currency = expense.currency.value
-                    amount = float(expense.amount)
-                    
-                    projection[month_label]['expenses'][expense_currency] += amount
-                    projection[month_label]['net'][expense_currency] -= amount
-                    
-                    # Add to details
-                    projection[month_label]['details']['expenses'].append({
+                    } for payment in payments_by_month[month_label]],
+                    'expenses': [{
                         'id': expense.id,
                         'description': expense.description,
                         'due_date': expense.due_date.isoformat(),
-                        'amount': amount,
-                        'currency': expense_currency,
+                        'amount': float(expense.amount),
+                        'currency': expense.currency.value,
                         'category': expense.category,
                         'is_recurring': expense.is_recurring
-                    })
-                
-                # Convert to target currency if specified
-                if currency in ['COP', 'USD']:
-                    source_currency = 'USD' if currency == 'COP' else 'COP'
-                    
-                    # Convert income
-                    projection[month_label]['income'][currency] += convert_currency(
-                        projection[month_label]['income'][source_currency], source_currency, currency
-                    )
-                    projection[month_label]['income'] = {currency: projection[month_label]['income'][currency]}
-                    
-                    # Convert expenses
-                    projection[month_label]['expenses'][currency] += convert_currency(
-                        projection[month_label]['expenses'][source_currency], source_currency, currency
-                    )
-                    projection[month_label]['expenses'] = {currency: projection[month_label]['expenses'][currency]}
-                    
-                    # Convert net
-                    projection[month_label]['net'][currency] += convert_currency(
-                        projection[month_label]['net'][source_currency], source_currency, currency
-                    )
-                    projection[month_label]['net'] = {currency: projection[month_label]['net'][currency]}
-            
-            # Format for response
-            projection_data = []
-            running_balance = {'COP': 0, 'USD': 0}
-            
-            for month_label in sorted(projection.keys()):
-                month_data = projection[month_label]
-                
-                # Update running balance
-                if currency in ['COP', 'USD']:
-                    running_balance[currency] += month_data['net'][currency]
-                    month_data['running_balance'] = {currency: running_balance[currency]}
-                else:
-                    for curr in ['COP', 'USD']:
-                        running_balance[curr] += month_data['net'][curr]
-                    month_data['running_balance'] = running_balance.copy()
-                
-                projection_data.append({
-                    'month': month_label,
-                    **month_data
-                })
-            
-            # Calculate summary
-            total_projected_income = {'COP': 0, 'USD': 0}
-            total_projected_expenses = {'COP': 0, 'USD': 0}
-            total_projected_net = {'COP': 0, 'USD': 0}
-            
-            for month_data in projection_data:
-                if currency in ['COP', 'USD']:
-                    total_projected_income[currency] += month_data['income'][currency]
-                    total_projected_expenses[currency] += month_data['expenses'][currency]
-                    total_projected_net[currency] += month_data['net'][currency]
-                else:
-                    for curr in ['COP', 'USD']:
-                        total_projected_income[curr] += month_data['income'][curr]
-                        total_projected_expenses[curr] += month_data['expenses'][curr]
-                        total_projected_net[curr] += month_data['net'][curr]
-            
-            return {
-                'data': projection_data,
-                'summary': {
-                    'total_projected_income': total_projected_income,
-                    'total_projected_expenses': total_projected_expenses,
-                    'total_projected_net': total_projected_net,
-                    'final_balance': running_balance
-                }
-            }, 200
-            
-        except Exception as e:
-            logging.error(f"Error generating financial projection: {str(e)}")
-            return {'error': str(e)}, 500
+                    } for expense in expenses_by_month[month_label]]
+                },
+                'running_balance': series_values(balance, index)
+            })
+        
+        # Calculate summary
+        total_projected_income = {'COP': 0, 'USD': 0}
+        total_projected_expenses = {'COP': 0, 'USD': 0}
+        total_projected_net = {'COP': 0, 'USD': 0}
+        running_balance = {'COP': 0, 'USD': 0}
+        
+        for curr in income:
+            total_projected_income[curr] = sum(income[curr])
+            total_projected_expenses[curr] = sum(outflow[curr])
+            total_projected_net[curr] = sum(net[curr])
+            if labels:
+                running_balance[curr] = balance[curr][-1]
+        
+        return {
+            'data': projection_data,
+            'summary': {
+                'total_projected_income': total_projected_income,
+                'total_projected_expenses': total_projected_expenses,
+                'total_projected_net': total_projected_net,
+                'final_balance': running_balance
+            }
+        }, 200
+        
+    except Exception as e:
+        logging.error(f"Error generating financial projection: {str(e)}")
+        return {'error': str(e)}, 500
+
+@api.route('/financial-projection')
+class FinancialProjectionReport(Resource):
+    @jwt_required()
+    @api.expect(projection_parser)
+    @api.doc(params={'format': 'Export format (csv, ndjson)'})
+    @api.response(200, 'Success')
+    @conditional_tables(('payments', 'accrued_expenses', 'exchange_rates'))
+    @exportable_report('financial-projection')
+    def get(self):
+        """Generate financial projection report"""
+        return financial_projection_report(projection_parser.parse_args())
+
+# Tables whose changes invalidate the cached dashboard
+DASHBOARD_TABLES = ('payments', 'incomes', 'expenses', 'clients', 'projects', 'exchange_rates')
+
+def _dashboard_figures(today, currency=None):
+    """
+    Compute every dashboard figure with a single aggregate statement. When a
+    target currency is given, ``*_total`` figures hold the amounts summed
+    from the FX-normalized columns in that currency.
+    """
+    month_start = date(today.year, today.month, 1)
+    upcoming_date = today + timedelta(days=30)
+    
+    overdue = and_(Payment.date < today, Payment.status != PaymentStatus.PAGADO)
+    upcoming = and_(Payment.date >= today, Payment.date <= upcoming_date, Payment.status == PaymentStatus.PENDIENTE)
+    
+    def sum_if(condition, amount):
+        return func.coalesce(func.sum(case((condition, amount), else_=0)), 0)
+    
+    def normalized_totals(*totals):
+        # Sum directly in the target currency when one is requested
+        if currency not in ['COP', 'USD']:
+            return []
+        return [sum_if(condition, normalized_amount(model, currency)).label(name)
+                for name, condition, model in totals]
+    
+    payment_totals = db.session.query(
+        sum_if(overdue, 1).label('overdue_count'),
+        sum_if(and_(overdue, Payment.currency == PaymentCurrency.COP), Payment.amount).label('overdue_cop'),
+        sum_if(and_(overdue, Payment.currency == PaymentCurrency.USD), Payment.amount).label('overdue_usd'),
+        sum_if(upcoming, 1).label('upcoming_count'),
+        sum_if(and_(upcoming, Payment.currency == PaymentCurrency.COP), Payment.amount).label('upcoming_cop'),
+        sum_if(and_(upcoming, Payment.currency == PaymentCurrency.USD), Payment.amount).label('upcoming_usd'),
+        *normalized_totals(
+            ('overdue_total', overdue, Payment),
+            ('upcoming_total', upcoming, Payment)
+        )
+    ).filter(
+        or_(overdue, upcoming)
+    ).cte('payment_totals')
+    
+    income_totals = db.session.query(
+        sum_if(Income.currency == IncomeCurrency.COP, Income.amount).label('income_cop'),
+        sum_if(Income.currency == IncomeCurrency.USD, Income.amount).label('income_usd'),
+        *normalized_totals(('income_total', true(), Income))
+    ).filter(
+        Income.date >= month_start,
+        Income.date <= today
+    ).cte('income_totals')
+    
+    expense_totals = db.session.query(
+        sum_if(Expense.currency == ExpenseCurrency.COP, Expense.amount).label('expenses_cop'),
+        sum_if(Expense.currency == ExpenseCurrency.USD, Expense.amount).label('expenses_usd'),
+        *normalized_totals(('expenses_total', true(), Expense))
+    ).filter(
+        Expense.date >= month_start,
+        Expense.date <= today
+    ).cte('expense_totals')
+    
+    active_clients = db.session.query(func.count(Client.id)).filter(
+        Client.status == ClientStatus.ACTIVO
+    ).scalar_subquery()
+    
+    active_projects = db.session.query(func.count(Project.id)).filter(
+        Project.status == ProjectStatus.ACTIVO
+    ).scalar_subquery()
+    
+    row = db.session.query(
+        active_clients.label('active_clients'),
+        active_projects.label('active_projects'),
+        payment_totals,
+        income_totals,
+        expense_totals
+    ).select_from(
+        payment_totals
+    ).join(
+        income_totals, true()
+    ).join(
+        expense_totals, true()
+    ).one()
+    
+    figures = dict(row._mapping)
+    for key, value in figures.items():
+        figures[key] = int(value) if key.endswith('_count') or key.startswith('active_') else float(value)
+    
+    return figures
 
 @api.route('/dashboard')
 class DashboardReport(Resource):
     @jwt_required()
-    @api.expect(reqparse.RequestParser().add_argument('currency', type=str, default='COP'))
+    @api.expect(dashboard_parser)
+    @api.doc(params={'format': 'Export format (csv, ndjson)'})
     @api.response(200, 'Success')
+    @conditional_tables(DASHBOARD_TABLES)
+    @exportable_report('dashboard')
+    @cached_report(DASHBOARD_TABLES, dashboard_parser)
     def get(self):
         """Generate dashboard summary data"""
-        args = reqparse.RequestParser().add_argument('currency', type=str, default='COP').parse_args()
+        args = dashboard_parser.parse_args()
         currency = args.get('currency', 'COP')
         
         try:
             today = date.today()
-            month_start = date(today.year, today.month, 1)
-            month_end = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
-            
-            # Get active clients count
-            active_clients = Client.query.filter_by(status='Activo').count()
+            figures = _dashboard_figures(today, currency)
             
-            # Get active projects count
-            active_projects = Project.query.filter_by(status='Activo').count()
+            overdue_count = figures['overdue_count']
+            overdue_amount = {'COP': figures['overdue_cop'], 'USD': figures['overdue_usd']}
+            upcoming_count = figures['upcoming_count']
+            upcoming_amount = {'COP': figures['upcoming_cop'], 'USD': figures['upcoming_usd']}
+            month_income = {'COP': figures['income_cop'], 'USD': figures['income_usd']}
+            month_expenses = {'COP': figures['expenses_cop'], 'USD': figures['expenses_usd']}
             
-            # Get overdue payments
-            overdue_payments = Payment.query.filter(
-                Payment.date < today,
-                Payment.status != PaymentStatus.PAGADO
-            ).all()
-            
-            overdue_amount = {'COP': 0, 'USD': 0}
-            for payment in overdue_payments:
-                overdue_amount[payment.currency.value] += float(payment.amount)
-            
-            # Get upcoming payments (next 30 days)
-            upcoming_date = today + timedelta(days=30)
-            upcoming_payments = Payment.query.filter(
-                Payment.date >= today,
-                Payment.date <= upcoming_date,
-                Payment.status == PaymentStatus.PENDIENTE
-            ).all()
-            
-            upcoming_amount = {'COP': 0, 'USD': 0}
-            for payment in upcoming_payments:
-                upcoming_amount[payment.currency.value] += float(payment.amount)
-            
-            # Get current month income
-            current_month_income = db.session.query(
-                func.sum(Income.amount).label('amount'),
-                Income.currency
-            ).filter(
-                Income.date >= month_start,
-                Income.date <= today
-            ).group_by(
-                Income.currency
-            ).all()
-            
-            month_income = {'COP': 0, 'USD': 0}
-            for item in current_month_income:
-                amount = float(item[0]) if item[0] else 0
-                item_currency = item[1].value
-                month_income[item_currency] = amount
-            
-            # Get current month expenses
-            current_month_expenses = db.session.query(
-                func.sum(Expense.amount).label('amount'),
-                Expense.currency
-            ).filter(
-                Expense.date >= month_start,
-                Expense.date <= today
-            ).group_by(
-                Expense.currency
-            ).all()
-            
-            month_expenses = {'COP': 0, 'USD': 0}
-            for item in current_month_expenses:
-                amount = float(item[0]) if item[0] else 0
-                item_currency = item[1].value
-                month_expenses[item_currency] = amount
-            
-            # Convert to target currency if specified
+            # Amounts in the target currency come straight from the normalized columns
             if currency in ['COP', 'USD']:
-                source_currency = 'USD' if currency == 'COP' else 'COP'
-                
-                # Convert overdue amount
-                overdue_amount[currency] += convert_currency(overdue_amount[source_currency], source_currency, currency)
-                overdue_amount = {currency: overdue_amount[currency]}
-                
-                # Convert upcoming amount
-                upcoming_amount[currency] += convert_currency(upcoming_amount[source_currency], source_currency, currency)
-                upcoming_amount = {currency: upcoming_amount[currency]}
-                
-                # Convert month income
-                month_income[currency] += convert_currency(month_income[source_currency], source_currency, currency)
-                month_income = {currency: month_income[currency]}
-                
-                # Convert month expenses
-                month_expenses[currency] += convert_currency(month_expenses[source_currency], source_currency, currency)
-                month_expenses = {currency: month_expenses[currency]}
+                overdue_amount = {currency: figures['overdue_total']}
+                upcoming_amount = {currency: figures['upcoming_total']}
+                month_income = {currency: figures['income_total']}
+                month_expenses = {currency: figures['expenses_total']}
             
             # Calculate month net
             month_net = {}
@@ -877,15 +658,15 @@ class DashboardReport(Resource):
                     'USD': month_income['USD'] - month_expenses['USD']
                 }
             
-            return {
-                'active_clients': active_clients,
-                'active_projects': active_projects,
+            result = {
+                'active_clients': figures['active_clients'],
+                'active_projects': figures['active_projects'],
                 'overdue_payments': {
-                    'count': len(overdue_payments),
+                    'count': overdue_count,
                     'amount': overdue_amount
                 },
                 'upcoming_payments': {
-                    'count': len(upcoming_payments),
+                    'count': upcoming_count,
                     'amount': upcoming_amount
                 },
                 'current_month': {
@@ -893,17 +674,93 @@ class DashboardReport(Resource):
                     'expenses': month_expenses,
                     'net': month_net
                 }
-            }, 200
+            }
+            
+            return result, 200
             
         except Exception as e:
             logging.error(f"Error generating dashboard data: {str(e)}")
             return {'error': str(e)}, 500
 
+# Reports that can be computed as background jobs: name -> (report function, parser)
+JOB_REPORTS = {
+    'cash-flow': (cash_flow_report, cash_flow_parser),
+    'client-analytics': (client_analytics_report, client_parser),
+    'profitability': (profitability_report, profitability_parser),
+    'financial-projection': (financial_projection_report, projection_parser)
+}
+
+report_job_model = api.model('ReportJobRequest', {
+    'report': fields.String(required=True, description='Report name', enum=list(JOB_REPORTS)),
+    'params': fields.Raw(description='Report query parameters, e.g. {"months": 60}')
+})
+
+report_job_schema = ReportJobSchema()
+
+@api.route('/jobs')
+class ReportJobList(Resource):
+    @jwt_required()
+    @api.expect(report_job_model)
+    @api.response(202, 'Report job queued')
+    @api.response(400, 'Validation error')
+    @api.response(503, 'Too many report jobs in progress')
+    def post(self):
+        """Queue a report to be computed in the background"""
+        data = request.json or {}
+        report = data.get('report')
+        params = data.get('params') or {}
+
+        if report not in JOB_REPORTS:
+            return {'error': f"Invalid report. Use {', '.join(JOB_REPORTS)}"}, 400
+        if not isinstance(params, dict):
+            return {'error': 'params must be an object'}, 400
+
+        # Exports are streamed and cannot be stored as a job result
+        params = {key: str(value) for key, value in params.items() if key != 'format'}
+
+        # The worker parses the params in its own request context and calls
+        # the report function directly (still going through the report cache)
+        report_function, parser = JOB_REPORTS[report]
+
+        def view():
+            return report_function(parser.parse_args())
+
+        try:
+            job = submit_job(report, view, f"/reports/{report}", params)
+            return {'data': report_job_schema.dump(job)}, 202
+        except JobQueueFull as e:
+            return {'error': str(e)}, 503
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error queueing report job: {str(e)}")
+            return {'error': str(e)}, 500
+
+@api.route('/jobs/<string:id>')
+class ReportJobDetail(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(404, 'Report job not found')
+    def get(self, id):
+        """Get the status of a report job, with its result once completed"""
+        job = ReportJob.query.get_or_404(id)
+        return {'data': report_job_schema.dump(job)}, 200
+
+@api.route('/cache-stats')
+class ReportCacheStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    def get(self):
+        """Get report cache hit/miss statistics for this worker"""
+        return {'data': report_cache.stats()}, 200
+
 # Routes for the blueprint
 routes = [
     CashFlowReport,
     ClientAnalyticsReport,
     ProfitabilityReport,
     FinancialProjectionReport,
-    DashboardReport
+    DashboardReport,
+    ReportJobList,
+    ReportJobDetail,
+    ReportCacheStats
 ]
@@ -42,6 +42,10 @@ def create_app(config_object='config.DevelopmentConfig'):
     jwt.init_app(app)
     CORS(app)
     
+    # Compress large responses (gzip/deflate negotiated from Accept-Encoding)
+    from utils.compression import init_compression
+    init_compression(app)
+    
     # Setup JWT configurations
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', app.secret_key)
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
@@ -88,6 +92,18 @@ def create_app(config_object='config.DevelopmentConfig'):
     api.add_namespace(expenses_ns)
     api.add_namespace(reports_ns)
     
+    # Fetch exchange rates in the background for this app
+    from utils.currency import init_exchange_rates
+    init_exchange_rates(app)
+    
+    # Register CLI commands
+    from utils.rollups import rollups_cli
+    from utils.fx import fx_cli
+    from utils.search import search_cli
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(fx_cli)
+    app.cli.add_command(search_cli)
+    
     # Register home route to redirect to API docs
     @app.route('/')
     def home():
@@ -107,6 +123,11 @@ def create_app(config_object='config.DevelopmentConfig'):
     with app.app_context():
         db.create_all()
         
+        # Fail report jobs lost by a previous process
+        from utils.report_jobs import recover_jobs
+        recover_jobs(app)
+        db.session.commit()
+        
     return app
 
 app = create_app()
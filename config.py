@@ -15,10 +15,44 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # flask-restx JSON output: Decimal amounts are written as strings, like Flask's own JSON provider does
+    RESTX_JSON = {'default': str}
+    
     # Upload configuration
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
     
+    # Report cache configuration (per worker process)
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 256))
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 32 MB
+    
+    # Pagination totals: 'exact' (COUNT query), 'window' (COUNT(*) OVER() in the page query),
+    # 'cached' (cached count for unfiltered lists) or 'none' (no totals)
+    PAGINATION_COUNT = os.environ.get('PAGINATION_COUNT', 'exact')
+    
+    # Response compression: minimum body size in bytes and zlib level (1-9)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    
+    # CSV imports: rows validated and inserted per transaction
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    
+    # Exchange rates: 'api' (ExchangeRate-API) or 'file' (JSON file, for development and tests)
+    EXCHANGE_RATE_PROVIDER = os.environ.get('EXCHANGE_RATE_PROVIDER', 'api')
+    EXCHANGE_RATE_API_KEY = os.environ.get('EXCHANGE_RATE_API_KEY')
+    EXCHANGE_RATE_HISTORY = os.environ.get('EXCHANGE_RATE_HISTORY', '').lower() in ('1', 'true', 'yes')
+    EXCHANGE_RATE_FILE = os.environ.get('EXCHANGE_RATE_FILE')
+    
+    # Report aggregation engine: 'auto' (NumPy when installed), 'numpy' or 'python'
+    REPORT_ENGINE = os.environ.get('REPORT_ENGINE', 'auto')
+    
+    # Background report jobs (per worker process)
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_PENDING = int(os.environ.get('REPORT_JOB_MAX_PENDING', 20))
+    REPORT_JOB_RETENTION = timedelta(hours=int(os.environ.get('REPORT_JOB_RETENTION_HOURS', 24)))
+    # Queued or running jobs older than this were lost with their process and are marked failed
+    REPORT_JOB_TIMEOUT = timedelta(minutes=int(os.environ.get('REPORT_JOB_TIMEOUT_MINUTES', 30)))
+    
     # Ensure the upload directory exists
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -0,0 +1,113 @@
+"""FX-normalized amount columns and report support tables
+
+Adds the ``amount_cop``/``amount_usd`` columns of incomes, expenses,
+accrued expenses and payments, and the ``period_rollups``,
+``data_versions`` and ``report_jobs`` tables. ``create_app`` runs
+``db.create_all()`` before migrations, so the new tables may already exist
+and are only created when missing.
+
+After upgrading, fill the new tables and columns for existing rows with
+``flask rollups rebuild`` and ``flask fx backfill``.
+
+Revision ID: 5a7d3c9e1f42
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7d3c9e1f42'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+NORMALIZED_TABLES = ['incomes', 'expenses', 'accrued_expenses', 'payments']
+NORMALIZED_COLUMNS = ['amount_cop', 'amount_usd']
+
+# The incomes/expenses/payments tables already created the "currency" enum type on PostgreSQL
+CURRENCY = postgresql.ENUM('COP', 'USD', name='currency', create_type=False)
+
+
+def _period_rollups():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.Enum('INCOME', 'EXPENSE', name='rollupsource'), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('currency', CURRENCY, nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('has_client', sa.Boolean(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source', 'granularity', 'period_start', 'currency', 'category', 'has_client',
+                            name='uq_period_rollups_key'),
+    ]
+
+
+def _data_versions():
+    return [
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    ]
+
+
+def _report_jobs():
+    return [
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('report', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('PENDIENTE', 'EN_PROCESO', 'COMPLETADO', 'FALLIDO', name='reportjobstatus'),
+                  nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+# table -> its columns and constraints, as declared on the models
+TABLES = {
+    'period_rollups': _period_rollups,
+    'data_versions': _data_versions,
+    'report_jobs': _report_jobs,
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    for table, columns in TABLES.items():
+        if table not in existing:
+            op.create_table(table, *columns())
+
+    for table in NORMALIZED_TABLES:
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for column in NORMALIZED_COLUMNS:
+                if column not in columns:
+                    batch_op.add_column(sa.Column(column, sa.Numeric(precision=14, scale=2), nullable=True))
+
+
+def downgrade():
+    for table in reversed(NORMALIZED_TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            for column in reversed(NORMALIZED_COLUMNS):
+                batch_op.drop_column(column)
+
+    for table in reversed(list(TABLES)):
+        op.drop_table(table)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS reportjobstatus')
+        op.execute('DROP TYPE IF EXISTS rollupsource')
@@ -0,0 +1,53 @@
+"""Indexes for the filtered columns of the list and report queries
+
+Tables are created by ``db.create_all()`` in ``create_app``, which also
+creates these indexes for new databases; this revision adds them to
+databases created before they were declared on the models.
+
+Revision ID: 8c2f4e1a9b30
+Revises: d41b7c05e6f2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2f4e1a9b30'
+down_revision = 'd41b7c05e6f2'
+branch_labels = None
+depends_on = None
+
+UNPAID = sa.text("status <> 'PAGADO'")
+
+# (name, table, columns, extra index options)
+INDEXES = [
+    ('ix_payments_date', 'payments', ['date'], {}),
+    ('ix_payments_status_date', 'payments', ['status', 'date'], {}),
+    ('ix_payments_project_id_date', 'payments', ['project_id', 'date'], {}),
+    ('ix_payments_client_id_date', 'payments', ['client_id', 'date'], {}),
+    ('ix_payments_unpaid_date', 'payments', ['date'], {'postgresql_where': UNPAID, 'sqlite_where': UNPAID}),
+    ('ix_expenses_date', 'expenses', ['date'], {}),
+    ('ix_expenses_category_date', 'expenses', ['category', 'date'], {}),
+    ('ix_accrued_expenses_due_date', 'accrued_expenses', ['due_date'], {}),
+    ('ix_accrued_expenses_status_due_date', 'accrued_expenses', ['status', 'due_date'], {}),
+    ('ix_incomes_date', 'incomes', ['date'], {}),
+    ('ix_incomes_type_date', 'incomes', ['type', 'date'], {}),
+    ('ix_incomes_client', 'incomes', ['client'], {}),
+    ('ix_documents_entity', 'documents', ['entity_type', 'entity_id'], {}),
+]
+
+
+def upgrade():
+    # Build without locking writes on PostgreSQL; CONCURRENTLY cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            postgresql_concurrently=True, **options)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Exchange rate store (see utils.currency)
+
+Adds the ``exchange_rates`` table for databases created before it was
+declared; ``db.create_all()`` creates it for new databases, so it is only
+created when missing.
+
+Revision ID: b3e9f6a2c718
+Revises: 5a7d3c9e1f42
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e9f6a2c718'
+down_revision = '5a7d3c9e1f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'exchange_rates' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'exchange_rates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('base_currency', sa.String(length=3), nullable=False),
+        sa.Column('target_currency', sa.String(length=3), nullable=False),
+        sa.Column('rate_date', sa.Date(), nullable=False),
+        sa.Column('rate', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('base_currency', 'target_currency', 'rate_date', name='uq_exchange_rates_pair_date')
+    )
+
+
+def downgrade():
+    op.drop_table('exchange_rates')
@@ -0,0 +1,56 @@
+"""Full-text search indexes (see utils.search)
+
+PostgreSQL gets GIN indexes on the same ``to_tsvector`` expressions the
+``q=`` searches use. SQLite FTS5 tables are filled with ``flask search
+rebuild`` instead, since they are created with their content tables.
+
+Revision ID: d41b7c05e6f2
+Revises: b3e9f6a2c718
+Create Date: 2026-10-18 09:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b7c05e6f2'
+down_revision = 'b3e9f6a2c718'
+branch_labels = None
+depends_on = None
+
+# table -> searchable columns, as registered with utils.search.searchable
+SEARCH_COLUMNS = {
+    'clients': ['name', 'contact_name', 'notes'],
+    'projects': ['name', 'description', 'notes'],
+    'payments': ['invoice_number', 'notes'],
+    'incomes': ['description', 'client', 'notes'],
+    'expenses': ['description', 'category', 'notes'],
+}
+
+
+def _document(columns):
+    parts = [f"coalesce({column}, '')" for column in columns]
+    document = parts[0]
+    for part in parts[1:]:
+        document = f"({document} || ' ') || {part}"
+    return f"to_tsvector('spanish'::regconfig, {document})"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for table, columns in SEARCH_COLUMNS.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search "
+                       f"ON {table} USING gin ({_document(columns)})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for table in SEARCH_COLUMNS:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search")
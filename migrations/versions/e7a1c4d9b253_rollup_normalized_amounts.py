@@ -0,0 +1,53 @@
+"""FX-normalized amounts in the period rollups
+
+Adds the ``amount_cop``, ``amount_usd`` and ``pending_amount`` columns of
+``period_rollups``. ``db.create_all()`` does not add columns to existing
+tables, but a database created after they were declared already has them,
+so they are only added when missing.
+
+Existing rows get their amount in its own currency and the rest as pending,
+which reports convert at the current rate; run ``flask rollups rebuild``
+after upgrading to sum the stored normalized amounts instead.
+
+Revision ID: e7a1c4d9b253
+Revises: 8c2f4e1a9b30
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c4d9b253'
+down_revision = '8c2f4e1a9b30'
+branch_labels = None
+depends_on = None
+
+# (name, precision)
+COLUMNS = [('amount_cop', 16), ('amount_usd', 16), ('pending_amount', 14)]
+
+
+def upgrade():
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('period_rollups')}
+    missing = [(name, precision) for name, precision in COLUMNS if name not in existing]
+    if not missing:
+        return
+
+    with op.batch_alter_table('period_rollups') as batch_op:
+        for name, precision in missing:
+            batch_op.add_column(sa.Column(name, sa.Numeric(precision=precision, scale=2),
+                                          nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE period_rollups SET "
+        "amount_cop = CASE WHEN currency = 'COP' THEN amount ELSE 0 END, "
+        "amount_usd = CASE WHEN currency = 'USD' THEN amount ELSE 0 END, "
+        "pending_amount = amount"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('period_rollups') as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
@@ -6,3 +6,7 @@ from models.payment import Payment
 from models.document import Document
 from models.income import Income
 from models.expense import Expense, RecurringExpense, AccruedExpense
+from models.rollup import PeriodRollup
+from models.data_version import DataVersion
+from models.report_job import ReportJob
+from models.exchange_rate import ExchangeRate
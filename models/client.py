@@ -2,6 +2,7 @@ import datetime
 import enum
 from app import db
 from sqlalchemy.orm import foreign
+from utils.search import searchable
 
 class ClientStatus(enum.Enum):
     ACTIVO = 'Activo'
@@ -35,3 +36,5 @@ class Client(db.Model):
     
     def __repr__(self):
         return f'<Client {self.name}>'
+
+searchable(Client, 'name', 'contact_name', 'notes')
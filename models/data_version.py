@@ -0,0 +1,19 @@
+import datetime
+from app import db
+
+class DataVersion(db.Model):
+    """Per-table change counter used to invalidate cached report results.
+
+    Write paths bump the counter of every table they modify in the same
+    transaction (see ``utils.data_versions``), so any worker process can tell
+    whether a cached result is still current with a single primary-key read.
+    """
+    __tablename__ = 'data_versions'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow,
+                          onupdate=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.table_name} - {self.version}>'
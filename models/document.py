@@ -16,6 +16,9 @@ class DocumentType(enum.Enum):
 
 class Document(db.Model):
     __tablename__ = 'documents'
+    __table_args__ = (
+        db.Index('ix_documents_entity', 'entity_type', 'entity_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     entity_type = db.Column(db.Enum(EntityType), nullable=False)
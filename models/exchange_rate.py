@@ -0,0 +1,23 @@
+import datetime
+from app import db
+
+class ExchangeRate(db.Model):
+    """Daily exchange rate per currency pair, persisted by ``utils.currency``.
+
+    Rows for past dates are historical and never change; the row for the
+    current date is refreshed once ``fetched_at`` is older than the cache TTL.
+    """
+    __tablename__ = 'exchange_rates'
+    __table_args__ = (
+        db.UniqueConstraint('base_currency', 'target_currency', 'rate_date', name='uq_exchange_rates_pair_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    base_currency = db.Column(db.String(3), nullable=False)
+    target_currency = db.Column(db.String(3), nullable=False)
+    rate_date = db.Column(db.Date, nullable=False)
+    rate = db.Column(db.Numeric(20, 10), nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ExchangeRate {self.base_currency}-{self.target_currency} {self.rate_date} - {self.rate}>'
@@ -1,6 +1,8 @@
 import datetime
 import enum
 from app import db
+from utils.fx import track_normalized_amounts
+from utils.search import searchable
 
 class Currency(enum.Enum):
     COP = 'COP'
@@ -27,12 +29,18 @@ class AccruedExpenseStatus(enum.Enum):
 
 class Expense(db.Model):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        db.Index('ix_expenses_date', 'date'),
+        db.Index('ix_expenses_category_date', 'category', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
     date = db.Column(db.Date, nullable=False)
     amount = db.Column(db.Numeric(12, 2), nullable=False)
     currency = db.Column(db.Enum(Currency), nullable=False)
+    amount_cop = db.Column(db.Numeric(14, 2))  # amount normalized to COP (see utils.fx)
+    amount_usd = db.Column(db.Numeric(14, 2))  # amount normalized to USD
     category = db.Column(db.String(100), nullable=False)
     payment_method = db.Column(db.String(100), nullable=False)
     receipt_path = db.Column(db.String(255))
@@ -44,6 +52,9 @@ class Expense(db.Model):
     def __repr__(self):
         return f'<Expense {self.id} - {self.amount} {self.currency.value} - {self.description}>'
 
+track_normalized_amounts(Expense)
+searchable(Expense, 'description', 'category', 'notes')
+
 class RecurringExpense(db.Model):
     __tablename__ = 'recurring_expenses'
     
@@ -70,12 +81,18 @@ class RecurringExpense(db.Model):
 
 class AccruedExpense(db.Model):
     __tablename__ = 'accrued_expenses'
+    __table_args__ = (
+        db.Index('ix_accrued_expenses_due_date', 'due_date'),
+        db.Index('ix_accrued_expenses_status_due_date', 'status', 'due_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
     due_date = db.Column(db.Date, nullable=False)
     amount = db.Column(db.Numeric(12, 2), nullable=False)
     currency = db.Column(db.Enum(Currency), nullable=False)
+    amount_cop = db.Column(db.Numeric(14, 2))  # amount normalized to COP (see utils.fx)
+    amount_usd = db.Column(db.Numeric(14, 2))  # amount normalized to USD
     category = db.Column(db.String(100), nullable=False)
     payment_method = db.Column(db.String(100), nullable=False)
     status = db.Column(db.Enum(AccruedExpenseStatus), nullable=False, default=AccruedExpenseStatus.PENDIENTE)
@@ -89,3 +106,5 @@ class AccruedExpense(db.Model):
     
     def __repr__(self):
         return f'<AccruedExpense {self.id} - {self.amount} {self.currency.value} - {self.description}>'
+
+track_normalized_amounts(AccruedExpense, 'due_date')
@@ -1,6 +1,8 @@
 import datetime
 import enum
 from app import db
+from utils.fx import track_normalized_amounts
+from utils.search import searchable
 
 class Currency(enum.Enum):
     COP = 'COP'
@@ -8,12 +10,19 @@ class Currency(enum.Enum):
 
 class Income(db.Model):
     __tablename__ = 'incomes'
+    __table_args__ = (
+        db.Index('ix_incomes_date', 'date'),
+        db.Index('ix_incomes_type_date', 'type', 'date'),
+        db.Index('ix_incomes_client', 'client'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
     date = db.Column(db.Date, nullable=False)
     amount = db.Column(db.Numeric(12, 2), nullable=False)
     currency = db.Column(db.Enum(Currency), nullable=False)
+    amount_cop = db.Column(db.Numeric(14, 2))  # amount normalized to COP (see utils.fx)
+    amount_usd = db.Column(db.Numeric(14, 2))  # amount normalized to USD
     type = db.Column(db.String(100), nullable=False)  # 'Cliente', 'Aporte de socio', etc.
     client = db.Column(db.String(120))
     payment_method = db.Column(db.String(100), nullable=False)
@@ -25,3 +34,6 @@ class Income(db.Model):
     
     def __repr__(self):
         return f'<Income {self.id} - {self.amount} {self.currency.value} - {self.description}>'
+
+track_normalized_amounts(Income)
+searchable(Income, 'description', 'client', 'notes')
@@ -1,6 +1,8 @@
 import datetime
 import enum
 from app import db
+from utils.fx import track_normalized_amounts
+from utils.search import searchable
 
 class Currency(enum.Enum):
     COP = 'COP'
@@ -17,12 +19,23 @@ class PaymentType(enum.Enum):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_date', 'date'),
+        db.Index('ix_payments_status_date', 'status', 'date'),
+        db.Index('ix_payments_project_id_date', 'project_id', 'date'),
+        db.Index('ix_payments_client_id_date', 'client_id', 'date'),
+        # Overdue and upcoming payments: unpaid rows by date
+        db.Index('ix_payments_unpaid_date', 'date',
+                 postgresql_where=db.text("status <> 'PAGADO'"), sqlite_where=db.text("status <> 'PAGADO'")),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id', ondelete='CASCADE'), nullable=False)
     amount = db.Column(db.Numeric(12, 2), nullable=False)
     currency = db.Column(db.Enum(Currency), nullable=False)
+    amount_cop = db.Column(db.Numeric(14, 2))  # amount normalized to COP (see utils.fx)
+    amount_usd = db.Column(db.Numeric(14, 2))  # amount normalized to USD
     date = db.Column(db.Date, nullable=False)  # Fecha programada
     paid_date = db.Column(db.Date)  # Fecha real de pago
     status = db.Column(db.Enum(PaymentStatus), nullable=False, default=PaymentStatus.PENDIENTE)
@@ -41,3 +54,6 @@ class Payment(db.Model):
     
     def __repr__(self):
         return f'<Payment {self.id} - {self.amount} {self.currency.value} - {self.status.value}>'
+
+track_normalized_amounts(Payment)
+searchable(Payment, 'invoice_number', 'notes')
@@ -2,6 +2,7 @@ import datetime
 import enum
 from app import db
 from sqlalchemy.orm import foreign
+from utils.search import searchable
 
 class ProjectStatus(enum.Enum):
     ACTIVO = 'Activo'
@@ -56,6 +57,8 @@ class Project(db.Model):
     def __repr__(self):
         return f'<Project {self.name} - Client {self.client_id}>'
 
+searchable(Project, 'name', 'description', 'notes')
+
 class PaymentPlan(db.Model):
     __tablename__ = 'payment_plans'
     
@@ -0,0 +1,31 @@
+import datetime
+import enum
+import uuid
+from app import db
+
+class ReportJobStatus(enum.Enum):
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADO = 'completado'
+    FALLIDO = 'fallido'
+
+class ReportJob(db.Model):
+    """A report computed in the background by ``utils.report_jobs``.
+
+    ``params`` holds the report query parameters and ``result`` the report
+    body once the job completes, so any worker process can serve the result.
+    """
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    report = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.PENDIENTE)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.report} - {self.status.value}>'
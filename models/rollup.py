@@ -0,0 +1,49 @@
+import datetime
+import enum
+from app import db
+
+class Currency(enum.Enum):
+    COP = 'COP'
+    USD = 'USD'
+
+class RollupSource(enum.Enum):
+    INCOME = 'income'
+    EXPENSE = 'expense'
+
+class PeriodRollup(db.Model):
+    """Pre-aggregated income/expense totals per period, currency and category.
+
+    Rows are maintained incrementally by ``utils.rollups`` in the same
+    transaction as the income/expense write that changes them. ``category``
+    holds ``Expense.category`` or ``Income.type`` and ``has_client`` tracks
+    whether the incomes were linked to a client.
+
+    ``amount_cop``/``amount_usd`` sum the rows' FX-normalized amounts (see
+    ``utils.fx``). ``pending_amount`` sums, in ``currency``, the rows whose
+    amount in the other currency is not known yet; reports convert it at the
+    current rate until the rate for their dates is stored.
+    """
+    __tablename__ = 'period_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('source', 'granularity', 'period_start', 'currency', 'category', 'has_client',
+                            name='uq_period_rollups_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.Enum(RollupSource), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # 'month', 'quarter', 'year'
+    period_start = db.Column(db.Date, nullable=False)
+    currency = db.Column(db.Enum(Currency), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    has_client = db.Column(db.Boolean, nullable=False, default=False)
+    amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    amount_cop = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    amount_usd = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    pending_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow,
+                          onupdate=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return (f'<PeriodRollup {self.source.value} {self.granularity} {self.period_start} '
+                f'{self.currency.value} {self.category} - {self.amount}>')
@@ -8,3 +8,4 @@ from schemas.income import IncomeSchema, IncomeListSchema
 from schemas.expense import (ExpenseSchema, ExpenseListSchema, 
                             RecurringExpenseSchema, RecurringExpenseListSchema,
                             AccruedExpenseSchema, AccruedExpenseListSchema)
+from schemas.report_job import ReportJobSchema
@@ -19,7 +19,7 @@ class ClientSchema(ma.SQLAlchemyAutoSchema):
     start_date = fields.Date(required=True)
     
     @validates('start_date')
-    def validate_start_date(self, value):
+    def validate_start_date(self, value, **kwargs):
         if value > datetime.date.today():
             raise ValidationError('Start date cannot be in the future')
         return value
@@ -10,7 +10,7 @@ class ExpenseSchema(ma.SQLAlchemyAutoSchema):
         model = Expense
         load_instance = True
     
-    currency = EnumField(Currency, by_value=True)
+    currency = EnumField(Currency, by_value=True, error='Must be one of: {values}.')
     
     # Fields for file upload, not part of model
     receipt = fields.Raw(metadata={'type': 'file'}, load_only=True)
@@ -23,7 +23,7 @@ class ExpenseSchema(ma.SQLAlchemyAutoSchema):
     payment_method = fields.String(required=True)
     
     @validates('amount')
-    def validate_amount(self, value):
+    def validate_amount(self, value, **kwargs):
         if value <= 0:
             raise ValidationError('Amount must be greater than zero')
         return value
@@ -54,13 +54,13 @@ class RecurringExpenseSchema(ma.SQLAlchemyAutoSchema):
     payment_method = fields.String(required=True)
     
     @validates('amount')
-    def validate_amount(self, value):
+    def validate_amount(self, value, **kwargs):
         if value <= 0:
             raise ValidationError('Amount must be greater than zero')
         return value
     
     @validates('start_date')
-    def validate_start_date(self, value):
+    def validate_start_date(self, value, **kwargs):
         if value < datetime.date.today():
             raise ValidationError('Start date cannot be in the past')
         return value
@@ -96,7 +96,7 @@ class AccruedExpenseSchema(ma.SQLAlchemyAutoSchema):
     payment_method = fields.String(required=True)
     
     @validates('amount')
-    def validate_amount(self, value):
+    def validate_amount(self, value, **kwargs):
         if value <= 0:
             raise ValidationError('Amount must be greater than zero')
         return value
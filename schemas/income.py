@@ -9,7 +9,7 @@ class IncomeSchema(ma.SQLAlchemyAutoSchema):
         model = Income
         load_instance = True
     
-    currency = EnumField(Currency, by_value=True)
+    currency = EnumField(Currency, by_value=True, error='Must be one of: {values}.')
     
     # Fields for file upload, not part of model
     receipt = fields.Raw(metadata={'type': 'file'}, load_only=True)
@@ -22,13 +22,13 @@ class IncomeSchema(ma.SQLAlchemyAutoSchema):
     payment_method = fields.String(required=True)
     
     @validates('amount')
-    def validate_amount(self, value):
+    def validate_amount(self, value, **kwargs):
         if value <= 0:
             raise ValidationError('Amount must be greater than zero')
         return value
     
     @validates('date')
-    def validate_date(self, value):
+    def validate_date(self, value, **kwargs):
         if value > datetime.date.today():
             raise ValidationError('Income date cannot be in the future')
         return value
@@ -21,13 +21,13 @@ class PaymentSchema(ma.SQLAlchemyAutoSchema):
     date = fields.Date(required=True)
     
     @validates('amount')
-    def validate_amount(self, value):
+    def validate_amount(self, value, **kwargs):
         if value <= 0:
             raise ValidationError('Amount must be greater than zero')
         return value
     
     @validates('paid_date')
-    def validate_paid_date(self, value):
+    def validate_paid_date(self, value, **kwargs):
         if value and value > datetime.date.today():
             raise ValidationError('Paid date cannot be in the future')
         return value
@@ -56,13 +56,13 @@ class ProjectSchema(ma.SQLAlchemyAutoSchema):
     client_id = fields.Integer(required=True)
     
     @validates('start_date')
-    def validate_start_date(self, value):
+    def validate_start_date(self, value, **kwargs):
         if value > datetime.date.today() + datetime.timedelta(days=365):
             raise ValidationError('Start date cannot be more than a year in the future')
         return value
     
     @validates('end_date')
-    def validate_end_date(self, value):
+    def validate_end_date(self, value, **kwargs):
         if value and self.context.get('start_date') and value < self.context.get('start_date'):
             raise ValidationError('End date cannot be before start date')
         return value
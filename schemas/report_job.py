@@ -0,0 +1,15 @@
+from app import ma
+from models.report_job import ReportJobStatus
+from marshmallow import fields
+from marshmallow_enum import EnumField
+
+class ReportJobSchema(ma.Schema):
+    id = fields.String()
+    report = fields.String()
+    params = fields.Dict()
+    status = EnumField(ReportJobStatus, by_value=True)
+    result = fields.Raw(allow_none=True)
+    error = fields.String(allow_none=True)
+    created_at = fields.DateTime()
+    started_at = fields.DateTime(allow_none=True)
+    finished_at = fields.DateTime(allow_none=True)
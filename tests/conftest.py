@@ -2,11 +2,16 @@ import os
 import pytest
 import datetime
 import tempfile
+
+# app.py builds a module-level app on import, which needs a database URL
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
 from app import create_app, db
+from config import TestingConfig
+from utils.report_cache import report_cache
 from models import User, Client, Project, PaymentPlan
 from models.client import ClientStatus
 from models.project import ProjectStatus, PaymentPlanType, Currency, FrequencyType
-from werkzeug.security import generate_password_hash
 
 @pytest.fixture
 def app():
@@ -14,15 +19,20 @@ def app():
     # Create a temporary file to isolate the database for each test
     db_fd, db_path = tempfile.mkstemp()
     
-    # Use SQLite for testing
-    app = create_app('config.TestingConfig')
+    # Use SQLite for testing. Flask-SQLAlchemy creates the engine in
+    # create_app(), so the database URI has to be part of the config object
+    config = type('TestConfig', (TestingConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}"})
+    app = create_app(config)
     app.config.update({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
         'UPLOAD_FOLDER': tempfile.mkdtemp(),
         'WTF_CSRF_ENABLED': False
     })
     
+    # Every test starts from version 0 of a fresh database, so cached
+    # reports from an earlier test would look current
+    report_cache.clear()
+    
     # Create the database and the database tables
     with app.app_context():
         db.create_all()
@@ -51,7 +61,7 @@ def runner(app):
 def auth_headers(client):
     """Get authentication headers with a valid JWT token"""
     # Login to get token
-    response = client.post('/api/auth/login', json={
+    response = client.post('/auth/login', json={
         'username': 'testuser',
         'password': 'testpassword'
     })
@@ -69,7 +79,7 @@ def _init_test_data(db):
     test_user = User(
         username='testuser',
         email='test@example.com',
-        password_hash=generate_password_hash('testpassword'),
+        password='testpassword',
         role='admin'
     )
     db.session.add(test_user)
@@ -0,0 +1,135 @@
+import datetime
+from decimal import Decimal
+import pytest
+from app import db
+from models.client import Client
+from models.expense import AccruedExpense, AccruedExpenseStatus, Expense
+from models.income import Income
+from models.payment import Payment, PaymentStatus, PaymentType
+from models.project import Project
+from utils.aggregation import grouped_sums, index_sums
+from utils.currency import _store_rate, clear_exchange_rate_cache
+from utils.report_cache import report_cache
+from utils.rollups import apply_expense, apply_income
+
+pytest.importorskip('numpy')
+
+ENGINES = ('python', 'numpy')
+
+REPORTS = [
+    'cash-flow',
+    'cash-flow?currency=USD&period=quarter&months=30',
+    'cash-flow?currency=EUR&period=year&months=40',
+    'profitability?year={year}',
+    'profitability?year={year}&currency=USD&period=quarter',
+    'client-analytics?year={year}',
+    'client-analytics?currency=USD&year={year}',
+    'financial-projection',
+    'financial-projection?currency=USD&months=24',
+]
+
+# (index, currency code, amount, amount_cop, amount_usd, pending_amount)
+ROWS = [
+    (0, 0, 4000.0, 4000.0, 1.0, 0.0),
+    (2, 1, 10.0, 40000.0, 10.0, 0.0),
+    (2, 1, 5.0, 0.0, 5.0, 5.0),
+    (2, 0, 8000.0, 8000.0, 0.0, 8000.0),
+]
+
+def _past(today, number):
+    return today - datetime.timedelta(days=number * 11)
+
+def _future(today, number):
+    return today + datetime.timedelta(days=number * 13 - 200)
+
+def _seed():
+    """Payments, incomes and expenses in both currencies around today, half of them without a stored rate"""
+    today = datetime.date.today()
+    clear_exchange_rate_cache()
+    for number in range(1, 60, 2):
+        _store_rate('USD', 'COP', _past(today, number), 4000 + number)
+        _store_rate('USD', 'COP', _future(today, number), 4000 + number)
+
+    clients = [Client(name=f'Cliente {number}', start_date=datetime.date(2024, 1, 1)) for number in range(3)]
+    db.session.add_all(clients)
+    db.session.flush()
+    projects = [Project(client_id=client.id, name='Proyecto', description='Web', start_date=datetime.date(2024, 1, 1))
+                for client in clients]
+    db.session.add_all(projects)
+    db.session.flush()
+
+    for number in range(60):
+        project = projects[number % len(projects)]
+        currency = 'COP' if number % 3 else 'USD'
+        amount = Decimal(number * 137 % 9000 + 100) * (1000 if currency == 'COP' else 1) / 100
+        past, future = _past(today, number), _future(today, number)
+        db.session.add_all([
+            Payment(project_id=project.id, client_id=project.client_id, amount=amount, currency=currency,
+                    date=future, status=list(PaymentStatus)[number % len(PaymentStatus)],
+                    type=list(PaymentType)[number % len(PaymentType)], invoice_number=f'F-{number}'),
+            AccruedExpense(description=f'Gasto {number}', due_date=future, amount=amount, currency=currency,
+                           category='Oficina', payment_method='Transferencia', is_recurring=number % 2 == 0,
+                           status=list(AccruedExpenseStatus)[number % len(AccruedExpenseStatus)]),
+        ])
+        income = Income(date=past, description=f'Ingreso {number}', amount=amount, currency=currency,
+                        type='Cliente', client=clients[number % 2].name, payment_method='Transferencia')
+        expense = Expense(date=past, description=f'Egreso {number}', amount=amount / 2, currency=currency,
+                          category='Oficina', payment_method='Efectivo')
+        db.session.add_all([income, expense])
+        apply_income(income)
+        apply_expense(expense)
+    db.session.commit()
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_index_sums(app, engine):
+    app.config['REPORT_ENGINE'] = engine
+    with app.app_context():
+        assert index_sums(ROWS, 3) == {'COP': [4000.0, 0.0, 8000.0], 'USD': [0.0, 0.0, 15.0]}
+        assert index_sums([], 2) == {'COP': [0.0, 0.0], 'USD': [0.0, 0.0]}
+
+        # Pending amounts are converted at the current rate, the rest is already normalized
+        rate = index_sums([(0, 1, 1.0, 0.0, 1.0, 1.0)], 1, 'COP')['COP'][0]
+        assert index_sums(ROWS, 3, 'COP') == {'COP': [4000.0, 0.0, 48000.0 + 5 * rate]}
+
+        with pytest.raises(ValueError):
+            index_sums([row[:3] for row in ROWS], 3, 'COP')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_grouped_sums(app, engine):
+    app.config['REPORT_ENGINE'] = engine
+    rows = [(7, *ROWS[0]), (3, *ROWS[1]), (7, *ROWS[3])]
+    with app.app_context():
+        assert grouped_sums(rows, [3, 7, 9], 3) == {
+            3: {'COP': [0.0, 0.0, 0.0], 'USD': [0.0, 0.0, 10.0]},
+            7: {'COP': [4000.0, 0.0, 8000.0], 'USD': [0.0, 0.0, 0.0]},
+            9: {'COP': [0.0, 0.0, 0.0], 'USD': [0.0, 0.0, 0.0]},
+        }
+        assert grouped_sums(rows, [], 3) == {}
+
+def test_engines_return_the_same_reports(app, client, auth_headers):
+    """Every report is the same whether it is aggregated with NumPy or in Python"""
+    with app.app_context():
+        _seed()
+
+    year = datetime.date.today().year
+    results = {}
+    for engine in ENGINES:
+        app.config['REPORT_ENGINE'] = engine
+        report_cache.clear()
+        results[engine] = {}
+        for path in REPORTS:
+            response = client.get('/reports/' + path.format(year=year), headers=auth_headers)
+            assert response.status_code == 200, path
+            results[engine][path] = response.get_json()
+
+    for path in REPORTS:
+        assert _flatten(results['numpy'][path]) == pytest.approx(_flatten(results['python'][path])), path
+
+def _flatten(value, prefix=''):
+    """Nested report JSON as a flat path -> value dict, so numbers can be compared approximately"""
+    if isinstance(value, dict):
+        return {key: item for name, child in value.items() for key, item in _flatten(child, f'{prefix}/{name}').items()}
+    if isinstance(value, list):
+        return {key: item for position, child in enumerate(value)
+                for key, item in _flatten(child, f'{prefix}/{position}').items()}
+    return {prefix: value}
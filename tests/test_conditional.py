@@ -0,0 +1,94 @@
+import gzip
+import datetime
+from app import db
+from models import Client, PaymentPlan, Project
+
+def _get(client, path, auth_headers, **headers):
+    return client.get(path, headers={**auth_headers, **headers})
+
+def _income():
+    return {
+        'date': '2025-01-10',
+        'description': 'Pago',
+        'amount': 100,
+        'currency': 'COP',
+        'type': 'Cliente',
+        'payment_method': 'Transferencia'
+    }
+
+def test_list_revalidates_until_the_table_changes(client, auth_headers):
+    first = _get(client, '/incomes', auth_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    cached = _get(client, '/incomes', auth_headers, **{'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    # Other query parameters are another representation
+    assert _get(client, '/incomes?per_page=5', auth_headers, **{'If-None-Match': etag}).status_code == 200
+
+    assert client.post('/incomes', json=_income(), headers=auth_headers).status_code == 201
+    changed = _get(client, '/incomes', auth_headers, **{'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_list_honours_if_modified_since(client, auth_headers):
+    assert client.post('/incomes', json=_income(), headers=auth_headers).status_code == 201
+    first = _get(client, '/incomes', auth_headers)
+
+    cached = _get(client, '/incomes', auth_headers, **{'If-Modified-Since': first.headers['Last-Modified']})
+    assert cached.status_code == 304
+
+def test_detail_revalidates_until_the_row_changes(app, client, auth_headers):
+    with app.app_context():
+        client_id = Client.query.first().id
+    path = f'/clients/{client_id}'
+
+    etag = _get(client, path, auth_headers).headers['ETag']
+    assert _get(client, path, auth_headers, **{'If-None-Match': etag}).status_code == 304
+
+    assert client.put(path, json={'notes': 'Actualizado'}, headers=auth_headers).status_code == 200
+    changed = _get(client, path, auth_headers, **{'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+    # Missing rows are answered by the resource
+    assert _get(client, '/clients/999', auth_headers, **{'If-None-Match': etag}).status_code == 404
+
+def test_detail_etag_covers_related_rows(app, client, auth_headers):
+    """A project's ETag changes when one of its payment plans is updated"""
+    with app.app_context():
+        project_id = Project.query.first().id
+    path = f'/projects/{project_id}'
+
+    etag = _get(client, path, auth_headers).headers['ETag']
+    assert _get(client, path, auth_headers, **{'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        plan = PaymentPlan.query.filter_by(project_id=project_id).first()
+        plan.updated_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        db.session.commit()
+    assert _get(client, path, auth_headers, **{'If-None-Match': etag}).status_code == 200
+
+def test_compressed_response_revalidates_with_gzip_etag(app, client, auth_headers):
+    """The ``-gzip`` tag of a compressed report is answered with 304 and handed back unchanged"""
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    path = '/reports/cash-flow?months=24'
+    first = _get(client, path, auth_headers, **{'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag']
+    assert etag.endswith('-gzip"')
+    assert gzip.decompress(first.data)
+
+    cached = _get(client, path, auth_headers, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
+    # The same representation uncompressed is still current for the client
+    plain = _get(client, path, auth_headers, **{'If-None-Match': etag})
+    assert plain.status_code == 304
+    assert plain.headers['ETag'] == etag.replace('-gzip"', '"')
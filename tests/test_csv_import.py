@@ -0,0 +1,125 @@
+import io
+import datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+from app import db
+from models.expense import Expense
+from models.income import Income
+from models.rollup import PeriodRollup, RollupSource
+from schemas.expense import ExpenseSchema
+from utils.csv_import import import_csv
+from utils.rollups import apply_expenses
+
+HEADER = 'description,date,amount,currency,category,payment_method\n'
+
+def _upload(client, auth_headers, path, text):
+    return client.post(path, data={'file': (io.BytesIO(text.encode()), 'import.csv')},
+                       headers=auth_headers, content_type='multipart/form-data')
+
+def _expenses(count, start=0):
+    return ''.join(f'Gasto {i},2025-03-{i % 28 + 1:02d},{1000 + i},COP,Oficina,Transferencia\n'
+                   for i in range(start, start + count))
+
+@pytest.fixture
+def inserts(app):
+    """Statements that insert expenses, with the number of rows each one carries"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO expenses'):
+            statements.append(len(parameters) if executemany else 1)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        yield statements
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_invalid_rows_are_reported_by_line(app, client, auth_headers):
+    text = (HEADER
+            + 'Arriendo,2025-03-01,2500000,COP,Oficina,Transferencia\n'
+            + ',2025-03-02,100,COP,Oficina,Efectivo\n'
+            + 'Hosting,2025-03-03,abc,USD,Software,Tarjeta\n'
+            + 'Licencia,03/04/2025,-5,USD,Software,Tarjeta\n'
+            + 'Viaje,2025-03-05,300,EUR,Viajes,Efectivo\n'
+            + 'Papelería,2025-03-06,45000,COP,Oficina,Efectivo\n')
+    response = _upload(client, auth_headers, '/expenses/import', text)
+    assert response.status_code == 201
+
+    result = response.get_json()['data']
+    assert (result['imported'], result['failed']) == (2, 4)
+    errors = {error['row']: error['errors'] for error in result['errors']}
+    assert sorted(errors) == [3, 4, 5, 6]
+    assert 'description' in errors[3]
+    assert 'amount' in errors[4]
+    assert set(errors[5]) == {'date', 'amount'}
+    assert 'currency' in errors[6]
+
+    with app.app_context():
+        assert [expense.description for expense in Expense.query.order_by(Expense.date)] == ['Arriendo', 'Papelería']
+        rollup = PeriodRollup.query.filter_by(source=RollupSource.EXPENSE, granularity='month',
+                                              period_start=datetime.date(2025, 3, 1)).one()
+        assert (rollup.amount, rollup.row_count) == (Decimal('2545000.00'), 2)
+
+def test_rows_are_inserted_in_chunks(app, client, auth_headers, inserts):
+    """Each chunk of valid rows is one executemany insert"""
+    app.config['IMPORT_CHUNK_SIZE'] = 4
+    text = HEADER + _expenses(5) + 'Sin monto,2025-03-10,,COP,Oficina,Efectivo\n' + _expenses(4, start=5)
+
+    response = _upload(client, auth_headers, '/expenses/import', text)
+    assert response.status_code == 201
+    result = response.get_json()['data']
+    assert (result['imported'], result['failed']) == (9, 1)
+    assert result['errors'][0]['row'] == 7
+
+    # Chunks of 4 read rows: the one with the invalid row inserts only 3
+    assert inserts == [4, 3, 2]
+    with app.app_context():
+        assert Expense.query.count() == 9
+
+def test_failed_chunk_is_rolled_back(app):
+    """A chunk that fails to insert is reported as a whole; the other chunks are kept"""
+    calls = []
+
+    def apply_rollups(rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError('rollup failed')
+        apply_expenses(rows)
+
+    upload = FileStorage(io.BytesIO((HEADER + _expenses(5)).encode()), 'import.csv')
+    with app.app_context():
+        result = import_csv(upload, Expense, ExpenseSchema, tuple(HEADER.strip().split(',')), apply_rollups,
+                            chunk_size=2)
+
+        assert (result['imported'], result['failed']) == (3, 2)
+        assert result['errors'] == [{'row': 4, 'to_row': 5, 'errors': {'_database': ['rollup failed']}}]
+        assert sorted(expense.description for expense in Expense.query) == ['Gasto 0', 'Gasto 1', 'Gasto 4']
+
+def test_income_import(app, client, auth_headers):
+    text = ('description,date,amount,currency,type,client,payment_method\n'
+            'Anticipo,2025-03-01,500,USD,Cliente,Test Client,Transferencia\n'
+            'Aporte,2025-03-02,1000000,COP,Aporte de socio,,Transferencia\n')
+    response = _upload(client, auth_headers, '/incomes/import', text)
+    assert response.status_code == 201
+    assert response.get_json()['data'] == {'imported': 2, 'failed': 0, 'errors': []}
+
+    with app.app_context():
+        anticipo = Income.query.filter_by(description='Anticipo').one()
+        assert anticipo.amount_usd == Decimal('500.00')
+        assert Income.query.filter_by(description='Aporte').one().client is None
+
+@pytest.mark.parametrize('text, error', [
+    pytest.param('', 'The file is empty', id='empty'),
+    pytest.param('description,date,amount,vendor\n', 'Unknown columns: vendor', id='unknown-column'),
+])
+def test_invalid_file_is_rejected(client, auth_headers, text, error):
+    response = _upload(client, auth_headers, '/expenses/import', text)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+def test_file_without_valid_rows_is_rejected(client, auth_headers):
+    response = _upload(client, auth_headers, '/expenses/import', HEADER + ',2025-03-02,100,COP,Oficina,Efectivo\n')
+    assert response.status_code == 400
+    assert response.get_json()['data']['failed'] == 1
@@ -0,0 +1,105 @@
+import json
+import time
+import datetime
+import threading
+from app import db
+from models.exchange_rate import ExchangeRate
+from utils.currency import (CACHE_DURATION, FALLBACK_RATES, RateRefresher, _store_rate,
+                            clear_exchange_rate_cache, get_exchange_rate)
+from utils.rate_providers import FileRateProvider, RateProvider, create_provider
+
+class BlockingProvider(RateProvider):
+    """Provider whose fetches wait until the test releases them"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.release = threading.Event()
+        self.calls = []
+
+    def fetch(self, base_currency, target_currency, on_date=None):
+        self.calls.append((base_currency, target_currency, on_date))
+        self.release.wait(5)
+        return self.rate
+
+def _use_provider(app, provider):
+    app.config['EXCHANGE_RATE_PROVIDER'] = provider
+    app.extensions['rate_refresher'] = RateRefresher(app)
+
+def _wait_for_rate(app, rate, timeout=5):
+    """Poll until today's USD-COP rate is ``rate``"""
+    deadline = time.monotonic() + timeout
+    with app.app_context():
+        while get_exchange_rate('USD', 'COP') != rate and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return get_exchange_rate('USD', 'COP')
+
+def test_file_provider_reads_latest_and_historical_rates(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({
+        'rates': {'USD-COP': 3950.0},
+        'history': {'2025-01-31': {'USD-COP': 4310.5}}
+    }))
+    provider = FileRateProvider(str(path))
+
+    assert provider.fetch('USD', 'COP') == 3950.0
+    assert provider.fetch('USD', 'COP', datetime.date(2025, 1, 31)) == 4310.5
+    assert provider.fetch('USD', 'COP', datetime.date(2025, 2, 1)) is None
+    assert provider.fetch('EUR', 'COP') is None
+
+    path.write_text('not json')
+    assert provider.fetch('USD', 'COP') is None
+    assert FileRateProvider(str(tmp_path / 'missing.json')).fetch('USD', 'COP') is None
+
+def test_create_provider_from_config(tmp_path):
+    provider = create_provider({'EXCHANGE_RATE_PROVIDER': 'file', 'EXCHANGE_RATE_FILE': str(tmp_path / 'rates.json')})
+    assert isinstance(provider, FileRateProvider)
+    assert create_provider({'EXCHANGE_RATE_PROVIDER': 'file'}) is None
+    assert create_provider({'EXCHANGE_RATE_PROVIDER': 'api'}) is None
+
+    blocking = BlockingProvider(4100.0)
+    assert create_provider({'EXCHANGE_RATE_PROVIDER': blocking}) is blocking
+
+def test_stale_rate_is_served_while_refreshing(app):
+    """A stale stored rate is returned at once; the refresh lands in the background"""
+    provider = BlockingProvider(4100.0)
+    _use_provider(app, provider)
+    today = datetime.date.today()
+
+    with app.app_context():
+        clear_exchange_rate_cache()
+        _store_rate('USD', 'COP', today, 3900.0)
+        ExchangeRate.query.update({
+            'fetched_at': datetime.datetime.utcnow() - datetime.timedelta(seconds=CACHE_DURATION + 60)
+        })
+        db.session.commit()
+
+        started = time.monotonic()
+        assert get_exchange_rate('USD', 'COP') == 3900.0
+        assert get_exchange_rate('USD', 'COP') == 3900.0
+        assert time.monotonic() - started < 1
+
+    provider.release.set()
+    assert _wait_for_rate(app, 4100.0) == 4100.0
+
+    # The refresh is queued once and the fetched rate is stored
+    assert provider.calls == [('USD', 'COP', None)]
+    with app.app_context():
+        stored = ExchangeRate.query.filter_by(base_currency='USD', target_currency='COP', rate_date=today).one()
+        assert float(stored.rate) == 4100.0
+
+def test_missing_rate_serves_fallback_while_refreshing(app):
+    """Without any stored rate the fallback is returned without waiting on the provider"""
+    provider = BlockingProvider(4100.0)
+    _use_provider(app, provider)
+
+    with app.app_context():
+        clear_exchange_rate_cache()
+        started = time.monotonic()
+        assert get_exchange_rate('USD', 'COP') == FALLBACK_RATES['USD-COP']
+        assert get_exchange_rate('USD', 'COP', dated=True) is None
+        assert time.monotonic() - started < 1
+
+    provider.release.set()
+    assert _wait_for_rate(app, 4100.0) == 4100.0
+    with app.app_context():
+        assert get_exchange_rate('USD', 'COP', dated=True) == 4100.0
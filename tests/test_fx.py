@@ -0,0 +1,79 @@
+import datetime
+from decimal import Decimal
+from app import db
+from models.income import Income
+from models.rollup import PeriodRollup, RollupSource
+from utils.currency import FALLBACK_RATES, _store_rate, clear_exchange_rate_cache
+from utils.fx import renormalize_amounts
+
+def _income(**values):
+    data = {
+        'date': '2025-01-10',
+        'description': 'Pago',
+        'amount': 100,
+        'currency': 'USD',
+        'type': 'Cliente',
+        'payment_method': 'Transferencia'
+    }
+    data.update(values)
+    return data
+
+def _month_rollup(period):
+    return PeriodRollup.query.filter_by(source=RollupSource.INCOME, granularity='month', period_start=period).one()
+
+def test_amounts_are_normalized_at_the_dated_rate(app, client, auth_headers):
+    """Writes through the session are normalized with the rate for the row's date"""
+    with app.app_context():
+        clear_exchange_rate_cache()
+        _store_rate('USD', 'COP', datetime.date(2025, 1, 10), 4000)
+
+    response = client.post('/incomes', json=_income(), headers=auth_headers)
+    assert response.status_code == 201
+    income_id = response.get_json()['data']['id']
+
+    with app.app_context():
+        income = db.session.get(Income, income_id)
+        assert (income.amount_cop, income.amount_usd) == (Decimal('400000.00'), Decimal('100.00'))
+
+    # Changing the amount renormalizes it on the flush
+    assert client.put(f'/incomes/{income_id}', json={'amount': 50}, headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        income = db.session.get(Income, income_id)
+        assert (income.amount_cop, income.amount_usd) == (Decimal('200000.00'), Decimal('50.00'))
+        rollup = _month_rollup(datetime.date(2025, 1, 1))
+        assert (rollup.amount_cop, rollup.amount_usd, rollup.pending_amount) == (200000, 50, 0)
+
+def test_unknown_rate_stays_pending_until_stored(app, client, auth_headers):
+    """Amounts without a rate for their date are converted at the current rate until it is stored"""
+    with app.app_context():
+        clear_exchange_rate_cache()
+
+    response = client.post('/incomes', json=_income(date='2025-02-10'), headers=auth_headers)
+    assert response.status_code == 201
+    income_id = response.get_json()['data']['id']
+    february = datetime.date(2025, 2, 1)
+
+    with app.app_context():
+        income = db.session.get(Income, income_id)
+        assert (income.amount_cop, income.amount_usd) == (None, Decimal('100.00'))
+        rollup = _month_rollup(february)
+        assert (rollup.amount_cop, rollup.amount_usd, rollup.pending_amount) == (0, 100, 100)
+
+    # Reports convert the pending amount at the current rate
+    report = client.get('/reports/cash-flow?months=24&currency=COP', headers=auth_headers).get_json()
+    assert [(entry['period'], entry['income']) for entry in report['data']] == [
+        ('2025-02', {'COP': 100 * FALLBACK_RATES['USD-COP']})
+    ]
+
+    with app.app_context():
+        _store_rate('USD', 'COP', datetime.date(2025, 2, 10), 4200)
+        renormalize_amounts(('USD', 'COP'), datetime.date(2025, 2, 10))
+
+        income = db.session.get(Income, income_id)
+        assert income.amount_cop == Decimal('420000.00')
+        rollup = _month_rollup(february)
+        assert (rollup.amount_cop, rollup.amount_usd, rollup.pending_amount) == (420000, 100, 0)
+
+    report = client.get('/reports/cash-flow?months=24&currency=COP', headers=auth_headers).get_json()
+    assert [(entry['period'], entry['income']) for entry in report['data']] == [('2025-02', {'COP': 420000})]
@@ -0,0 +1,64 @@
+import datetime
+import pytest
+from app import db
+from models.expense import Expense
+
+ROWS = 23
+
+@pytest.fixture
+def expenses(app):
+    """Expenses sharing a few dates and amounts, so most sort keys are ties broken by id"""
+    with app.app_context():
+        rows = [Expense(description=f'Gasto {i}', date=datetime.date(2025, 1, 1 + i % 4), amount=100 * (i % 3 + 1),
+                        currency='COP', category='Oficina', payment_method='Transferencia') for i in range(ROWS)]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [(row.id, row.date, row.amount) for row in rows]
+
+def _walk(client, auth_headers, params, direction, cursor=''):
+    """Follow ``next_cursor`` or ``prev_cursor`` from ``cursor`` to the end, returning the ids of every page"""
+    pages = []
+    while cursor is not None:
+        response = client.get('/expenses', query_string={**params, 'cursor': cursor, 'per_page': 5},
+                              headers=auth_headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([item['id'] for item in body['data']])
+        cursor = body['pagination'][f'{direction}_cursor']
+    return pages, body['pagination']
+
+@pytest.mark.parametrize('params, key, descending', [
+    pytest.param({}, lambda row: (row[1], row[0]), True, id='date-desc'),
+    pytest.param({'sort': 'amount'}, lambda row: (row[2], row[0]), False, id='amount-asc'),
+])
+def test_cursor_pages_round_trip(client, auth_headers, expenses, params, key, descending):
+    """Paging forward then back visits every row once, in the same order both ways"""
+    expected = [row[0] for row in sorted(expenses, key=key, reverse=descending)]
+
+    pages, last = _walk(client, auth_headers, params, 'next')
+    assert [item for page in pages for item in page] == expected
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert last['has_next'] is False and last['has_prev'] is True
+
+    # Walking back from the last page yields the earlier pages, unchanged
+    back, first = _walk(client, auth_headers, params, 'prev', last['prev_cursor'])
+    assert back == pages[-2::-1]
+    assert first['has_prev'] is False and first['has_next'] is True
+
+def test_cursor_page_after_insert_has_no_duplicates(app, client, auth_headers, expenses):
+    """A row inserted before the cursor position does not shift later pages"""
+    first = client.get('/expenses?cursor=&per_page=5', headers=auth_headers).get_json()
+    with app.app_context():
+        db.session.add(Expense(description='Nuevo', date=datetime.date(2025, 2, 1), amount=50, currency='COP',
+                               category='Oficina', payment_method='Transferencia'))
+        db.session.commit()
+
+    second = client.get(f"/expenses?cursor={first['pagination']['next_cursor']}&per_page=5",
+                        headers=auth_headers).get_json()
+    expected = [row[0] for row in sorted(expenses, key=lambda row: (row[1], row[0]), reverse=True)]
+    assert [item['id'] for item in first['data'] + second['data']] == expected[:10]
+
+def test_invalid_cursor_is_rejected(client, auth_headers, expenses):
+    response = client.get('/expenses?cursor=not-a-cursor', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
@@ -0,0 +1,54 @@
+import datetime
+import pytest
+from sqlalchemy import Column, Date, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from utils.periods import GRANULARITIES, period_start, period_start_expr
+
+metadata = MetaData()
+entries = Table('entries', metadata, Column('id', Integer, primary_key=True), Column('date', Date))
+
+def _dates():
+    """First, middle and last day of every month over two years, including a leap day"""
+    dates = []
+    for year in (2023, 2024):
+        for month in range(1, 13):
+            first = datetime.date(year, month, 1)
+            following = datetime.date(year + month // 12, month % 12 + 1, 1)
+            dates += [first, first.replace(day=15), following - datetime.timedelta(days=1)]
+    return dates
+
+@pytest.fixture(scope='module')
+def connection():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(entries), [{'date': value} for value in _dates()])
+        yield connection
+
+@pytest.mark.parametrize('granularity', GRANULARITIES)
+def test_period_start_expr_matches_period_start_on_sqlite(connection, granularity):
+    """SQL bucketing agrees with period_start() for every row"""
+    rows = connection.execute(
+        select(entries.c.date, period_start_expr(entries.c.date, granularity)).order_by(entries.c.id)
+    ).all()
+
+    assert len(rows) == len(_dates())
+    for value, start in rows:
+        assert start == period_start(value, granularity), value
+
+@pytest.mark.parametrize('granularity', GRANULARITIES)
+def test_period_start_expr_groups_like_period_start(connection, granularity):
+    """Grouping by the expression yields one bucket per period_start() value"""
+    expr = period_start_expr(entries.c.date, granularity)
+    rows = connection.execute(select(expr).group_by(expr).order_by(expr)).scalars().all()
+
+    assert rows == sorted({period_start(value, granularity) for value in _dates()})
+
+def test_period_start_expr_compiles_to_date_trunc_on_postgresql():
+    expr = period_start_expr(entries.c.date, 'quarter')
+    sql = str(expr.compile(dialect=postgresql.dialect()))
+    assert sql == "CAST(date_trunc('quarter', entries.date) AS DATE)"
+
+def test_period_start_expr_rejects_unknown_granularity():
+    with pytest.raises(ValueError):
+        period_start_expr(entries.c.date, 'week')
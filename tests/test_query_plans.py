@@ -0,0 +1,120 @@
+import pytest
+import random
+import datetime
+from sqlalchemy import and_, text
+from app import db
+from models.payment import Payment, PaymentStatus, PaymentType, Currency
+from models.expense import Expense, AccruedExpense, AccruedExpenseStatus
+from models.income import Income
+from models.document import Document, DocumentType, EntityType
+
+ROWS = 20000
+
+@pytest.fixture
+def large_data(app):
+    """Insert synthetic rows in bulk and refresh the planner statistics"""
+    random.seed(1)
+    today = datetime.date.today()
+
+    def day():
+        return today + datetime.timedelta(days=random.randint(-900, 900))
+
+    with app.app_context():
+        project_id = db.session.execute(text('SELECT id FROM projects LIMIT 1')).scalar()
+        client_id = db.session.execute(text('SELECT id FROM clients LIMIT 1')).scalar()
+
+        db.session.execute(Payment.__table__.insert(), [{
+            'project_id': project_id, 'client_id': client_id, 'amount': 100, 'currency': Currency.COP,
+            'date': day(), 'status': random.choice(list(PaymentStatus)),
+            'type': PaymentType.RECURRENTE
+        } for _ in range(ROWS)])
+        db.session.execute(Expense.__table__.insert(), [{
+            'description': f'Gasto {i}', 'date': day(), 'amount': 100, 'currency': 'COP',
+            'category': random.choice(['Oficina', 'Nómina', 'Servicios', 'Software']),
+            'payment_method': 'Transferencia'
+        } for i in range(ROWS)])
+        db.session.execute(Income.__table__.insert(), [{
+            'description': f'Ingreso {i}', 'date': day(), 'amount': 100, 'currency': 'COP',
+            'type': random.choice(['Cliente', 'Aporte de socio']), 'client': f'Cliente {i % 50}',
+            'payment_method': 'Transferencia'
+        } for i in range(ROWS)])
+        db.session.execute(AccruedExpense.__table__.insert(), [{
+            'description': f'Causado {i}', 'due_date': day(), 'amount': 100, 'currency': 'COP',
+            'category': 'Oficina', 'payment_method': 'Transferencia',
+            'status': random.choice(list(AccruedExpenseStatus)), 'is_recurring': False
+        } for i in range(ROWS)])
+        db.session.execute(Document.__table__.insert(), [{
+            'entity_type': random.choice(list(EntityType)), 'entity_id': i % 500,
+            'name': f'Documento {i}', 'type': DocumentType.OTRO, 'file_path': f'/tmp/{i}'
+        } for i in range(ROWS)])
+        db.session.commit()
+
+        db.session.execute(text('ANALYZE'))
+        yield app
+
+def _plan(query):
+    """Get the plan of an ORM query as text"""
+    bind = db.session.get_bind()
+    statement = query.statement.compile(bind, compile_kwargs={'literal_binds': True})
+
+    if bind.dialect.name == 'postgresql':
+        rows = db.session.execute(text(f'EXPLAIN {statement}')).all()
+        return '\n'.join(row[0] for row in rows)
+
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return '\n'.join(row[-1] for row in rows)
+
+def _assert_no_sequential_scan(plan, table):
+    if 'Seq Scan' in plan or f'SCAN {table}\n' in plan + '\n':
+        pytest.fail(f'Sequential scan on {table}:\n{plan}')
+
+def _queries():
+    """The filtered list and report queries, built lazily because they need an app context"""
+    today = datetime.date.today()
+    month_ago = today - datetime.timedelta(days=30)
+    return [
+        pytest.param('payments', lambda: Payment.query.filter(
+            and_(Payment.date < today, Payment.status != PaymentStatus.PAGADO)).order_by(Payment.date),
+            id='payments-overdue'),
+        pytest.param('payments', lambda: Payment.query.filter(
+            Payment.date >= today, Payment.date <= today + datetime.timedelta(days=30),
+            Payment.status != PaymentStatus.PAGADO).order_by(Payment.date),
+            id='payments-upcoming'),
+        pytest.param('payments', lambda: Payment.query.filter(
+            Payment.status == PaymentStatus.PENDIENTE).order_by(Payment.date),
+            id='payments-by-status'),
+        pytest.param('payments', lambda: Payment.query.filter(Payment.client_id == 1).order_by(Payment.date),
+                     id='payments-by-client'),
+        pytest.param('payments', lambda: Payment.query.filter(Payment.project_id == 1).order_by(Payment.date),
+                     id='payments-by-project'),
+        pytest.param('expenses', lambda: Expense.query.filter(Expense.date >= month_ago).order_by(Expense.date.desc()),
+                     id='expenses-recent'),
+        pytest.param('expenses', lambda: Expense.query.filter(Expense.category == 'Oficina', Expense.date >= month_ago),
+                     id='expenses-by-category'),
+        pytest.param('incomes', lambda: Income.query.filter(Income.date >= month_ago, Income.date <= today),
+                     id='incomes-by-date'),
+        pytest.param('incomes', lambda: Income.query.filter(Income.type == 'Cliente', Income.date >= month_ago),
+                     id='incomes-by-type'),
+        pytest.param('incomes', lambda: Income.query.filter(Income.client == 'Cliente 7'),
+                     id='incomes-by-client'),
+        pytest.param('accrued_expenses', lambda: AccruedExpense.query.filter(
+            AccruedExpense.due_date < today,
+            AccruedExpense.status == AccruedExpenseStatus.PENDIENTE).order_by(AccruedExpense.due_date),
+            id='accrued-expenses-overdue'),
+        pytest.param('documents', lambda: Document.query.filter(
+            Document.entity_type == EntityType.CLIENT, Document.entity_id == 7),
+            id='documents-by-entity'),
+    ]
+
+@pytest.mark.parametrize('table, build_query', _queries())
+def test_main_queries_use_indexes(large_data, table, build_query):
+    """
+    Test that the filtered list and report queries do not fall back to sequential scans
+
+    The suite runs on SQLite (see conftest.py), so these are SQLite plans.
+    PostgreSQL plans, and the indexes only created there such as the GIN
+    search index, are not covered; _plan() reads them with EXPLAIN when the
+    app is pointed at PostgreSQL.
+    """
+    with large_data.app_context():
+        _assert_no_sequential_scan(_plan(build_query()), table)
@@ -0,0 +1,43 @@
+from app import db
+from utils.data_versions import bump_version
+from utils.report_cache import ReportCache, report_cache
+
+def test_cached_values_are_copies():
+    """Modifying a stored or returned result does not change the cached entry"""
+    cache = ReportCache()
+    result = {'data': {'periods': [{'label': 'Ene 2025', 'net': 10}]}}
+    cache.set('key', result)
+
+    result['data']['periods'][0]['net'] = 99
+    served = cache.get('key')
+    assert served == {'data': {'periods': [{'label': 'Ene 2025', 'net': 10}]}}
+
+    served['data']['periods'].append({'label': 'Feb 2025', 'net': 5})
+    assert cache.get('key') == {'data': {'periods': [{'label': 'Ene 2025', 'net': 10}]}}
+
+def test_bump_version_invalidates_cached_report(app, client, auth_headers):
+    """A write to a table the report reads makes the cached result unreachable"""
+    report_cache.clear()
+    before = report_cache.stats()
+
+    first = client.get('/reports/cash-flow', headers=auth_headers)
+    assert first.status_code == 200
+    assert client.get('/reports/cash-flow', headers=auth_headers).get_json() == first.get_json()
+    stats = report_cache.stats()
+    assert stats['misses'] - before['misses'] == 1
+    assert stats['hits'] - before['hits'] == 1
+
+    # A table the report does not read leaves the entry valid
+    with app.app_context():
+        bump_version('clients')
+        db.session.commit()
+    client.get('/reports/cash-flow', headers=auth_headers)
+    assert report_cache.stats()['hits'] - before['hits'] == 2
+
+    with app.app_context():
+        bump_version('incomes')
+        db.session.commit()
+    assert client.get('/reports/cash-flow', headers=auth_headers).status_code == 200
+    stats = report_cache.stats()
+    assert stats['misses'] - before['misses'] == 2
+    assert stats['hits'] - before['hits'] == 2
@@ -0,0 +1,71 @@
+import datetime
+import time
+from app import db
+from models.report_job import ReportJob, ReportJobStatus
+from utils.report_jobs import recover_jobs
+
+def _wait_for_job(client, auth_headers, job_id, timeout=10):
+    """Poll a job until the worker pool has finished it"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/reports/jobs/{job_id}', headers=auth_headers).get_json()['data']
+        if job['status'] in ('completado', 'fallido') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_job_completes_with_report_result(client, auth_headers):
+    """A queued job runs the report with its params and stores the same result as the endpoint"""
+    response = client.post('/reports/jobs', json={'report': 'cash-flow', 'params': {'months': 6, 'currency': 'USD'}},
+                           headers=auth_headers)
+    assert response.status_code == 202
+    job = response.get_json()['data']
+    assert job['status'] == 'pendiente'
+    assert job['params'] == {'months': '6', 'currency': 'USD'}
+
+    job = _wait_for_job(client, auth_headers, job['id'])
+    assert job['status'] == 'completado'
+    assert job['error'] is None
+    assert job['started_at'] and job['finished_at']
+
+    report = client.get('/reports/cash-flow?months=6&currency=USD', headers=auth_headers).get_json()
+    assert job['result'] == report
+
+def test_job_fails_with_report_error(client, auth_headers):
+    """A report that returns an error marks its job as failed"""
+    response = client.post('/reports/jobs', json={'report': 'profitability', 'params': {'period': 'week'}},
+                           headers=auth_headers)
+    assert response.status_code == 202
+
+    job = _wait_for_job(client, auth_headers, response.get_json()['data']['id'])
+    assert job['status'] == 'fallido'
+    assert job['error'] == 'Invalid period. Use month, quarter, or year'
+    assert job['result'] is None
+
+def test_job_rejects_unknown_report(client, auth_headers):
+    response = client.post('/reports/jobs', json={'report': 'dashboard'}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_recover_jobs_fails_interrupted_jobs_only(app):
+    """Jobs older than REPORT_JOB_TIMEOUT are failed; recent and finished jobs are left alone"""
+    with app.app_context():
+        now = datetime.datetime.utcnow()
+        timeout = app.config['REPORT_JOB_TIMEOUT']
+        stale_queued = ReportJob(report='cash-flow', created_at=now - timeout - datetime.timedelta(minutes=1))
+        stale_running = ReportJob(report='cash-flow', status=ReportJobStatus.EN_PROCESO,
+                                  created_at=now - timeout * 2, started_at=now - timeout - datetime.timedelta(minutes=1))
+        recent = ReportJob(report='cash-flow', status=ReportJobStatus.EN_PROCESO,
+                           created_at=now - timeout * 2, started_at=now)
+        finished = ReportJob(report='cash-flow', status=ReportJobStatus.COMPLETADO,
+                             created_at=now - timeout * 2, finished_at=now - timeout)
+        db.session.add_all([stale_queued, stale_running, recent, finished])
+        db.session.commit()
+
+        assert recover_jobs(app) == 2
+        db.session.commit()
+        db.session.expire_all()
+
+        assert stale_queued.status == ReportJobStatus.FALLIDO
+        assert stale_running.status == ReportJobStatus.FALLIDO
+        assert stale_running.error == 'The job was interrupted, submit it again'
+        assert recent.status == ReportJobStatus.EN_PROCESO
+        assert finished.status == ReportJobStatus.COMPLETADO
@@ -0,0 +1,125 @@
+import datetime
+from decimal import Decimal
+from app import db
+from models.rollup import PeriodRollup, RollupSource
+from utils.rollups import period_totals, rebuild_rollups
+
+def _rollups():
+    """Non-empty rollup rows keyed by their unique key"""
+    return {
+        (row.source, row.granularity, row.period_start, row.currency.value, row.category, row.has_client):
+            (row.amount, row.row_count)
+        for row in PeriodRollup.query.filter(PeriodRollup.row_count > 0)
+    }
+
+def _month_totals(source):
+    return {(period, currency.value): amount for period, amount, currency in period_totals(source, 'month')}
+
+def _income(**values):
+    data = {
+        'date': '2025-01-10',
+        'description': 'Pago',
+        'amount': 100,
+        'currency': 'USD',
+        'type': 'Cliente',
+        'client': 'Test Client',
+        'payment_method': 'Transferencia'
+    }
+    data.update(values)
+    return data
+
+def _expense(**values):
+    data = {
+        'date': '2025-02-03',
+        'description': 'Arriendo',
+        'amount': 250000,
+        'currency': 'COP',
+        'category': 'Oficina',
+        'payment_method': 'Efectivo'
+    }
+    data.update(values)
+    return data
+
+def test_rollups_follow_income_writes(app, client, auth_headers):
+    """Creating, updating and deleting incomes keeps the rollups in step"""
+    response = client.post('/incomes', json=_income(), headers=auth_headers)
+    assert response.status_code == 201
+    income_id = response.get_json()['data']['id']
+    client.post('/incomes', json=_income(amount=50, client=None), headers=auth_headers)
+
+    with app.app_context():
+        january = datetime.date(2025, 1, 1)
+        assert _month_totals(RollupSource.INCOME) == {(january, 'USD'): Decimal('150.00')}
+        client_only = period_totals(RollupSource.INCOME, 'month', client_only=True)
+        assert [(row[0], row[1]) for row in client_only] == [(january, Decimal('100.00'))]
+
+    # Moving the income to another month and currency moves its rollup
+    response = client.put(f'/incomes/{income_id}', json={'date': '2025-03-15', 'amount': 400000, 'currency': 'COP'},
+                          headers=auth_headers)
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert _month_totals(RollupSource.INCOME) == {
+            (datetime.date(2025, 1, 1), 'USD'): Decimal('50.00'),
+            (datetime.date(2025, 3, 1), 'COP'): Decimal('400000.00')
+        }
+        quarters = {(period, currency.value): amount
+                    for period, amount, currency in period_totals(RollupSource.INCOME, 'quarter')}
+        assert quarters == {
+            (datetime.date(2025, 1, 1), 'USD'): Decimal('50.00'),
+            (datetime.date(2025, 1, 1), 'COP'): Decimal('400000.00')
+        }
+
+    assert client.delete(f'/incomes/{income_id}', headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        assert _month_totals(RollupSource.INCOME) == {(datetime.date(2025, 1, 1), 'USD'): Decimal('50.00')}
+
+def test_rollups_follow_expense_writes(app, client, auth_headers):
+    """Expense writes update the expense rollups only"""
+    response = client.post('/expenses', json=_expense(), headers=auth_headers)
+    assert response.status_code == 201
+    expense_id = response.get_json()['data']['id']
+
+    response = client.put(f'/expenses/{expense_id}', json={'amount': 300000}, headers=auth_headers)
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert _month_totals(RollupSource.EXPENSE) == {(datetime.date(2025, 2, 1), 'COP'): Decimal('300000.00')}
+        assert _month_totals(RollupSource.INCOME) == {}
+
+    assert client.delete(f'/expenses/{expense_id}', headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        assert _month_totals(RollupSource.EXPENSE) == {}
+
+def test_rebuild_matches_incremental_rollups(app, client, auth_headers):
+    """flask rollups rebuild recomputes exactly the incrementally maintained rows"""
+    for day, amount, currency in ((5, 100, 'USD'), (20, 200000, 'COP'), (28, 75, 'USD')):
+        client.post('/incomes', json=_income(date=f'2025-04-{day:02d}', amount=amount, currency=currency),
+                    headers=auth_headers)
+        client.post('/expenses', json=_expense(date=f'2024-12-{day:02d}', amount=amount, currency=currency),
+                    headers=auth_headers)
+    response = client.post('/incomes', json=_income(date='2025-05-01'), headers=auth_headers)
+    client.put(f"/incomes/{response.get_json()['data']['id']}", json={'type': 'Aporte'}, headers=auth_headers)
+
+    with app.app_context():
+        incremental = _rollups()
+        assert incremental
+
+    result = app.test_cli_runner().invoke(args=['rollups', 'rebuild'])
+    assert result.exit_code == 0
+
+    with app.app_context():
+        assert _rollups() == incremental
+
+def test_rebuild_repairs_drift(app):
+    """A rebuild discards rollup rows that no longer match the data"""
+    with app.app_context():
+        db.session.add(PeriodRollup(source=RollupSource.INCOME, granularity='month',
+                                    period_start=datetime.date(2020, 1, 1), currency='USD',
+                                    category='Cliente', has_client=False, amount=999, row_count=1))
+        db.session.commit()
+
+        rebuild_rollups()
+        assert _rollups() == {}
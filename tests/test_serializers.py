@@ -0,0 +1,89 @@
+import pytest
+import datetime
+from decimal import Decimal
+from models import Client, Project
+from models.client import ClientStatus
+from models.project import ProjectStatus
+from models.expense import Expense, AccruedExpense, AccruedExpenseStatus, Currency
+from models.income import Income, Currency as IncomeCurrency
+from models.payment import Payment, PaymentStatus, PaymentType, Currency as PaymentCurrency
+from schemas.client import ClientSchema, ClientListSchema
+from schemas.project import ProjectListSchema
+from schemas.expense import ExpenseListSchema, AccruedExpenseListSchema
+from schemas.income import IncomeListSchema
+from schemas.payment import PaymentListSchema
+from utils.serializers import dump
+
+AMOUNTS = [Decimal('1'), Decimal('0.005'), Decimal('0.015'), Decimal('1234567.899'), 2.675, 10]
+
+def _assert_identical(expected, actual):
+    """Compare values and types, so Decimal('1.00') and 1.0 are not equal"""
+    assert actual == expected
+    assert repr(actual) == repr(expected)
+
+def _objects():
+    today = datetime.date.today()
+    return [
+        (ClientListSchema(many=True), [
+            Client(id=1, name='Cliente', contact_name=None, email='a@b.co', phone=None,
+                   status=ClientStatus.ACTIVO, start_date=today),
+            Client(id=2, name='Otro', status=None, start_date=None)
+        ]),
+        (ProjectListSchema(many=True), [
+            Project(id=3, name='Proyecto', client_id=1, start_date=today, end_date=None,
+                    status=ProjectStatus.ACTIVO)
+        ]),
+        (ExpenseListSchema(many=True), [
+            Expense(id=i, description=f'Gasto {i}', date=today, amount=amount,
+                    currency=Currency.COP, category='Oficina', payment_method='Efectivo')
+            for i, amount in enumerate(AMOUNTS)
+        ]),
+        (AccruedExpenseListSchema(many=True), [
+            AccruedExpense(id=1, description='Arriendo', due_date=today, amount=Decimal('99.999'),
+                           currency=Currency.USD, category='Oficina',
+                           status=AccruedExpenseStatus.PENDIENTE, is_recurring=True),
+            AccruedExpense(id=2, description='Luz', due_date=today, amount=None, currency=None,
+                           category='Servicios', status=None, is_recurring=None)
+        ]),
+        (IncomeListSchema(many=True), [
+            Income(id=i, description='Ingreso', date=today, amount=amount, currency=IncomeCurrency.USD,
+                   type='Cliente', client=None, payment_method='Transferencia')
+            for i, amount in enumerate(AMOUNTS)
+        ]),
+        (PaymentListSchema(many=True), [
+            Payment(id=1, project_id=3, client_id=1, amount=Decimal('4000000'),
+                    currency=PaymentCurrency.COP, date=today, paid_date=None,
+                    status=PaymentStatus.PENDIENTE, type=PaymentType.IMPLEMENTACION)
+        ])
+    ]
+
+@pytest.mark.parametrize('index', range(6))
+def test_list_schemas_match_marshmallow(app, index):
+    """Test that compiled list serializers produce the same output as marshmallow"""
+    with app.app_context():
+        schema, objects = _objects()[index]
+
+        expected = schema.dump(objects)
+        actual = dump(schema, objects)
+
+        assert len(actual) == len(expected)
+        for expected_row, actual_row in zip(expected, actual):
+            assert list(actual_row) == list(expected_row)
+            for key in expected_row:
+                _assert_identical(expected_row[key], actual_row[key])
+
+def test_model_schema_matches_marshmallow(app):
+    """Test that an auto-generated model schema serializes identically"""
+    with app.app_context():
+        client = Client.query.first()
+        schema = ClientSchema()
+
+        assert dump(schema, client) == schema.dump(client)
+
+def test_mappings_fall_back_to_marshmallow(app):
+    """Test that dictionaries are serialized by marshmallow"""
+    with app.app_context():
+        schema = ClientListSchema(many=True)
+        rows = [{'id': 1, 'name': 'Cliente', 'status': ClientStatus.ACTIVO}]
+
+        assert dump(schema, rows) == schema.dump(rows)
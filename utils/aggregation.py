@@ -0,0 +1,330 @@
+import logging
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import Integer, case, cast, extract, func
+from utils.currency import convert_currency, get_exchange_rate
+
+# NumPy is optional: install it to enable the vectorized report engine
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Currencies reported in the per-currency series
+CURRENCIES = ('COP', 'USD')
+
+def use_numpy():
+    """
+    Check whether report calculations should use the NumPy engine.
+    Controlled by the ``REPORT_ENGINE`` setting: 'numpy', 'python', or
+    'auto' (default, NumPy when it is installed).
+
+    Returns:
+        bool: True if the NumPy engine is selected and available
+    """
+    engine = current_app.config.get('REPORT_ENGINE', 'auto').lower()
+    if engine == 'python':
+        return False
+    if engine == 'numpy' and np is None:
+        logging.warning("REPORT_ENGINE=numpy but NumPy is not installed, using the Python engine")
+    return np is not None
+
+def month_ordinal(column):
+    """
+    SQL expression numbering the month of a date column (``year * 12 + month - 1``),
+    so consecutive months get consecutive integers
+
+    Args:
+        column: Date column or expression
+
+    Returns:
+        ColumnElement: Integer month number
+    """
+    return cast(extract('year', column), Integer) * 12 + cast(extract('month', column), Integer) - 1
+
+def currency_code(column):
+    """
+    SQL expression for the position of a currency column's value in ``CURRENCIES``
+
+    Args:
+        column: Currency enum column
+
+    Returns:
+        ColumnElement: 0 for COP, 1 for USD
+    """
+    return case(*[(column == currency, code) for code, currency in enumerate(CURRENCIES)], else_=-1)
+
+def _conversion_rates(currency):
+    # Rate from each currency of CURRENCIES to ``currency``; pending amounts
+    # in ``currency`` itself do not exist, so they get 0
+    return [0.0 if source == currency else get_exchange_rate(source, currency) for source in CURRENCIES]
+
+def _as_array(rows, width):
+    # One float array for the whole result set, converted by NumPy rather than row by row
+    return np.array(rows, dtype=np.float64).reshape(-1, width)
+
+def _sums(rows, size, groups, currency):
+    """Shared by :func:`index_sums` and :func:`grouped_sums`, with a group column first when ``groups`` is given"""
+    offset = 0 if groups is None else 1
+    group_count = 1 if groups is None else len(groups)
+    currencies = CURRENCIES if currency is None else (currency,)
+    if not rows:
+        return [{name: [0.0] * size for name in currencies} for _ in range(group_count)]
+    if currency is not None and len(rows[0]) < offset + 6:
+        raise ValueError('Converting to a currency needs the normalized amount columns')
+
+    if use_numpy():
+        data = _as_array(rows, len(rows[0]))
+        index = data[:, offset].astype(np.int64)
+        codes = data[:, offset + 1].astype(np.int64)
+        if groups is not None:
+            index = np.searchsorted(np.asarray(groups), data[:, 0]) * size + index
+
+        if currency is None:
+            series = {name: np.bincount(index[codes == code], weights=data[codes == code, offset + 2],
+                                        minlength=group_count * size)
+                      for code, name in enumerate(CURRENCIES)}
+        else:
+            # Normalized amount in the target currency plus the pending amounts at the current rate
+            normalized = offset + 3 + CURRENCIES.index(currency)
+            values = (data[:, normalized] + data[:, offset + 5] * np.asarray(_conversion_rates(currency))[codes])
+            series = {currency: np.bincount(index, weights=values, minlength=group_count * size)}
+        return [{name: values[position * size:(position + 1) * size].tolist() for name, values in series.items()}
+                for position in range(group_count)]
+
+    positions = {group: position for position, group in enumerate(groups)} if groups is not None else None
+    rates = _conversion_rates(currency) if currency is not None else None
+    normalized = offset + 3 + CURRENCIES.index(currency) if currency is not None else None
+    sums = [{name: [0.0] * size for name in currencies} for _ in range(group_count)]
+    for row in rows:
+        position = positions[row[0]] if positions is not None else 0
+        index, code, amount = int(row[offset]), int(row[offset + 1]), float(row[offset + 2])
+        if currency is None:
+            sums[position][CURRENCIES[code]][index] += amount
+        else:
+            pending = float(row[offset + 5]) * rates[code]
+            sums[position][currency][index] += float(row[normalized]) + pending
+    return sums
+
+def index_sums(rows, size, currency=None):
+    """
+    Sum aggregated amounts into dense per-currency series
+
+    Rows are ``(index, currency code, amount)`` tuples, e.g. from
+    :func:`month_ordinal` and :func:`currency_code` columns, followed by the
+    ``amount_cop``, ``amount_usd`` and ``pending_amount`` sums of
+    :func:`utils.fx.normalized_sums` when converting. Converted amounts are
+    the normalized amounts plus the pending amounts at the current rate.
+
+    Args:
+        rows (list): Query rows; indexes must be in ``range(size)``
+        size (int): Length of each series
+        currency (str): Sum every currency in this one ('COP' or 'USD')
+
+    Returns:
+        dict: Currency code -> list of ``size`` floats; only ``currency`` when given
+    """
+    return _sums(rows, size, None, currency)[0]
+
+def grouped_sums(rows, groups, size, currency=None):
+    """
+    Sum aggregated amounts into dense per-currency series for each group,
+    like :func:`index_sums` with a group key (e.g. a client id) before the index
+
+    Args:
+        rows (list): Query rows ``(group, index, currency code, amount, ...)``
+        groups (list): Sorted group keys; every row's group must be one of them
+        size (int): Length of each series
+        currency (str): Sum every currency in this one ('COP' or 'USD')
+
+    Returns:
+        dict: Group key -> currency code -> list of ``size`` floats
+    """
+    if not groups:
+        return {}
+    return dict(zip(groups, _sums(rows, size, list(groups), currency)))
+
+def monthly_sums(query, date_column, amount_column, currency_column, start, months):
+    """
+    Sum amounts per month and currency, reading only the month number,
+    currency code and amount of each row matched by a query
+
+    Args:
+        query: Filtered SQLAlchemy query; its columns and ordering are replaced
+        date_column: Date column to bucket by
+        amount_column: Amount column
+        currency_column: Currency column
+        start (date): Any date in the first month
+        months (int): Number of months to include; other rows are skipped
+
+    Returns:
+        dict: Currency code -> list of ``months`` floats, oldest month first
+    """
+    first = start.year * 12 + start.month - 1
+    index = month_ordinal(date_column) - first
+    rows = query.order_by(None).with_entities(
+        index,
+        currency_code(currency_column),
+        amount_column
+    ).filter(
+        index >= 0,
+        index < months
+    ).all()
+    return index_sums(rows, months)
+
+def subtract(left, right):
+    """
+    Subtract two per-currency series element-wise
+
+    Args:
+        left (dict): Currency code -> list of floats
+        right (dict): Currency code -> list of floats
+
+    Returns:
+        dict: Currency code -> list of ``left - right`` floats
+    """
+    if use_numpy():
+        return {currency: (np.asarray(left[currency]) - np.asarray(right[currency])).tolist()
+                for currency in left}
+    return {currency: [a - b for a, b in zip(left[currency], right[currency])]
+            for currency in left}
+
+def to_currency(series, currency, rate):
+    """
+    Fold a per-currency series into a single currency
+
+    Args:
+        series (dict): Currency code -> list of floats (COP and USD)
+        currency (str): Target currency code
+        rate (float): Exchange rate from the other currency to ``currency``
+
+    Returns:
+        dict: ``{currency: list of floats}``
+    """
+    source = 'USD' if currency == 'COP' else 'COP'
+    if use_numpy():
+        return {currency: (np.asarray(series[currency]) + np.asarray(series[source]) * rate).tolist()}
+    return {currency: [a + b * rate for a, b in zip(series[currency], series[source])]}
+
+def running_total(series):
+    """
+    Cumulative sum of each currency in a per-currency series
+
+    Args:
+        series (dict): Currency code -> list of floats
+
+    Returns:
+        dict: Currency code -> list of running totals
+    """
+    if use_numpy():
+        return {currency: np.cumsum(values).tolist() for currency, values in series.items()}
+
+    totals = {}
+    for currency, values in series.items():
+        running, total = [], 0
+        for value in values:
+            total += value
+            running.append(total)
+        totals[currency] = running
+    return totals
+
+def percentages(part, whole):
+    """
+    Element-wise ``part / whole * 100`` of two series, 0 where ``whole`` is not positive
+
+    Args:
+        part (list): Floats
+        whole (list): Floats
+
+    Returns:
+        list: Percentages as floats
+    """
+    if use_numpy():
+        part, whole = np.asarray(part, dtype=np.float64), np.asarray(whole, dtype=np.float64)
+        result = np.zeros_like(whole)
+        np.divide(part * 100, whole, out=result, where=whole > 0)
+        return result.tolist()
+    return [a / b * 100 if b > 0 else 0 for a, b in zip(part, whole)]
+
+def series_values(series, index):
+    """
+    Get one position of every currency in a per-currency series
+
+    Args:
+        series (dict): Currency code -> list of floats
+        index (int): Position, e.g. a month
+
+    Returns:
+        dict: Currency code -> float
+    """
+    return {currency: values[index] for currency, values in series.items()}
+
+def series_totals(series):
+    """
+    Sum each currency of a per-currency series
+
+    Args:
+        series (dict): Currency code -> list of floats
+
+    Returns:
+        dict: Currency code -> total as float
+    """
+    if use_numpy():
+        return {currency: float(np.sum(values)) for currency, values in series.items()}
+    return {currency: float(sum(values)) for currency, values in series.items()}
+
+def currency_totals(query, model):
+    """
+    Sum the amounts of the rows matched by a query, per currency, in one
+    ``SUM ... GROUP BY currency`` statement built from the query's filters
+
+    Args:
+        query: Filtered SQLAlchemy query on ``model``; its ordering is ignored
+        model: Model class with ``amount`` and ``currency`` columns
+
+    Returns:
+        dict: Currency code -> total as float, e.g. ``{'COP': 0, 'USD': 150.0}``
+    """
+    rows = query.order_by(None).with_entities(
+        model.currency,
+        func.sum(model.amount)
+    ).group_by(model.currency).all()
+
+    totals = {currency: 0 for currency in CURRENCIES}
+    for currency, amount in rows:
+        totals[currency.value] = float(amount or 0)
+    return totals
+
+def sum_by_currency(rows):
+    """
+    Sum the amounts of rows already loaded, per currency; the in-memory
+    counterpart of :func:`currency_totals` for endpoints that return every row
+
+    Args:
+        rows (list): Objects with ``amount`` and ``currency`` attributes
+
+    Returns:
+        dict: Currency code -> total as float, e.g. ``{'COP': 0, 'USD': 150.0}``
+    """
+    sums = {currency: Decimal(0) for currency in CURRENCIES}
+    for row in rows:
+        if row.amount is not None:
+            sums[row.currency.value] += row.amount
+    return {currency: float(amount) for currency, amount in sums.items()}
+
+def convert_totals(totals, target_currency=None):
+    """
+    Express per-currency totals in a target currency
+
+    Args:
+        totals (dict): Currency code -> total, as returned by :func:`currency_totals`
+        target_currency (str): 'COP', 'USD' or None to keep the per-currency totals
+
+    Returns:
+        float | dict: The combined total, or ``totals`` when no target is given
+    """
+    if target_currency == 'COP':
+        return totals['COP'] + convert_currency(totals['USD'], 'USD', 'COP')
+    elif target_currency == 'USD':
+        return totals['USD'] + convert_currency(totals['COP'], 'COP', 'USD')
+    return totals
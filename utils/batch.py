@@ -0,0 +1,63 @@
+from utils.projection import project_query
+from utils.serializers import dump
+
+# Largest batch served by one request, like the per_page limit of lists
+MAX_BATCH_IDS = 100
+
+def parse_ids(value):
+    """
+    Parse an ``ids=`` query parameter, keeping the requested order
+
+    Args:
+        value (str): Comma-separated ids, e.g. ``1,2,3``
+
+    Returns:
+        list: Unique integer ids
+
+    Raises:
+        ValueError: If an id is not an integer or there are too many ids
+    """
+    ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            item_id = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid id: {part}")
+        if item_id not in ids:
+            ids.append(item_id)
+
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} ids can be requested at once")
+    return ids
+
+def fetch_by_ids(query, model, ids, schema):
+    """
+    Load and serialize several rows with a single ``IN`` query, e.g. for
+    ``GET /payments?ids=1,2,3``
+
+    Args:
+        query: Base SQLAlchemy query for ``model``
+        model: Model class with an integer ``id`` primary key
+        ids (str): Comma-separated ids
+        schema: Marshmallow schema used to serialize each row (``many=True``)
+
+    Returns:
+        dict: ``{"data": [...], "missing": [...]}`` with the rows in the
+        requested order and the ids that were not found
+
+    Raises:
+        ValueError: If ``ids`` is invalid, see :func:`parse_ids`
+    """
+    ids = parse_ids(ids)
+    rows = {}
+    if ids:
+        query = project_query(query.filter(model.id.in_(ids)), model, schema)
+        rows = {row.id: row for row in query}
+
+    return {
+        'data': dump(schema, [rows[item_id] for item_id in ids if item_id in rows], many=True),
+        'missing': [item_id for item_id in ids if item_id not in rows]
+    }
@@ -0,0 +1,55 @@
+from dateutil.relativedelta import relativedelta
+
+def month_label(value):
+    """
+    Get the month key for a date
+
+    Args:
+        value (date): The date to bucket
+
+    Returns:
+        str: The month key in YYYY-MM format
+    """
+    return f"{value.year}-{value.month:02d}"
+
+def month_labels(start, months):
+    """
+    Get consecutive month keys starting at the month of a date
+
+    Args:
+        start (date): Any date in the first month
+        months (int): Number of months to include
+
+    Returns:
+        list: Month keys in YYYY-MM format, oldest first
+    """
+    first = start.replace(day=1)
+    return [month_label(first + relativedelta(months=i)) for i in range(months)]
+
+def bucket_by_month(rows, date_key, labels=None):
+    """
+    Group rows by month in a single pass over the rows
+
+    Args:
+        rows (iterable): Query rows or objects to bucket
+        date_key (str): Name of the date attribute on each row
+        labels (list): Optional month keys to keep; rows falling in other
+            months are skipped. When given, every label is present in the
+            result even if it has no rows.
+
+    Returns:
+        dict: Month key -> list of rows, in ``labels`` order when given
+    """
+    buckets = {label: [] for label in labels} if labels is not None else {}
+
+    for row in rows:
+        value = getattr(row, date_key)
+        label = f"{value.year}-{value.month:02d}"
+        bucket = buckets.get(label)
+        if bucket is None:
+            if labels is not None:
+                continue
+            bucket = buckets[label] = []
+        bucket.append(row)
+
+    return buckets
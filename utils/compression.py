@@ -0,0 +1,109 @@
+import zlib
+from flask import request
+
+# Supported content codings -> zlib window bits (gzip header, or zlib format for HTTP "deflate")
+ENCODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+
+# Defaults used when the app config does not set them
+DEFAULT_MIN_SIZE = 1024  # bytes
+DEFAULT_LEVEL = 6
+DEFAULT_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+# Uncompressed bytes after which a streamed response is flushed to the client
+STREAM_FLUSH_SIZE = 64 * 1024
+
+def etag_candidates(etag):
+    """
+    Get the tags a client may hold for a representation: the ETag itself and
+    its compressed variants, e.g. ``abc``, ``abc-gzip`` and ``abc-deflate``
+    """
+    return [etag] + [f"{etag}-{coding}" for coding in ENCODINGS]
+
+def _compressor(coding, level):
+    return zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[coding])
+
+def _compress_stream(chunks, coding, level):
+    compressor = _compressor(coding, level)
+    pending = 0
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_SIZE:
+                # Bound the latency of slow exports without flushing every small row
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+            if data:
+                yield data
+
+        yield compressor.flush()
+    finally:
+        # Release the wrapped stream (and its request context) like the WSGI server would
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def _negotiate():
+    # best_match honours q-values, so "gzip;q=0" refuses gzip
+    return request.accept_encodings.best_match(list(ENCODINGS))
+
+def _set_encoded_etag(response, coding):
+    # A strong ETag identifies the exact bytes, so each coding needs its own tag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{coding}")
+
+def init_compression(app):
+    """
+    Compress responses with gzip or deflate, as negotiated from ``Accept-Encoding``.
+
+    JSON, NDJSON and CSV responses of at least ``COMPRESS_MIN_SIZE`` bytes are
+    compressed at ``COMPRESS_LEVEL``; streamed exports are compressed chunk by
+    chunk as they are produced. Strong ETags get a ``-gzip``/``-deflate``
+    suffix, and compressible responses carry ``Vary: Accept-Encoding``.
+
+    Args:
+        app: Flask application
+    """
+    @app.after_request
+    def compress_response(response):
+        mimetypes = app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        if response.mimetype not in mimetypes:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        coding = _negotiate()
+
+        if response.status_code == 304:
+            # Hand back the tag the client holds, which names the encoded variant
+            etag, weak = response.get_etag()
+            if etag and not weak and coding and request.if_none_match.contains(f"{etag}-{coding}"):
+                _set_encoded_etag(response, coding)
+            return response
+
+        if (not coding
+                or response.status_code < 200 or response.status_code in (204, 206)
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        level = app.config.get('COMPRESS_LEVEL', DEFAULT_LEVEL)
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, coding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+                return response
+            compressor = _compressor(coding, level)
+            response.set_data(compressor.compress(data) + compressor.flush())
+
+        response.headers['Content-Encoding'] = coding
+        _set_encoded_etag(response, coding)
+        return response
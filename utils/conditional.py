@@ -0,0 +1,101 @@
+import hashlib
+import datetime
+from functools import wraps
+from flask import after_this_request, make_response, request
+from sqlalchemy import func, select
+from app import db
+from utils.compression import etag_candidates
+from utils.data_versions import get_last_modified, get_versions
+
+def _etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def _query_args():
+    # Parameter order does not change the response
+    return tuple(sorted(request.args.items(multi=True)))
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        # Compressed responses carry the ETag with an encoding suffix
+        return any(request.if_none_match.contains(tag) for tag in etag_candidates(etag))
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def _conditional(f, validators):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        result = validators(*args, **kwargs)
+        if result is None:
+            return f(*args, **kwargs)
+        etag, last_modified = result
+
+        def add_validators(response):
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if last_modified:
+                    response.last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+                # Authenticated data: browsers may keep it, but must revalidate
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            return response
+
+        if _not_modified(etag, last_modified):
+            return add_validators(make_response('', 304))
+
+        # Headers are added once the resource's response is built
+        after_this_request(add_validators)
+        return f(*args, **kwargs)
+    return wrapper
+
+def conditional_tables(tables):
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` for a list or report ``get``
+    with ``304`` before any query or serialization runs.
+
+    The ETag combines the endpoint, the query parameters, the current date and
+    the data versions of ``tables``; ``Last-Modified`` is the latest write to
+    any of them. Only tables whose writes call ``bump_version`` can be used.
+
+    Args:
+        tables (tuple): Names of the tables the response reads
+    """
+    def decorator(f):
+        def validators(*args, **kwargs):
+            etag = _etag(request.endpoint, kwargs, _query_args(), datetime.date.today(),
+                         get_versions(*tables))
+            return etag, get_last_modified(*tables)
+        return _conditional(f, validators)
+    return decorator
+
+def conditional_row(model, *related):
+    """
+    Answer conditional requests for a detail ``get`` from the row's
+    ``updated_at``, read with a single primary-key query.
+
+    Args:
+        model: Model class with ``id`` and ``updated_at`` columns
+        *related: ``(Model, foreign_key_attribute)`` pairs serialized with the
+            row, e.g. ``(PaymentPlan, 'project_id')``; their ``updated_at``
+            counts too
+    """
+    def decorator(f):
+        def validators(*args, **kwargs):
+            row_id = kwargs.get('id')
+            columns = [model.updated_at] + [
+                select(func.max(other.updated_at)).where(
+                    getattr(other, foreign_key) == model.id
+                ).scalar_subquery()
+                for other, foreign_key in related
+            ]
+            row = db.session.execute(select(*columns).where(model.id == row_id)).first()
+            if row is None:
+                # Not found: let the resource answer
+                return None
+
+            timestamps = [value for value in row if value is not None]
+            etag = _etag(request.endpoint, row_id, _query_args(), *[value.isoformat() for value in timestamps])
+            return etag, max(timestamps)
+        return _conditional(f, validators)
+    return decorator
@@ -0,0 +1,129 @@
+import csv
+import codecs
+import logging
+from decimal import InvalidOperation
+from marshmallow import ValidationError, missing
+from app import db
+from utils.data_versions import bump_version
+from utils.fx import normalized_amounts
+
+# Errors caused by a bad value in the file; anything else is a bug and is raised
+DATA_ERRORS = (ValueError, InvalidOperation)
+
+# Rows validated and inserted per transaction when the app config does not set it
+DEFAULT_CHUNK_SIZE = 500
+
+def _chunks(reader, size):
+    chunk = []
+    for row in reader:
+        # Blank cells are missing values, so required fields are reported and optional ones stay NULL
+        chunk.append((reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _field_errors(schema, data):
+    messages = {}
+    for name, field in schema.load_fields.items():
+        try:
+            field.deserialize(data.get(name, missing), name, data)
+        except ValidationError as e:
+            messages[name] = e.messages
+        except DATA_ERRORS:
+            messages[name] = ['Invalid value.']
+    return messages or {'_schema': ['Invalid row.']}
+
+def _validate_rows(schema, chunk):
+    rows, errors = [], []
+    for line, data in chunk:
+        try:
+            rows.append((line, schema.load(data, many=False)))
+        except ValidationError as e:
+            errors.append({'row': line, 'errors': e.messages})
+        except DATA_ERRORS:
+            # Some conversions fail with a plain ValueError instead of a ValidationError
+            errors.append({'row': line, 'errors': _field_errors(schema, data)})
+    return rows, errors
+
+def _validate(schema, chunk):
+    """Deserialize a chunk of rows, returning the valid rows and the errors by line"""
+    try:
+        return list(zip([line for line, _ in chunk], schema.load([data for _, data in chunk]))), []
+    except ValidationError as e:
+        rows = [(line, data) for index, ((line, _), data) in enumerate(zip(chunk, e.valid_data))
+                if index not in e.messages]
+        errors = [{'row': chunk[index][0], 'errors': messages} for index, messages in sorted(e.messages.items())]
+        return rows, errors
+    except DATA_ERRORS:
+        return _validate_rows(schema, chunk)
+
+def import_csv(file, model, schema_class, columns, apply_rollups, chunk_size=None):
+    """
+    Import rows from a CSV upload with bulk inserts.
+
+    Each chunk is validated with the model's schema rules, deserialized to
+    plain dictionaries (no ORM instances), inserted with a single
+    ``executemany`` and committed with its rollups and data version. Rows
+    that fail validation are skipped and reported; a chunk that fails to
+    insert is rolled back and reported as a whole.
+
+    Args:
+        file: Uploaded file (``FileStorage``) with a header row
+        model: Model class, e.g. ``Expense``
+        schema_class: Schema class with the validation rules, e.g. ``ExpenseSchema``
+        columns (tuple): Importable columns; other header names are rejected
+        apply_rollups (callable): Adds a list of inserted rows to the period rollups
+        chunk_size (int): Rows per transaction
+
+    Returns:
+        dict: ``{"imported": int, "failed": int, "errors": [{"row": line, "errors": {...}}]}``
+
+    Raises:
+        ValueError: If the file has no header or unknown columns
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    reader = csv.DictReader(codecs.iterdecode(file.stream, 'utf-8-sig'))
+
+    header = reader.fieldnames
+    if not header:
+        raise ValueError('The file is empty')
+    unknown = [name for name in header if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    schema = schema_class(many=True, only=columns, load_instance=False)
+    table = model.__table__
+    blank = dict.fromkeys(header)
+    imported, failed, errors = 0, 0, []
+
+    for chunk in _chunks(reader, chunk_size):
+        try:
+            rows, chunk_errors = _validate(schema, chunk)
+        except Exception:
+            # Not a problem with the file: log it and let it surface as a server error
+            logging.exception(f"Unexpected error validating {table.name} rows {chunk[0][0]}-{chunk[-1][0]}")
+            raise
+        failed += len(chunk_errors)
+        errors += chunk_errors
+        if not rows:
+            continue
+
+        # Core inserts skip the session's flush hook, so normalize the amounts here.
+        # executemany needs the same keys in every row, so blank cells are NULL
+        values = [dict(blank, **data, **normalized_amounts(data['amount'], data['currency'], data['date']))
+                  for _, data in rows]
+        try:
+            db.session.execute(table.insert(), values)
+            apply_rollups(values)
+            bump_version(table.name)
+            db.session.commit()
+            imported += len(values)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error importing {table.name} rows {rows[0][0]}-{rows[-1][0]}: {str(e)}")
+            failed += len(rows)
+            errors.append({'row': rows[0][0], 'to_row': rows[-1][0], 'errors': {'_database': [str(e)]}})
+
+    return {'imported': imported, 'failed': failed, 'errors': errors}
@@ -1,86 +1,369 @@
-import os
+import time
+import queue
 import logging
-import requests
-from datetime import datetime, timedelta
-from functools import lru_cache
+import threading
+from datetime import date, datetime
+from flask import current_app, has_app_context
+from app import db
+from models.exchange_rate import ExchangeRate
+from utils.data_versions import bump_version
+from utils.upsert import upsert
+from utils.rate_providers import create_provider
 
 # Cache exchange rates for 24 hours to avoid excessive API calls
 CACHE_DURATION = 86400  # 24 hours in seconds
 
-@lru_cache(maxsize=32)
-def get_exchange_rate(base_currency='USD', target_currency='COP'):
+# Fallback rates are only reused briefly so a refresh is retried soon after an outage
+FALLBACK_CACHE_DURATION = 300  # 5 minutes
+
+# Currencies supported by conversions; models currently store COP and USD
+SUPPORTED_CURRENCIES = ('COP', 'USD', 'EUR')
+
+# Cross rates are derived through this currency, so only one rate per currency is needed
+PIVOT_CURRENCY = 'USD'
+
+# Approximate rates used when neither the provider nor the rate store has a rate
+FALLBACK_RATES = {
+    'USD-COP': 4000.0,  # Approximate USD to COP rate
+    'COP-USD': 0.00025,  # Approximate COP to USD rate (1/4000)
+    'EUR-USD': 1.08,  # Approximate EUR to USD rate
+    'USD-EUR': 0.925  # Approximate USD to EUR rate (1/1.08)
+}
+
+# In-process cache: (base, target, date) -> (rate, expiry as time.monotonic() or None, dated).
+# Expired entries are kept and served while a refresh is in flight. ``dated`` is
+# False for provisional rates (another date's rate or a fallback) used until the
+# rate for the date itself is known.
+_rates = {}
+_rates_lock = threading.Lock()
+
+def _cached_rate(key):
+    """Get ``(rate, fresh, dated)`` for a cached key, or ``None``"""
+    with _rates_lock:
+        entry = _rates.get(key)
+    if entry is None:
+        return None
+    rate, expires_at, dated = entry
+    return rate, expires_at is None or expires_at > time.monotonic(), dated
+
+def _remember_rate(key, rate, ttl, dated=True):
+    expires_at = time.monotonic() + ttl if ttl is not None else None
+    with _rates_lock:
+        _rates[key] = (rate, expires_at, dated)
+
+class RateRefresher:
+    """
+    Background thread that fetches rates from the configured provider, so
+    requests never wait on the network. Each key is queued at most once.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.provider = create_provider(app.config)
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+        if self.provider is not None:
+            threading.Thread(target=self._run, name='rate-refresher', daemon=True).start()
+
+    def schedule(self, key):
+        if self.provider is None:
+            return
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+        self.queue.put(key)
+
+    def refresh(self, key):
+        """Fetch, store and cache one rate; returns the rate or None"""
+        base_currency, target_currency, on_date = key
+        historical = on_date < date.today()
+
+        rate = self.provider.fetch(base_currency, target_currency, on_date if historical else None)
+        if rate is None:
+            return None
+
+        _remember_rate(key, rate, None if historical else CACHE_DURATION)
+        with self.app.app_context():
+            _store_rate(base_currency, target_currency, on_date, rate)
+
+            # Amounts saved while this rate was unknown were left unnormalized
+            from utils.fx import renormalize_amounts
+            renormalize_amounts((base_currency, target_currency), on_date)
+        return rate
+
+    def _run(self):
+        while True:
+            key = self.queue.get()
+            try:
+                self.refresh(key)
+            except Exception as e:
+                logging.error(f"Error refreshing exchange rate {key}: {str(e)}")
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+
+def init_exchange_rates(app):
+    """
+    Set up the app's background :class:`RateRefresher`; each app gets its own,
+    bound to its config and database
+
+    Args:
+        app: Flask application
+    """
+    app.extensions['rate_refresher'] = RateRefresher(app)
+
+def _get_refresher():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('rate_refresher')
+
+def _schedule_refresh(key):
+    refresher = _get_refresher()
+    if refresher is not None:
+        refresher.schedule(key)
+
+def _stored_rate(base_currency, target_currency, on_date, exact=True):
     """
-    Get the exchange rate between two currencies
-    
+    Look up a rate in the rate store, using the inverse pair if needed.
+    Without ``exact``, the closest earlier date is used.
+
+    Returns:
+        tuple: ``(rate, fetched_at)`` or ``None``
+    """
+    if not has_app_context():
+        return None
+
+    for base, target, invert in ((base_currency, target_currency, False),
+                                 (target_currency, base_currency, True)):
+        query = db.select(ExchangeRate.rate, ExchangeRate.fetched_at).where(
+            ExchangeRate.base_currency == base,
+            ExchangeRate.target_currency == target
+        )
+        if exact:
+            query = query.where(ExchangeRate.rate_date == on_date)
+        else:
+            query = query.where(ExchangeRate.rate_date <= on_date).order_by(ExchangeRate.rate_date.desc())
+
+        row = db.session.execute(query.limit(1)).first()
+        if row and row.rate:
+            rate = float(row.rate)
+            return (1 / rate if invert else rate), row.fetched_at
+
+    return None
+
+def _store_rate(base_currency, target_currency, on_date, rate):
+    """Persist a fetched rate; failures are logged and otherwise ignored"""
+    if not has_app_context():
+        return
+
+    values = {
+        'base_currency': base_currency,
+        'target_currency': target_currency,
+        'rate_date': on_date,
+        'rate': rate,
+        'fetched_at': datetime.utcnow()
+    }
+
+    try:
+        # Runs on the refresher thread, in its own transaction
+        with db.engine.begin() as connection:
+            table = ExchangeRate.__table__
+            upsert(table, values, ['base_currency', 'target_currency', 'rate_date'],
+                   lambda excluded: {'rate': excluded.rate, 'fetched_at': excluded.fetched_at},
+                   connection=connection)
+
+            # Converted reports and totals are cached by data version
+            bump_version('exchange_rates', connection=connection)
+    except Exception as e:
+        logging.error(f"Error storing exchange rate: {str(e)}")
+
+def get_exchange_rate(base_currency='USD', target_currency='COP', on_date=None, dated=False):
+    """
+    Get the exchange rate between two currencies without blocking on the network
+
+    Rates come from the in-process cache, then the rate store (the
+    ``exchange_rates`` table). Missing or stale rates are refreshed by the
+    background :class:`RateRefresher` while the last known rate is served
+    (stale-while-revalidate). Today's rate goes stale after ``CACHE_DURATION``;
+    rates for past dates never expire.
+
+    Until the rate for ``on_date`` is known, a provisional rate is served: the
+    closest earlier stored rate, today's rate or an approximate fallback. Pass
+    ``dated`` to get ``None`` instead, e.g. before persisting a converted amount.
+
     Args:
         base_currency (str): The base currency code (default: USD)
         target_currency (str): The target currency code (default: COP)
-        
+        on_date (date): Date of the rate; defaults to today. Future dates use today's rate.
+        dated (bool): Only return the rate for ``on_date`` itself, never a provisional one
+
     Returns:
-        float: The exchange rate or default value on error
+        float: The exchange rate or default value on error; ``None`` with
+        ``dated`` if the rate for the date is not known yet
     """
     # If same currency, return 1.0
     if base_currency == target_currency:
         return 1.0
-    
-    # Handle common combinations with fallback rates if API fails
-    fallback_rates = {
-        'USD-COP': 4000.0,  # Approximate USD to COP rate
-        'COP-USD': 0.00025  # Approximate COP to USD rate (1/4000)
-    }
-    
-    # Create key for rate lookup
-    rate_key = f"{base_currency}-{target_currency}"
-    
-    try:
-        # Try to get exchange rate from API - use ExchangeRate-API
-        api_key = os.environ.get("EXCHANGE_RATE_API_KEY")
-        
-        if api_key:
-            # Use Exchange Rate API with your API key
-            url = f"https://v6.exchangerate-api.com/v6/{api_key}/pair/{base_currency}/{target_currency}"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('result') == 'success':
-                    return data.get('conversion_rate', fallback_rates.get(rate_key, 1.0))
-            
-            # If we get here, API call failed, log and fall back
-            logging.warning(f"Exchange rate API call failed: {response.status_code}")
+
+    today = date.today()
+    if on_date is None or on_date > today:
+        on_date = today
+    historical = on_date < today
+
+    key = (base_currency, target_currency, on_date)
+    cached = _cached_rate(key)
+    if cached is not None and (cached[2] or not dated):
+        rate, fresh, _ = cached
+        if not fresh:
+            _schedule_refresh(key)
+        return rate
+
+    stored = _stored_rate(base_currency, target_currency, on_date)
+    if stored:
+        rate, fetched_at = stored
+        age = (datetime.utcnow() - fetched_at).total_seconds()
+        if historical or age < CACHE_DURATION:
+            _remember_rate(key, rate, None if historical else CACHE_DURATION - age)
         else:
-            # No API key provided, log and fall back
-            logging.warning("No Exchange Rate API key provided, using fallback rates")
-    
-    except Exception as e:
-        logging.error(f"Error fetching exchange rate: {str(e)}")
-    
-    # Fall back to approximate rates
-    return fallback_rates.get(rate_key, 1.0)
+            # Serve the stale stored rate until the refresh lands
+            _remember_rate(key, rate, 0)
+            _schedule_refresh(key)
+        return rate
+
+    _schedule_refresh(key)
+    if dated:
+        return None
+
+    # Nothing stored yet: use the closest earlier stored rate, then today's
+    # rate for past dates, then the approximate fallback
+    stored = _stored_rate(base_currency, target_currency, on_date, exact=False)
+    if stored:
+        rate = stored[0]
+    elif historical:
+        rate = get_exchange_rate(base_currency, target_currency)
+    else:
+        rate = FALLBACK_RATES.get(f"{base_currency}-{target_currency}", 1.0)
+
+    _remember_rate(key, rate, FALLBACK_CACHE_DURATION, dated=False)
+    return rate
+
+def refresh_exchange_rates(pairs=(('USD', 'COP'), ('EUR', 'USD'))):
+    """
+    Fetch today's rates synchronously, e.g. from the CLI before a backfill
+
+    Args:
+        pairs (tuple): ``(base, target)`` currency pairs to refresh
+
+    Returns:
+        dict: ``'BASE-TARGET'`` -> fetched rate, or None if unavailable
+    """
+    refresher = _get_refresher()
+    today = date.today()
+    return {
+        f"{base}-{target}": refresher.refresh((base, target, today)) if refresher and refresher.provider else None
+        for base, target in pairs
+    }
 
-def convert_currency(amount, from_currency, to_currency):
+def convert_currency(amount, from_currency, to_currency, on_date=None):
     """
     Convert an amount from one currency to another
-    
+
     Args:
         amount (float): The amount to convert
         from_currency (str): Source currency code
         to_currency (str): Target currency code
-        
+        on_date (date): Date of the rate to use; defaults to today
+
     Returns:
         float: The converted amount
     """
     if from_currency == to_currency:
         return amount
-    
+
     # Get exchange rate
-    rate = get_exchange_rate(from_currency, to_currency)
-    
+    rate = get_exchange_rate(from_currency, to_currency, on_date)
+
     # Apply conversion
     return float(amount) * rate
 
+class RateMatrix:
+    """
+    Cross-rate matrix for a set of currencies on one date.
+
+    Built from one rate per currency against ``PIVOT_CURRENCY``, so n
+    currencies need n lookups instead of n * n, and every conversion after
+    that is a plain multiplication.
+    """
+
+    def __init__(self, currencies=SUPPORTED_CURRENCIES, on_date=None):
+        self.currencies = tuple(currencies)
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+
+        to_pivot = [get_exchange_rate(currency, PIVOT_CURRENCY, on_date) for currency in self.currencies]
+        self.rates = [
+            [1.0 if source == target else to_pivot[i] / to_pivot[j]
+             for j, target in enumerate(self.currencies)]
+            for i, source in enumerate(self.currencies)
+        ]
+
+    def rate(self, from_currency, to_currency):
+        """Get the rate from one currency to another"""
+        return self.rates[self.index[from_currency]][self.index[to_currency]]
+
+def rate_matrix(currencies=SUPPORTED_CURRENCIES, on_date=None):
+    """
+    Build a :class:`RateMatrix` for batch conversions
+
+    Args:
+        currencies (tuple): Currency codes to include
+        on_date (date): Date of the rates; defaults to today
+
+    Returns:
+        RateMatrix: The cross-rate matrix
+    """
+    return RateMatrix(currencies, on_date)
+
+def convert_amounts(amounts, to_currency, rates=None, on_date=None):
+    """
+    Convert per-currency amounts to one currency and add them up, e.g.
+    ``{'COP': 400000, 'USD': 50}`` -> ``600000.0`` in COP
+
+    Args:
+        amounts (dict): Currency code -> amount
+        to_currency (str): Target currency code
+        rates (RateMatrix): Rates to use; built for ``on_date`` if omitted
+        on_date (date): Date of the rates when ``rates`` is omitted
+
+    Returns:
+        float: The total in ``to_currency``
+    """
+    rates = rates or rate_matrix(on_date=on_date)
+    return sum((float(amount) * rates.rate(currency, to_currency) for currency, amount in amounts.items()), 0.0)
+
+def convert_batch(amounts, from_currencies, to_currency, rates=None, on_date=None):
+    """
+    Convert a sequence of amounts, each in its own currency, to one currency
+
+    Args:
+        amounts (iterable): Amounts to convert
+        from_currencies (iterable): Currency code of each amount
+        to_currency (str): Target currency code
+        rates (RateMatrix): Rates to use; built for ``on_date`` if omitted
+        on_date (date): Date of the rates when ``rates`` is omitted
+
+    Returns:
+        list: The converted amounts, in input order
+    """
+    rates = rates or rate_matrix(on_date=on_date)
+    column = rates.index[to_currency]
+    factors = {currency: row[column] for currency, row in zip(rates.currencies, rates.rates)}
+    return [float(amount) * factors[currency] for amount, currency in zip(amounts, from_currencies)]
+
 def clear_exchange_rate_cache():
     """
-    Clear the exchange rate cache
+    Clear the in-process exchange rate cache (the rate store is kept)
     """
-    get_exchange_rate.cache_clear()
+    with _rates_lock:
+        _rates.clear()
@@ -0,0 +1,58 @@
+import datetime
+from app import db
+from models.data_version import DataVersion
+from utils.upsert import upsert
+
+def bump_version(*tables, connection=None):
+    """
+    Increment the data version of one or more tables.
+    Must be called before the surrounding ``db.session.commit()`` so the
+    bump is committed (or rolled back) together with the write.
+
+    Args:
+        *tables (str): Table names, e.g. 'payments', 'incomes'
+        connection: Connection to bump on instead of ``db.session``, for writes
+            made in their own transaction (e.g. on a background thread)
+    """
+    now = datetime.datetime.utcnow()
+    table = DataVersion.__table__
+
+    for table_name in tables:
+        upsert(table, {'table_name': table_name, 'version': 1, 'updated_at': now}, ['table_name'],
+               lambda excluded: {'version': table.c.version + 1, 'updated_at': excluded.updated_at},
+               connection=connection)
+
+def get_versions(*tables):
+    """
+    Get the current data version of one or more tables in a single query
+
+    Args:
+        *tables (str): Table names
+
+    Returns:
+        tuple: Versions in the same order as ``tables`` (0 if never bumped)
+    """
+    rows = dict(db.session.query(
+        DataVersion.table_name,
+        DataVersion.version
+    ).filter(
+        DataVersion.table_name.in_(tables)
+    ).all())
+
+    return tuple(rows.get(table_name, 0) for table_name in tables)
+
+def get_last_modified(*tables):
+    """
+    Get the time of the latest write to any of the given tables
+
+    Args:
+        *tables (str): Table names
+
+    Returns:
+        datetime: Latest ``updated_at`` in UTC, or None if never bumped
+    """
+    return db.session.query(
+        db.func.max(DataVersion.updated_at)
+    ).filter(
+        DataVersion.table_name.in_(tables)
+    ).scalar()
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from functools import wraps
+from flask import Response, request, stream_with_context
+from utils.serializers import compile_schema
+
+# Supported values for the ``format`` query parameter
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Rows fetched per round trip when streaming a query
+DEFAULT_BATCH_SIZE = 1000
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def flatten(row, prefix=''):
+    """
+    Flatten nested dictionaries into dotted keys for tabular output,
+    e.g. ``{'income': {'COP': 10}}`` becomes ``{'income.COP': 10}``
+
+    Args:
+        row (dict): The row to flatten
+        prefix (str): Key prefix used for nested values
+
+    Returns:
+        dict: The flattened row
+    """
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+def _csv_lines(rows, fieldnames):
+    buffer = io.StringIO()
+    writer = None
+
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames or list(row),
+                                    restval='', extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if writer is None and fieldnames:
+        # Empty export: still send the header row
+        csv.writer(buffer).writerow(fieldnames)
+        yield buffer.getvalue()
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=_json_default) + '\n'
+
+def stream_export(rows, fmt, filename, fieldnames=None):
+    """
+    Build a streamed CSV or NDJSON response from an iterable of dictionaries.
+    Rows are encoded one at a time, so the full export is never held in memory.
+
+    Args:
+        rows (iterable): Dictionaries to export; may be a generator
+        fmt (str): 'csv' or 'ndjson'
+        filename (str): Download file name without extension
+        fieldnames (list): CSV column order; defaults to the first row's keys
+
+    Returns:
+        Response: A streaming Flask response
+    """
+    lines = _csv_lines(rows, fieldnames) if fmt == 'csv' else _ndjson_lines(rows)
+    return Response(
+        stream_with_context(lines),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'}
+    )
+
+def export_query(query, schema, fmt, filename, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream every row of a query as CSV or NDJSON, serialized with ``schema``.
+    Rows are read from a server-side cursor ``batch_size`` at a time.
+
+    Args:
+        query: SQLAlchemy query object with filters and ordering applied
+        schema: Marshmallow schema used to serialize each row
+        fmt (str): 'csv' or 'ndjson'
+        filename (str): Download file name without extension
+        batch_size (int): Rows fetched per round trip
+
+    Returns:
+        Response: A streaming Flask response
+    """
+    serialize = compile_schema(schema)
+    rows = (
+        serialize(item)
+        for item in query.execution_options(stream_results=True).yield_per(batch_size)
+    )
+    return stream_export(rows, fmt, filename, list(schema.fields))
+
+def export_format():
+    """
+    Get the requested export format from the query string
+
+    Returns:
+        str: 'csv', 'ndjson' or None for a regular JSON response
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = request.args.get('format')
+    if not fmt or fmt == 'json':
+        return None
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format. Use {', '.join(EXPORT_FORMATS)} or json")
+    return fmt
+
+def exportable_report(filename):
+    """
+    Allow a report ``get`` method to be downloaded with ``?format=csv|ndjson``.
+    The report's ``data`` rows are exported (or the whole result when it has
+    none); CSV columns flatten nested amounts into dotted names.
+
+    Args:
+        filename (str): Download file name without extension
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                fmt = export_format()
+            except ValueError as e:
+                return {'error': str(e)}, 400
+
+            result, status = f(*args, **kwargs)
+            if fmt is None or status != 200:
+                return result, status
+
+            data = result.get('data')
+            rows = data if isinstance(data, list) else [result]
+            if fmt == 'ndjson':
+                return stream_export(rows, fmt, filename)
+
+            # Rows may have different keys (e.g. monthly distributions), so
+            # collect every column in first-seen order
+            rows = [flatten(row) for row in rows]
+            fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+            return stream_export(rows, fmt, filename, fieldnames)
+        return wrapper
+    return decorator
@@ -0,0 +1,252 @@
+import datetime
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, case, event, func, inspect
+from sqlalchemy.orm import Session
+from app import db
+from utils.currency import get_exchange_rate, refresh_exchange_rates
+from utils.data_versions import bump_version
+
+# Currencies every amount is normalized to, with the column holding each
+NORMALIZED_COLUMNS = {
+    'COP': 'amount_cop',
+    'USD': 'amount_usd'
+}
+
+CENTS = Decimal('0.01')
+
+def _as_date(value):
+    # Detail PUT handlers assign raw JSON values before the flush
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+def _currency_code(value):
+    return value.value if hasattr(value, 'value') else value
+
+def normalized_amounts(amount, currency, on_date=None):
+    """
+    Convert an amount to every normalized currency
+
+    Args:
+        amount (Decimal): The amount in its own currency
+        currency (str): The amount's currency code
+        on_date (date): The transaction date the rate applies to
+
+    Returns:
+        dict: Column name -> amount rounded to cents, e.g. ``{'amount_cop': ..., 'amount_usd': ...}``.
+        An amount is ``None`` while the rate for ``on_date`` is not known; it is
+        filled in by :func:`renormalize_amounts` once the rate is stored.
+    """
+    amount = Decimal(str(amount))
+    currency = _currency_code(currency)
+
+    values = {}
+    for target, column in NORMALIZED_COLUMNS.items():
+        # A provisional rate would be persisted for good, so leave the amount unset instead
+        rate = get_exchange_rate(currency, target, on_date, dated=True)
+        values[column] = (amount * Decimal(str(rate))).quantize(CENTS, rounding=ROUND_HALF_UP) if rate is not None else None
+    return values
+
+def normalized_amount(model, currency):
+    """
+    SQL expression for a model's amount in ``currency``. Rows written before
+    the normalized columns existed, or before the rate for their date was
+    known, are converted at the current rate until they are backfilled.
+
+    Args:
+        model: Model class with ``amount``, ``currency`` and normalized columns
+        currency (str): Target currency code ('COP' or 'USD')
+
+    Returns:
+        ColumnElement: The amount expression, suitable for ``func.sum``
+    """
+    column = getattr(model, NORMALIZED_COLUMNS[currency])
+    fallback = case(
+        *[(model.currency == source, model.amount * get_exchange_rate(source, currency))
+          for source in NORMALIZED_COLUMNS],
+        else_=model.amount
+    )
+    return func.coalesce(column, fallback)
+
+def normalized_sums(model):
+    """
+    SQL aggregates of a model's amounts split like the period rollups: the
+    sums of ``amount_cop`` and ``amount_usd`` (where an amount in its own
+    currency is the amount itself, and an unknown one counts as 0), and the
+    sum of the amounts whose normalized value in the other currency is not
+    known yet, to be converted at the current rate
+
+    Args:
+        model: Model class with ``amount``, ``currency`` and normalized columns
+
+    Returns:
+        list: ``[amount_cop sum, amount_usd sum, pending amount sum]`` expressions
+    """
+    sums = [func.sum(case((model.currency == target, model.amount),
+                          else_=func.coalesce(getattr(model, column), 0)))
+            for target, column in NORMALIZED_COLUMNS.items()]
+    pending = func.sum(sum(
+        case((and_(model.currency != target, getattr(model, column).is_(None)), model.amount), else_=0)
+        for target, column in NORMALIZED_COLUMNS.items()
+    ))
+    return sums + [pending]
+
+# Models kept in sync by track_normalized_amounts: model class -> date attribute
+_tracked_models = {}
+
+def _normalize(target, date_attr):
+    values = normalized_amounts(target.amount, target.currency, _as_date(getattr(target, date_attr)))
+    for column, value in values.items():
+        setattr(target, column, value)
+
+def normalize(target):
+    """
+    Set a tracked row's normalized amounts from its amount, currency and date
+    now, instead of when the session is flushed; e.g. before the amounts are
+    added to the period rollups.
+
+    Args:
+        target: Instance of a model registered with :func:`track_normalized_amounts`
+    """
+    _normalize(target, _tracked_models[type(target)])
+
+def track_normalized_amounts(model, date_attr='date'):
+    """
+    Keep ``amount_cop``/``amount_usd`` in sync with ``amount`` and ``currency``
+    on every ORM insert and on updates that change the amount, currency or date.
+    Core bulk inserts bypass the session and must call :func:`normalized_amounts`.
+
+    Args:
+        model: Model class with ``amount``, ``currency`` and normalized columns
+        date_attr (str): Name of the transaction date attribute
+    """
+    _tracked_models[model] = date_attr
+
+@event.listens_for(Session, 'before_flush')
+def _normalize_before_flush(session, flush_context, instances):
+    # Rates are looked up here rather than in mapper hooks, which run in the
+    # middle of the flush where the session cannot be queried
+    for target in list(session.new) + list(session.dirty):
+        date_attr = _tracked_models.get(type(target))
+        if date_attr is None:
+            continue
+
+        state = inspect(target)
+        normalized = [state.attrs[column] for column in NORMALIZED_COLUMNS.values()]
+        if state.pending:
+            # Unless the amounts were already normalized, e.g. by normalize()
+            if all(attr.value is None for attr in normalized):
+                _normalize(target, date_attr)
+        elif (any(state.attrs[attr].history.has_changes() for attr in ('amount', 'currency', date_attr))
+              and not any(attr.history.has_changes() for attr in normalized)):
+            _normalize(target, date_attr)
+
+def _normalized_models():
+    from models.income import Income
+    from models.expense import Expense, AccruedExpense
+    from models.payment import Payment
+
+    return ((Income, 'date'), (Expense, 'date'), (Payment, 'date'), (AccruedExpense, 'due_date'))
+
+def _unnormalized(model):
+    return (model.amount_cop.is_(None)) | (model.amount_usd.is_(None))
+
+def _renormalize(model, date_attr, rows):
+    # Incomes and expenses are also summed in the period rollups: take the
+    # rows out with their old amounts and add them back normalized
+    from utils.rollups import rollup_applier
+    apply = rollup_applier(model)
+
+    for row in rows:
+        if apply is not None:
+            apply(row, sign=-1)
+            apply(row)
+        else:
+            _normalize(row, date_attr)
+
+def backfill_normalized_amounts(batch_size=1000):
+    """
+    Fill the normalized amount columns of rows written before they existed,
+    or before the rate for their date was known
+
+    Args:
+        batch_size (int): Rows updated per commit
+
+    Returns:
+        int: Number of rows filled in
+    """
+    total = 0
+    for model, date_attr in _normalized_models():
+        last_id = 0
+        while True:
+            # Rows whose rate is still unknown stay NULL, so page by id instead of re-querying them
+            rows = model.query.filter(
+                _unnormalized(model),
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            _renormalize(model, date_attr, rows)
+            last_id = rows[-1].id
+            bump_version(model.__tablename__)
+            db.session.commit()
+            total += sum(1 for row in rows if row.amount_cop is not None and row.amount_usd is not None)
+
+        logging.info(f"Backfilled normalized amounts for {model.__tablename__}")
+    return total
+
+def renormalize_amounts(currencies, on_date):
+    """
+    Fill the normalized amounts left unset for lack of a rate, once the rate
+    for ``on_date`` is stored. Errors are logged and otherwise ignored.
+
+    Args:
+        currencies (tuple): The stored rate's currency pair, e.g. ``('USD', 'COP')``
+        on_date (date): The stored rate's date; today's rate also covers future dates
+    """
+    # Only rates between the normalized currencies are used (not e.g. EUR-USD)
+    if not all(currency in NORMALIZED_COLUMNS for currency in currencies):
+        return
+
+    try:
+        tables = []
+        for model, date_attr in _normalized_models():
+            column = getattr(model, date_attr)
+            rows = model.query.filter(
+                _unnormalized(model),
+                model.currency.in_(currencies),
+                column >= on_date if on_date == datetime.date.today() else column == on_date
+            ).all()
+            _renormalize(model, date_attr, rows)
+            if rows:
+                tables.append(model.__tablename__)
+
+        if tables:
+            bump_version(*tables)
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error normalizing amounts for {on_date}: {str(e)}")
+
+# CLI: flask fx backfill
+fx_cli = AppGroup('fx', help='Manage FX-normalized amounts')
+
+@fx_cli.command('backfill')
+@click.option('--batch-size', default=1000, help='Rows updated per commit')
+def backfill_command(batch_size):
+    """Fill amount_cop/amount_usd for existing incomes, expenses and payments"""
+    refresh_exchange_rates()
+    count = backfill_normalized_amounts(batch_size)
+    click.echo(f"Backfilled normalized amounts for {count} rows")
+
+@fx_cli.command('refresh')
+def refresh_command():
+    """Fetch today's exchange rates into the rate store"""
+    for pair, rate in refresh_exchange_rates().items():
+        click.echo(f"{pair}: {rate if rate is not None else 'unavailable'}")
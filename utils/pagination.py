@@ -1,4 +1,22 @@
+import base64
+import datetime
+import enum
+import json
+from decimal import Decimal
 from math import ceil
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import Date, DateTime, Enum, Float, Numeric, func, tuple_
+from app import db
+from utils.data_versions import get_versions
+from utils.serializers import dump
+
+# Ways of computing ``total_items``, see :func:`paginate_query`
+COUNT_MODES = ("exact", "window", "cached", "none")
+
+# Unfiltered row counts: (database url, table name) -> (data version, count)
+_counts = {}
+_counts_lock = threading.Lock()
 
 def _as_int(value, default):
     """
@@ -11,7 +29,7 @@ def _as_int(value, default):
         return default
 
 
-def paginate(query, page, per_page, schema):
+def paginate(query, page, per_page, schema, count=None):
     """
     Apply pagination to a SQLAlchemy *query* and return a dictionary
     containing serialized items plus pagination metadata.
@@ -23,24 +41,88 @@ def paginate(query, page, per_page, schema):
         per_page (int | None): Items per page. Defaults to 10, with a hard
             upper limit of 100.
         schema: Marshmallow schema used to serialize each item.
+        count (str | None): How ``total_items`` is computed, one of
+            :data:`COUNT_MODES`. Defaults to the ``PAGINATION_COUNT`` setting.
 
     Returns:
         dict: ``{"data": [...], "pagination": {...}}``
     """
+    items, pagination = paginate_query(query, page, per_page, count)
+    serialized_items = dump(schema, items, many=True)
+
+    return {"data": serialized_items, "pagination": pagination}
+
+
+def paginate_query(query, page, per_page, count=None):
+    """
+    Apply pagination to a SQLAlchemy *query* without serializing the items.
+
+    Count modes:
+
+    * ``exact``: a separate ``SELECT COUNT(*)`` query.
+    * ``window``: ``COUNT(*) OVER()`` selected with the page, so one query.
+    * ``cached``: for unfiltered queries, the exact count cached per table
+      data version (see ``utils.data_versions``); filtered queries use
+      ``window``. Only for tables whose writes call ``bump_version``.
+    * ``none``: no count; ``has_next`` comes from fetching one extra row and
+      ``total_items``/``total_pages`` are ``None``.
+
+    Args:
+        query: SQLAlchemy query object.
+        page (int | None): Current page number (1-based).
+        per_page (int | None): Items per page (default 10, max 100).
+        count (str | None): Count mode; defaults to the ``PAGINATION_COUNT``
+            setting, or ``exact``.
+
+    Returns:
+        tuple: ``(items, pagination)`` where ``pagination`` is the metadata
+        dictionary returned by :func:`paginate`.
+    """
     # Sanitize parameters -----------------------------------------------------
     page = max(1, _as_int(page, 1))
     per_page = min(100, max(1, _as_int(per_page, 10)))
+    if count is None and has_app_context():
+        count = current_app.config.get("PAGINATION_COUNT")
+    if count not in COUNT_MODES:
+        count = "exact"
 
     # -------------------------------------------------------------------------
-    total_items = query.count()
-    total_pages = ceil(total_items / per_page) if total_items else 0
+    offset = (page - 1) * per_page
+    total_items = None
+
+    if count == "cached":
+        total_items = _cached_count(query)
+        if total_items is None:
+            count = "window"
 
-    items = (
-        query.limit(per_page)
-        .offset((page - 1) * per_page)
-        .all()
-    )
-    serialized_items = schema.dump(items)
+    if count == "window":
+        rows = (
+            query.add_columns(func.count().over().label("_total_items"))
+            .limit(per_page)
+            .offset(offset)
+            .all()
+        )
+        items = [row[0] for row in rows]
+        # Past the last page there is no row to read the total from
+        total_items = rows[0][-1] if rows else (query.count() if page > 1 else 0)
+    elif count == "none":
+        items = query.limit(per_page + 1).offset(offset).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+    else:
+        if total_items is None:
+            total_items = query.count()
+        items = (
+            query.limit(per_page)
+            .offset(offset)
+            .all()
+        )
+
+    if total_items is not None:
+        total_pages = ceil(total_items / per_page) if total_items else 0
+        has_next = page < total_pages
+    else:
+        total_pages = None
 
     pagination = {
         "page": page,
@@ -48,11 +130,156 @@ def paginate(query, page, per_page, schema):
         "total_items": total_items,
         "total_pages": total_pages,
         "has_prev": page > 1,
-        "has_next": page < total_pages,
+        "has_next": has_next,
     }
     if pagination["has_prev"]:
         pagination["prev_page"] = page - 1
     if pagination["has_next"]:
         pagination["next_page"] = page + 1
 
-    return {"data": serialized_items, "pagination": pagination}
+    return items, pagination
+
+
+def _cached_count(query):
+    """
+    Get the row count of an unfiltered single-table *query* from the
+    in-process cache, or ``None`` if the query is filtered.
+    """
+    if query.whereclause is not None or len(query.column_descriptions) != 1:
+        return None
+    table_name = getattr(query.column_descriptions[0]["entity"], "__tablename__", None)
+    if table_name is None:
+        return None
+
+    version = get_versions(table_name)[0]
+    key = (db.engine.url.render_as_string(), table_name)
+    with _counts_lock:
+        cached = _counts.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    total_items = query.order_by(None).count()
+    with _counts_lock:
+        _counts[key] = (version, total_items)
+    return total_items
+
+
+def _encode_cursor(values, direction):
+    payload = json.dumps({"v": values, "d": direction}, default=_cursor_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _cursor_default(value):
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_value(column, raw):
+    """Convert a JSON cursor value back to the column's Python type."""
+    if raw is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        return column_type.enum_class[raw]
+    if isinstance(column_type, DateTime):
+        return datetime.datetime.fromisoformat(raw)
+    if isinstance(column_type, Date):
+        return datetime.date.fromisoformat(raw)
+    if isinstance(column_type, Numeric) and not isinstance(column_type, Float):
+        return Decimal(raw)
+    return column_type.python_type(raw)
+
+
+def _decode_cursor(cursor, columns):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(column, raw) for column, raw in zip(columns, payload["v"])]
+        if len(values) != len(columns) or payload["d"] not in ("next", "prev"):
+            raise ValueError
+        return values, payload["d"]
+    except (ValueError, KeyError, TypeError, LookupError):
+        raise ValueError("Invalid cursor")
+
+
+def paginate_cursor(query, sort_column, id_column, cursor, per_page, schema, descending=False):
+    """
+    Apply keyset (cursor) pagination to a SQLAlchemy *query* and return a
+    dictionary containing serialized items plus cursor metadata.
+
+    Args:
+        query: SQLAlchemy query object; any ``order_by`` is replaced.
+        sort_column: Non-nullable column the results are sorted by.
+        id_column: Unique column used as tie-breaker (usually ``Model.id``).
+        cursor (str | None): Opaque cursor from a previous response; empty or
+            ``None`` returns the first page.
+        per_page (int | None): Items per page (default 10, max 100).
+        schema: Marshmallow schema used to serialize each item.
+        descending (bool): Sort from largest to smallest.
+
+    Returns:
+        dict: ``{"data": [...], "pagination": {...}}``
+
+    Raises:
+        ValueError: If the cursor or sort column is invalid.
+    """
+    items, pagination = paginate_cursor_query(query, sort_column, id_column, cursor, per_page, descending)
+    return {"data": dump(schema, items, many=True), "pagination": pagination}
+
+
+def paginate_cursor_query(query, sort_column, id_column, cursor, per_page, descending=False):
+    """
+    Apply keyset (cursor) pagination without serializing the items.
+
+    Pages are selected with ``WHERE (sort, id) > (:sort, :id)`` on the
+    ``(sort, id)`` ordering, so every page costs the same regardless of how
+    deep it is.
+
+    Returns:
+        tuple: ``(items, pagination)`` where ``pagination`` has ``per_page``,
+        ``has_next``, ``has_prev``, ``next_cursor`` and ``prev_cursor``.
+    """
+    per_page = min(100, max(1, _as_int(per_page, 10)))
+
+    columns = [sort_column, id_column]
+    for column in columns:
+        prop = getattr(column, "property", None)
+        if not hasattr(prop, "columns") or prop.columns[0].nullable:
+            raise ValueError("Cursor pagination requires a non-nullable sort field")
+
+    direction = "next"
+    if cursor:
+        values, direction = _decode_cursor(cursor, columns)
+
+        # Moving backwards flips the comparison; the page is reversed below
+        forward = (direction == "next") != descending
+        key = tuple_(*columns)
+        query = query.filter(key > tuple_(*values) if forward else key < tuple_(*values))
+
+    ascending = (direction == "next") != descending
+    query = query.order_by(None).order_by(*[column.asc() if ascending else column.desc() for column in columns])
+
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if direction == "prev":
+        items.reverse()
+
+    def cursor_for(item, to):
+        return _encode_cursor([getattr(item, column.key) for column in columns], to)
+
+    has_next = has_more if direction == "next" else bool(cursor)
+    has_prev = bool(cursor) if direction == "next" else has_more
+
+    pagination = {
+        "per_page": per_page,
+        "has_next": has_next and bool(items),
+        "has_prev": has_prev and bool(items),
+        "next_cursor": cursor_for(items[-1], "next") if has_next and items else None,
+        "prev_cursor": cursor_for(items[0], "prev") if has_prev and items else None,
+    }
+
+    return items, pagination
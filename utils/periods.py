@@ -0,0 +1,97 @@
+import datetime
+from sqlalchemy import Date, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+# Period granularities supported by reports and rollups
+GRANULARITIES = ('month', 'quarter', 'year')
+
+# Length of each granularity in months
+PERIOD_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+
+def period_start(value, granularity):
+    """
+    Get the first day of the period that contains a date
+
+    Args:
+        value (date): The date to bucket
+        granularity (str): One of 'month', 'quarter' or 'year'
+
+    Returns:
+        date: The first day of the period
+    """
+    if granularity == 'month':
+        return datetime.date(value.year, value.month, 1)
+    if granularity == 'quarter':
+        return datetime.date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+    if granularity == 'year':
+        return datetime.date(value.year, 1, 1)
+    raise ValueError(f"Invalid granularity: {granularity}")
+
+def shift_period(start, count, granularity):
+    """
+    Get the start of the period ``count`` periods after another one
+
+    Args:
+        start (date): The first day of a period
+        count (int): Number of periods to move forward
+        granularity (str): One of 'month', 'quarter' or 'year'
+
+    Returns:
+        date: The first day of the later period
+    """
+    months = start.month - 1 + count * PERIOD_MONTHS[granularity]
+    return datetime.date(start.year + months // 12, months % 12 + 1, 1)
+
+def period_label(start, granularity):
+    """
+    Format a period start date as a report label (2024-01, 2024-Q1, 2024)
+
+    Args:
+        start (date): The first day of the period
+        granularity (str): One of 'month', 'quarter' or 'year'
+
+    Returns:
+        str: The period label
+    """
+    if granularity == 'quarter':
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    if granularity == 'year':
+        return str(start.year)
+    return f"{start.year}-{start.month:02d}"
+
+class period_start_expr(FunctionElement):
+    """
+    SQL expression for the first day of the period containing a date column.
+
+    Compiles to ``date_trunc`` on PostgreSQL and to an equivalent ``date()``
+    expression on SQLite, so grouping always happens in the database::
+
+        db.session.query(period_start_expr(Income.date, 'quarter'), func.sum(Income.amount))
+    """
+    type = Date()
+    inherit_cache = True
+    name = 'period_start'
+
+    def __init__(self, column, granularity):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Invalid granularity: {granularity}")
+        # Granularity travels as a clause so it is part of the statement cache key
+        super().__init__(column, literal_column(f"'{granularity}'"))
+
+@compiles(period_start_expr)
+def _compile_period_start_default(element, compiler, **kw):
+    column, granularity = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CAST(date_trunc({granularity}, {column}) AS DATE)"
+
+@compiles(period_start_expr, 'sqlite')
+def _compile_period_start_sqlite(element, compiler, **kw):
+    clause, granularity = element.clauses
+    column = compiler.process(clause, **kw)
+    if granularity.name == "'month'":
+        return f"date({column}, 'start of month')"
+    if granularity.name == "'year'":
+        return f"date({column}, 'start of year')"
+    # Quarter: step back (month - 1) % 3 months from the start of the month
+    return (f"date({column}, 'start of month', "
+            f"'-' || ((CAST(strftime('%m', {column}) AS INTEGER) - 1) % 3) || ' months')")
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+@lru_cache(maxsize=None)
+def _schema_column_names(model, schema_class, only=None):
+    mapper = inspect(model)
+    columns = {attr.key for attr in mapper.column_attrs}
+
+    names = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+    for name, field in schema_class._declared_fields.items():
+        if field.load_only or (only is not None and name not in only):
+            continue
+        attribute = field.attribute or name
+        if attribute in columns and attribute not in names:
+            names.append(attribute)
+    return tuple(names)
+
+def _column_names(model, schema):
+    if isinstance(schema, type):
+        return _schema_column_names(model, schema)
+    only = frozenset(schema.only) if schema.only is not None else None
+    return _schema_column_names(model, type(schema), only)
+
+def schema_columns(model, schema):
+    """
+    Get the model columns a schema serializes, plus the primary key
+
+    Args:
+        model: Model class
+        schema: Marshmallow schema instance or class; an instance's ``only`` is honoured
+
+    Returns:
+        list: Column attributes, e.g. ``[Expense.id, Expense.description, ...]``
+    """
+    return [getattr(model, name) for name in _column_names(model, schema)]
+
+def project_query(query, model, schema, *extra):
+    """
+    Load only the columns a list schema serializes, so large columns such as
+    ``notes`` are not fetched or hydrated. Other attributes are loaded on
+    access, one query per row, so pass any that are read after the query.
+
+    Args:
+        query: SQLAlchemy query for ``model``
+        model: Model class
+        schema: Marshmallow schema used to serialize the results
+        *extra: Additional attributes to load (e.g. the sort column); non-columns are ignored
+
+    Returns:
+        Query: The query with a ``load_only`` option
+    """
+    names = list(_column_names(model, schema))
+    columns = inspect(model).column_attrs
+    names += [column.key for column in extra
+              if column is not None and column.key in columns and column.key not in names]
+    return query.options(load_only(*[getattr(model, name) for name in names]))
+
+@lru_cache(maxsize=256)
+def _restricted_schema(schema_class, many, only, exclude):
+    return schema_class(many=many, only=only, exclude=exclude)
+
+def select_fields(schema, fields):
+    """
+    Restrict a schema to the fields requested with a ``fields=`` query
+    parameter. Pass the result to :func:`project_query` as well, so the
+    unrequested columns are not loaded either.
+
+    Args:
+        schema: Marshmallow schema instance
+        fields (str | None): Comma-separated field names, e.g. ``id,amount,date``
+
+    Returns:
+        Schema: ``schema`` itself if no fields are given, otherwise a shared
+        instance with ``only`` set to the requested fields
+
+    Raises:
+        ValueError: If a requested field is not serialized by the schema
+    """
+    if not fields:
+        return schema
+
+    names = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    unknown = sorted(names - set(schema.dump_fields))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not names:
+        return schema
+
+    # Keep the declared field order, so the output does not depend on the request
+    only = tuple(name for name in schema.dump_fields if name in names)
+    return _restricted_schema(type(schema), schema.many, only, frozenset(schema.exclude))
@@ -0,0 +1,126 @@
+import json
+from abc import ABC, abstractmethod
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class RateProvider(ABC):
+    """
+    Source of exchange rates for ``utils.currency``.
+
+    Providers are called from the background refresher thread only, so they
+    may block on the network; they return ``None`` when a rate is unavailable.
+    """
+
+    @abstractmethod
+    def fetch(self, base_currency, target_currency, on_date=None):
+        """
+        Get the rate from ``base_currency`` to ``target_currency``
+
+        Args:
+            base_currency (str): The base currency code
+            target_currency (str): The target currency code
+            on_date (date): Date of a historical rate, or None for the latest rate
+
+        Returns:
+            float: The exchange rate, or None if unavailable
+        """
+
+class ExchangeRateApiProvider(RateProvider):
+    """Rates from ExchangeRate-API over a pooled ``requests.Session``"""
+
+    API_URL = "https://v6.exchangerate-api.com/v6/{api_key}"
+
+    def __init__(self, api_key, history=False, timeout=5):
+        self.base_url = self.API_URL.format(api_key=api_key)
+        self.history = history
+        self.timeout = timeout
+
+        # Reuse connections across refreshes and retry transient errors
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=('GET',))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retries))
+
+    def fetch(self, base_currency, target_currency, on_date=None):
+        # Historical lookups need a paid plan, so they are opt-in
+        if on_date is not None and not self.history:
+            return None
+
+        try:
+            if on_date is None:
+                url = f"{self.base_url}/pair/{base_currency}/{target_currency}"
+            else:
+                url = f"{self.base_url}/history/{base_currency}/{on_date.year}/{on_date.month}/{on_date.day}"
+            response = self.session.get(url, timeout=self.timeout)
+
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('result') == 'success':
+                    if on_date is None:
+                        return float(data['conversion_rate'])
+                    return float(data['conversion_rates'][target_currency])
+
+            logging.warning(f"Exchange rate API call failed: {response.status_code}")
+        except Exception as e:
+            logging.error(f"Error fetching exchange rate: {str(e)}")
+
+        return None
+
+class FileRateProvider(RateProvider):
+    """
+    Rates read from a local JSON file, for development and tests::
+
+        {
+            "rates": {"USD-COP": 3950.0, "EUR-USD": 1.08},
+            "history": {"2025-01-31": {"USD-COP": 4310.5}}
+        }
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, base_currency, target_currency, on_date=None):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading exchange rate file {self.path}: {str(e)}")
+            return None
+
+        rates = data.get('rates', {}) if on_date is None else data.get('history', {}).get(on_date.isoformat(), {})
+        rate = rates.get(f"{base_currency}-{target_currency}")
+        return float(rate) if rate is not None else None
+
+def create_provider(config):
+    """
+    Build the rate provider selected by the app config
+
+    ``EXCHANGE_RATE_PROVIDER`` is 'api' (default), 'file' or a
+    :class:`RateProvider` instance. The API provider reads
+    ``EXCHANGE_RATE_API_KEY`` and ``EXCHANGE_RATE_HISTORY``; the file
+    provider reads ``EXCHANGE_RATE_FILE``.
+
+    Args:
+        config (dict): The Flask app config
+
+    Returns:
+        RateProvider: The provider, or None if no rates can be fetched
+    """
+    provider = config.get('EXCHANGE_RATE_PROVIDER', 'api')
+    if isinstance(provider, RateProvider):
+        return provider
+
+    if provider == 'file':
+        path = config.get('EXCHANGE_RATE_FILE')
+        if not path:
+            logging.warning("EXCHANGE_RATE_PROVIDER=file but EXCHANGE_RATE_FILE is not set")
+            return None
+        return FileRateProvider(path)
+
+    api_key = config.get('EXCHANGE_RATE_API_KEY')
+    if not api_key:
+        logging.warning("No Exchange Rate API key provided, using stored or fallback rates")
+        return None
+    return ExchangeRateApiProvider(api_key, history=bool(config.get('EXCHANGE_RATE_HISTORY')))
@@ -0,0 +1,126 @@
+import copy
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import current_app, request
+from utils.data_versions import get_versions
+
+# Defaults used when the app config does not set limits
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+
+class ReportCache:
+    """
+    In-process LRU cache for report results.
+
+    Keys combine the endpoint, the normalized query parameters, the current
+    date and the data versions of the tables the report reads, so a write to
+    any of those tables makes older entries unreachable; they are then
+    evicted in LRU order once the entry or byte budget is exceeded.
+
+    Values are copied in and out, so a caller that modifies a result it got
+    (or stored) cannot change what later requests are served.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def set(self, key, value, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        size = len(json.dumps(value, default=str))
+        if size > max_bytes:
+            return
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while len(self._entries) > max_entries or self._size > max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0
+            }
+
+report_cache = ReportCache()
+
+def _normalize_args(parser):
+    # Parsed arguments include defaults and coerced types, so equivalent
+    # requests (e.g. with and without ?currency=COP) share an entry
+    if parser is not None:
+        args = parser.parse_args()
+    else:
+        args = request.args.to_dict()
+    return tuple(sorted((key, str(value)) for key, value in args.items() if value not in (None, '')))
+
+def cached_report(tables, parser=None):
+    """
+    Cache a report function (or ``get`` method) by endpoint, parameters and
+    data versions. The parameters are read from the current request, so a
+    report function shares its entries with background jobs for the same
+    endpoint. Only ``200`` responses are cached.
+
+    Args:
+        tables (tuple): Names of the tables the report reads
+        parser (RequestParser): Optional parser used to normalize parameters
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = (
+                request.endpoint,
+                _normalize_args(parser),
+                date.today(),
+                get_versions(*tables)
+            )
+
+            cached = report_cache.get(key)
+            if cached is not None:
+                return cached, 200
+
+            result, status = f(*args, **kwargs)
+            if status == 200:
+                report_cache.set(
+                    key,
+                    result,
+                    current_app.config.get('REPORT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+                    current_app.config.get('REPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+                )
+            return result, status
+        return wrapper
+    return decorator
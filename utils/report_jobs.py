@@ -0,0 +1,138 @@
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app import db
+from models.report_job import ReportJob, ReportJobStatus
+
+# Defaults used when the app config does not set limits
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 20
+DEFAULT_RETENTION = datetime.timedelta(days=1)
+DEFAULT_TIMEOUT = datetime.timedelta(minutes=30)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(DEFAULT_MAX_PENDING)
+
+class JobQueueFull(Exception):
+    """Raised when the worker pool already has the maximum number of jobs queued"""
+
+def _get_executor(app):
+    global _executor, _pending
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('REPORT_JOB_WORKERS', DEFAULT_WORKERS),
+                thread_name_prefix='report-job'
+            )
+            _pending = threading.BoundedSemaphore(
+                app.config.get('REPORT_JOB_MAX_PENDING', DEFAULT_MAX_PENDING)
+            )
+        return _executor
+
+def _run(app, job_id, view, path, params):
+    try:
+        # The report parses its arguments from the request, so run it in a
+        # request context carrying the original query parameters
+        with app.test_request_context(path, query_string=params):
+            job = db.session.get(ReportJob, job_id)
+            job.status = ReportJobStatus.EN_PROCESO
+            job.started_at = datetime.datetime.utcnow()
+            db.session.commit()
+
+            try:
+                result, status = view()
+            except Exception as e:
+                logging.error(f"Error running report job {job_id}: {str(e)}")
+                result, status = {'error': str(e)}, 500
+
+            # End the report's transaction: after a database error it can only
+            # be rolled back, and the job update below would fail with it
+            db.session.rollback()
+
+            if status == 200:
+                job.status = ReportJobStatus.COMPLETADO
+                job.result = result
+            else:
+                job.status = ReportJobStatus.FALLIDO
+                job.error = result.get('error') if isinstance(result, dict) else str(result)
+            job.finished_at = datetime.datetime.utcnow()
+            db.session.commit()
+    except Exception as e:
+        logging.error(f"Error updating report job {job_id}: {str(e)}")
+    finally:
+        _pending.release()
+
+def _prune(app):
+    retention = app.config.get('REPORT_JOB_RETENTION', DEFAULT_RETENTION)
+    cutoff = datetime.datetime.utcnow() - retention
+    ReportJob.query.filter(
+        ReportJob.status.in_([ReportJobStatus.COMPLETADO, ReportJobStatus.FALLIDO]),
+        ReportJob.finished_at < cutoff
+    ).delete(synchronize_session=False)
+
+def recover_jobs(app):
+    """
+    Mark jobs queued or running for longer than ``REPORT_JOB_TIMEOUT`` as
+    failed. Jobs live in the memory of the process that accepted them, so
+    they are lost when it restarts; the timeout leaves the jobs of other
+    live workers alone. Runs at startup and whenever a job is submitted.
+
+    Args:
+        app: Flask application, with an app context pushed
+
+    Returns:
+        int: Number of jobs marked as failed
+    """
+    now = datetime.datetime.utcnow()
+    cutoff = now - app.config.get('REPORT_JOB_TIMEOUT', DEFAULT_TIMEOUT)
+    count = ReportJob.query.filter(
+        ReportJob.status.in_([ReportJobStatus.PENDIENTE, ReportJobStatus.EN_PROCESO]),
+        db.func.coalesce(ReportJob.started_at, ReportJob.created_at) < cutoff
+    ).update({
+        ReportJob.status: ReportJobStatus.FALLIDO,
+        ReportJob.error: 'The job was interrupted, submit it again',
+        ReportJob.finished_at: now
+    }, synchronize_session=False)
+    if count:
+        logging.warning(f"Marked {count} interrupted report jobs as failed")
+    return count
+
+def submit_job(report, view, path, params):
+    """
+    Queue a report to be computed on the background worker pool
+
+    Args:
+        report (str): Report name stored on the job (e.g. 'financial-projection')
+        view (callable): Computes the report and returns ``(result, status)``;
+            it is called without arguments inside a request context built
+            from ``path`` and ``params``
+        path (str): URL path of the report endpoint
+        params (dict): Report query parameters
+
+    Returns:
+        ReportJob: The pending job
+
+    Raises:
+        JobQueueFull: If too many jobs are already queued or running
+    """
+    app = current_app._get_current_object()
+    executor = _get_executor(app)
+
+    if not _pending.acquire(blocking=False):
+        raise JobQueueFull('Too many report jobs in progress, try again later')
+
+    try:
+        _prune(app)
+        recover_jobs(app)
+        job = ReportJob(report=report, params=params)
+        db.session.add(job)
+        db.session.commit()
+    except Exception:
+        _pending.release()
+        raise
+
+    executor.submit(_run, app, job.id, view, path, params)
+    return job
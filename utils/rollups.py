@@ -0,0 +1,297 @@
+import datetime
+import logging
+from decimal import Decimal
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+from app import db
+from models.rollup import PeriodRollup, RollupSource, Currency
+from models.income import Income
+from models.expense import Expense
+from utils.aggregation import currency_code, month_ordinal
+from utils.data_versions import bump_version
+from utils.fx import NORMALIZED_COLUMNS, normalize, normalized_sums
+from utils.upsert import upsert
+from utils.periods import GRANULARITIES, PERIOD_MONTHS, period_start, period_start_expr
+
+# Columns summed by the rollup upserts
+AMOUNT_COLUMNS = ('amount', *NORMALIZED_COLUMNS.values(), 'pending_amount')
+
+def _as_date(value):
+    # Detail PUT handlers assign raw JSON values before the flush
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+def _as_currency(value):
+    if hasattr(value, 'value'):
+        value = value.value
+    return Currency(value)
+
+def _upsert(source, granularity, start, currency, category, has_client, amounts, count):
+    """Add ``amounts``/``count`` to a rollup row, creating it if needed."""
+    values = {
+        'source': source,
+        'granularity': granularity,
+        'period_start': start,
+        'currency': currency,
+        'category': category,
+        'has_client': has_client,
+        **amounts,
+        'row_count': count,
+        'updated_at': datetime.datetime.utcnow()
+    }
+    table = PeriodRollup.__table__
+    upsert(table, values, ['source', 'granularity', 'period_start', 'currency', 'category', 'has_client'],
+           lambda excluded: {
+               **{column: table.c[column] + getattr(excluded, column) for column in AMOUNT_COLUMNS},
+               'row_count': table.c.row_count + excluded.row_count,
+               'updated_at': excluded.updated_at
+           })
+
+def _amounts(amount, currency, normalized):
+    """
+    Split a row's amount into the rollup amount columns. The amount in its own
+    currency is the amount itself; a normalized amount that is not known yet
+    goes to ``pending_amount`` instead.
+    """
+    amount = Decimal(str(amount))
+    amounts = {'amount': amount, 'pending_amount': Decimal('0')}
+    for target, column in NORMALIZED_COLUMNS.items():
+        value = normalized.get(column)
+        if target == currency.value:
+            value = amount
+        elif value is None:
+            amounts['pending_amount'] += amount
+            value = 0
+        amounts[column] = Decimal(str(value))
+    return amounts
+
+def _apply(source, row, date_attr, category, has_client, sign):
+    row_date = _as_date(getattr(row, date_attr))
+    currency = _as_currency(row.currency)
+    normalized = {column: getattr(row, column) for column in NORMALIZED_COLUMNS.values()}
+    amounts = {column: value * sign for column, value in _amounts(row.amount, currency, normalized).items()}
+
+    for granularity in GRANULARITIES:
+        _upsert(source, granularity, period_start(row_date, granularity),
+                currency, category, has_client, amounts, sign)
+
+def apply_income(income, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) an income to the period rollups. The
+    changes are staged on ``db.session``, so they are committed (or rolled
+    back) together with the income write. Adding an income normalizes its
+    amounts first, so the rollups get the values that are saved with it.
+
+    Args:
+        income (Income): The income being created, updated or deleted
+        sign (int): 1 to add the income, -1 to remove it
+    """
+    if sign > 0:
+        normalize(income)
+    _apply(RollupSource.INCOME, income, 'date', income.type, income.client is not None, sign)
+
+def apply_expense(expense, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) an expense to the period rollups,
+    like :func:`apply_income`.
+
+    Args:
+        expense (Expense): The expense being created, updated or deleted
+        sign (int): 1 to add the expense, -1 to remove it
+    """
+    if sign > 0:
+        normalize(expense)
+    _apply(RollupSource.EXPENSE, expense, 'date', expense.category, False, sign)
+
+def rollup_applier(model):
+    """
+    Get the function that keeps a model's rows in the period rollups
+
+    Args:
+        model: Model class
+
+    Returns:
+        callable: :func:`apply_income`, :func:`apply_expense` or None
+    """
+    return {Income: apply_income, Expense: apply_expense}.get(model)
+
+def _apply_many(source, rows):
+    # Sum the rows per rollup key first, so each period gets a single upsert
+    totals = {}
+    for row_date, amount, currency, normalized, category, has_client in rows:
+        row_date = _as_date(row_date)
+        currency = _as_currency(currency)
+        amounts = _amounts(amount, currency, normalized)
+        for granularity in GRANULARITIES:
+            key = (granularity, period_start(row_date, granularity), currency, category, has_client)
+            key_amounts, count = totals.get(key, (dict.fromkeys(AMOUNT_COLUMNS, Decimal('0')), 0))
+            totals[key] = ({column: key_amounts[column] + amounts[column] for column in AMOUNT_COLUMNS}, count + 1)
+
+    for (granularity, start, currency, category, has_client), (amounts, count) in totals.items():
+        _upsert(source, granularity, start, currency, category, has_client, amounts, count)
+
+def apply_incomes(rows):
+    """
+    Add incomes inserted in bulk (Core inserts bypass the ORM) to the period
+    rollups, like :func:`apply_income`.
+
+    Args:
+        rows (list): Inserted column values, dictionaries with ``date``,
+            ``amount``, ``currency``, the normalized amounts, ``type`` and ``client``
+    """
+    _apply_many(RollupSource.INCOME, [
+        (row['date'], row['amount'], row['currency'], row, row['type'], row.get('client') is not None)
+        for row in rows
+    ])
+
+def apply_expenses(rows):
+    """
+    Add expenses inserted in bulk to the period rollups, like :func:`apply_income`.
+
+    Args:
+        rows (list): Inserted column values, dictionaries with ``date``,
+            ``amount``, ``currency``, the normalized amounts and ``category``
+    """
+    _apply_many(RollupSource.EXPENSE, [
+        (row['date'], row['amount'], row['currency'], row, row['category'], False)
+        for row in rows
+    ])
+
+def period_totals(source, granularity, date_from=None, date_to=None, client_only=False):
+    """
+    Get totals per period and currency from the rollup tables
+
+    Args:
+        source (RollupSource): Incomes or expenses
+        granularity (str): One of 'month', 'quarter' or 'year'
+        date_from (date): Include periods containing this date and later
+        date_to (date): Include periods starting on or before this date
+        client_only (bool): Only include incomes linked to a client
+
+    Returns:
+        list: ``(period_start, amount, currency)`` tuples ordered by period
+    """
+    query = db.session.query(
+        PeriodRollup.period_start,
+        func.sum(PeriodRollup.amount).label('amount'),
+        PeriodRollup.currency
+    ).filter(
+        PeriodRollup.source == source,
+        PeriodRollup.granularity == granularity,
+        PeriodRollup.row_count > 0
+    )
+
+    if date_from:
+        query = query.filter(PeriodRollup.period_start >= period_start(date_from, granularity))
+    if date_to:
+        query = query.filter(PeriodRollup.period_start <= date_to)
+    if client_only:
+        query = query.filter(PeriodRollup.has_client.is_(True))
+
+    return query.group_by(
+        PeriodRollup.period_start,
+        PeriodRollup.currency
+    ).order_by(
+        PeriodRollup.period_start
+    ).all()
+
+def period_rows(source, granularity, first, date_to=None, client_only=False):
+    """
+    Get totals per period and currency from the rollup tables as rows for
+    :func:`utils.aggregation.index_sums`, numbering the periods from ``first``
+
+    Args:
+        source (RollupSource): Incomes or expenses
+        granularity (str): One of 'month', 'quarter' or 'year'
+        first (date): Start of the first period to include (index 0)
+        date_to (date): Include periods starting on or before this date
+        client_only (bool): Only include incomes linked to a client
+
+    Returns:
+        list: ``(index, currency code, amount, amount_cop, amount_usd, pending_amount)`` tuples
+    """
+    index = (month_ordinal(PeriodRollup.period_start) - (first.year * 12 + first.month - 1)) // PERIOD_MONTHS[granularity]
+    query = db.session.query(
+        index,
+        currency_code(PeriodRollup.currency),
+        *[func.sum(getattr(PeriodRollup, column)) for column in AMOUNT_COLUMNS]
+    ).filter(
+        PeriodRollup.source == source,
+        PeriodRollup.granularity == granularity,
+        PeriodRollup.row_count > 0,
+        PeriodRollup.period_start >= first
+    )
+
+    if date_to:
+        query = query.filter(PeriodRollup.period_start <= date_to)
+    if client_only:
+        query = query.filter(PeriodRollup.has_client.is_(True))
+
+    return query.group_by(
+        PeriodRollup.period_start,
+        PeriodRollup.currency
+    ).all()
+
+def rebuild_rollups():
+    """
+    Recompute every rollup row from the incomes and expenses tables, splitting
+    the amounts like :func:`apply_income`. Used for backfills and to repair
+    drift after manual data changes.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    PeriodRollup.query.delete()
+
+    table = PeriodRollup.__table__
+    now = datetime.datetime.utcnow()
+    sources = [
+        (RollupSource.INCOME, Income, Income.type, Income.client.isnot(None)),
+        (RollupSource.EXPENSE, Expense, Expense.category, db.literal(False))
+    ]
+
+    # Aggregate each source and granularity in the database with INSERT ... SELECT
+    for source, model, category_col, has_client_col in sources:
+        for granularity in GRANULARITIES:
+            bucket = period_start_expr(model.date, granularity)
+            select = db.select(
+                db.literal(source, table.c.source.type),
+                db.literal(granularity),
+                bucket,
+                model.currency,
+                category_col,
+                has_client_col,
+                func.sum(model.amount),
+                *normalized_sums(model),
+                func.count(model.id),
+                db.literal(now, table.c.updated_at.type)
+            ).group_by(
+                bucket,
+                model.currency,
+                category_col,
+                has_client_col
+            )
+            db.session.execute(table.insert().from_select([
+                'source', 'granularity', 'period_start', 'currency', 'category',
+                'has_client', *AMOUNT_COLUMNS, 'row_count', 'updated_at'
+            ], select))
+
+    count = PeriodRollup.query.count()
+    bump_version('incomes', 'expenses')
+    db.session.commit()
+
+    logging.info(f"Rebuilt {count} period rollup rows")
+    return count
+
+# CLI: flask rollups rebuild
+rollups_cli = AppGroup('rollups', help='Manage income/expense period rollups')
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild the period rollup tables from incomes and expenses"""
+    count = rebuild_rollups()
+    click.echo(f"Rebuilt {count} period rollup rows")
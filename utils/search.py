@@ -0,0 +1,162 @@
+import logging
+import re
+import click
+from flask.cli import AppGroup
+from sqlalchemy import DDL, Column, Index, Integer, MetaData, Table, event, func, literal_column, or_, select, text
+from app import db
+
+# Text search configuration of the PostgreSQL index; queries must use the same one
+SEARCH_CONFIG = "'spanish'::regconfig"
+
+# Model class -> searchable column names, filled by :func:`searchable`
+_searchable = {}
+
+# FTS5 tables are queried through Core only, so they live outside db.metadata
+_fts_metadata = MetaData()
+
+def _fts_name(table_name):
+    return f"{table_name}_search"
+
+def _document(model, columns):
+    """PostgreSQL ``tsvector`` of the searchable columns, identical in the index and in queries"""
+    parts = [func.coalesce(model.__table__.c[column], text("''")) for column in columns]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op('||')(text("' '")).op('||')(part)
+    return func.to_tsvector(text(SEARCH_CONFIG), document)
+
+def _sqlite_ddl(table_name, columns):
+    fts = _fts_name(table_name)
+    names = ', '.join(columns)
+    new_values = ', '.join(f"new.{column}" for column in columns)
+    old_values = ', '.join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table_name}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END"
+    ]
+
+def searchable(model, *columns):
+    """
+    Make a model's text columns searchable with :func:`apply_search`.
+
+    On PostgreSQL this adds a GIN index on the columns' ``tsvector``; on SQLite
+    it creates an FTS5 table kept in sync by triggers. Both are created with
+    the model's table, so writes through the ORM or Core are indexed alike.
+
+    Args:
+        model: Model class with an integer ``id`` primary key
+        *columns (str): Names of the text columns to search
+    """
+    table = model.__table__
+    _searchable[model] = columns
+
+    Index(f"ix_{table.name}_search", _document(model, columns),
+          postgresql_using='gin').ddl_if(dialect='postgresql')
+
+    Table(_fts_name(table.name), _fts_metadata,
+          Column('rowid', Integer), Column('rank'), *[Column(column) for column in columns])
+
+    for statement in _sqlite_ddl(table.name, columns):
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(table, 'before_drop',
+                 DDL(f"DROP TABLE IF EXISTS {_fts_name(table.name)}").execute_if(dialect='sqlite'))
+
+def _fts_query(q):
+    """Quote each word of a user query as an FTS5 prefix term, e.g. ``arr 2024`` -> ``"arr"* "2024"*``"""
+    words = re.findall(r'\w+', q, re.UNICODE)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search_condition(model, q):
+    """
+    Build the full-text filter and relevance score for a search string
+
+    Args:
+        model: Model class registered with :func:`searchable`
+        q (str): User search string
+
+    Returns:
+        tuple: ``(condition, score)`` SQL expressions; higher scores rank first
+    """
+    columns = _searchable[model]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        document = _document(model, columns)
+        tsquery = func.websearch_to_tsquery(text(SEARCH_CONFIG), q)
+        return document.op('@@')(tsquery), func.ts_rank(document, tsquery)
+
+    if dialect == 'sqlite':
+        fts = _fts_metadata.tables[_fts_name(model.__tablename__)]
+        match = text(f"{fts.name} MATCH :fts_query").bindparams(fts_query=_fts_query(q) or '""')
+        condition = model.id.in_(select(fts.c.rowid).where(match))
+        # FTS5 rank is bm25, where lower is better
+        score = -select(fts.c.rank).where(match, fts.c.rowid == model.id).scalar_subquery()
+        return condition, score
+
+    # Other databases: unindexed substring match
+    pattern = f"%{q}%"
+    condition = or_(*[getattr(model, column).ilike(pattern) for column in columns])
+    return condition, literal_column('0')
+
+def apply_search(query, model, q, rank=True, extra=None):
+    """
+    Filter a query to the rows matching a search string
+
+    Args:
+        query: SQLAlchemy query on ``model``
+        model: Model class registered with :func:`searchable`
+        q (str): User search string
+        rank (bool): Order the results by relevance, replacing any ordering
+        extra: Optional condition ORed with the model's own match, e.g. a
+            search on a related table; those rows rank last
+
+    Returns:
+        Query: The filtered query
+    """
+    condition, score = search_condition(model, q)
+    if extra is not None:
+        condition = or_(condition, extra)
+        score = func.coalesce(score, 0)
+
+    query = query.filter(condition)
+    if rank:
+        query = query.order_by(None).order_by(score.desc(), model.id)
+    return query
+
+def rebuild_search_indexes():
+    """
+    Rebuild the SQLite FTS5 tables from their content tables, e.g. for
+    databases created before search was added. PostgreSQL indexes need no
+    rebuild.
+
+    Returns:
+        int: Number of tables rebuilt
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+
+    count = 0
+    with db.engine.begin() as connection:
+        for model, columns in _searchable.items():
+            for statement in _sqlite_ddl(model.__tablename__, columns):
+                connection.exec_driver_sql(statement)
+            fts = _fts_name(model.__tablename__)
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            count += 1
+            logging.info(f"Rebuilt search index {fts}")
+    return count
+
+# CLI: flask search rebuild
+search_cli = AppGroup('search', help='Manage full-text search indexes')
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Create and fill the SQLite search tables for existing rows"""
+    count = rebuild_search_indexes()
+    click.echo(f"Rebuilt {count} search indexes")
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+from sqlalchemy import literal
+from app import db
+
+def upsert(table, values, key, update, connection=None):
+    """
+    Insert a row, or update the row that already has the same key, in one
+    statement (``INSERT ... ON CONFLICT DO UPDATE``) on PostgreSQL and SQLite
+
+    Args:
+        table: Table to write, e.g. ``PeriodRollup.__table__``
+        values (dict): Column values of the new row
+        key (list): Columns of the unique constraint that identifies the row
+        update (callable): Takes the proposed row (``excluded``) and returns
+            the column -> value updates for an existing row, e.g.
+            ``lambda excluded: {'amount': table.c.amount + excluded.amount}``
+        connection: Connection to write on instead of ``db.session``, for
+            writes made in their own transaction
+    """
+    executor = connection if connection is not None else db.session
+    dialect = (connection if connection is not None else db.session.get_bind()).dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table).values(**values)
+        executor.execute(stmt.on_conflict_do_update(index_elements=key, set_=update(stmt.excluded)))
+        return
+
+    # Generic fallback for other dialects: update the existing row, or insert it
+    excluded = SimpleNamespace(**{name: literal(value, table.c[name].type) for name, value in values.items()})
+    result = executor.execute(
+        table.update().where(*[table.c[name] == values[name] for name in key]).values(**update(excluded))
+    )
+    if not result.rowcount:
+        executor.execute(table.insert().values(**values))